@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 # aiolimiter_fix.py - Fix "Finished Script" error with aiolimiter
 
-import sys
-import subprocess
 import tkinter as tk
 from tkinter import messagebox
 
 # Import shared components
 from common import (
     RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOLIMITER_VERSION,
     check_ofscraper_installation
 )
+from planner import apply_pins, target_environments
+from proc_runner import StreamingRunner
 
 class AiolimiterFixTool:
     def __init__(self, parent, update_status_callback):
@@ -23,7 +24,7 @@ class AiolimiterFixTool:
         
         # Check if user wants to proceed
         fix_dialog = messagebox.askyesno("Fix aiolimiter",
-                                       "This will set aiolimiter to 1.1.0 to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?",
+                                       f"This will set aiolimiter to {RECOMMENDED_AIOLIMITER_VERSION} to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?",
                                        parent=self.parent)
         if not fix_dialog:
             self.update_status("Skipping aiolimiter fix.")
@@ -40,7 +41,7 @@ class AiolimiterFixTool:
             return
             
         # Apply the fix based on installation type
-        self.update_status("Installing aiolimiter==1.1.0...")
+        self.update_status(f"Installing {RECOMMENDED_AIOLIMITER}...")
         if install_type in ["pip", "both"]:
             self.install_aiolimiter_via_pip()
         elif install_type == "pipx":
@@ -48,22 +49,22 @@ class AiolimiterFixTool:
         
     def install_aiolimiter_via_pip(self):
         """Install aiolimiter via pip"""
-        try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
-                          RECOMMENDED_AIOLIMITER, "--force-reinstall"],
-                          check=True, text=True)
-            self.update_status("aiolimiter installed successfully via pip.")
-        except subprocess.CalledProcessError as e:
-            self.update_status(f"Error installing aiolimiter via pip:\n{e}")
+        apply_pins(target_environments("pip"), [RECOMMENDED_AIOLIMITER],
+                   self.update_status, confirm_force=self.confirm_force,
+                   runner=StreamingRunner(self.parent, self.update_status))
             
     def install_aiolimiter_via_pipx(self):
         """Install aiolimiter via pipx inject"""
-        try:
-            subprocess.run(["pipx", "inject", "ofscraper", RECOMMENDED_AIOLIMITER, "--force"],
-                          check=True, text=True)
-            self.update_status("aiolimiter injected successfully via pipx.")
-        except subprocess.CalledProcessError as e:
-            self.update_status(f"Error injecting aiolimiter via pipx:\n{e}")
+        apply_pins(target_environments("pipx"), [RECOMMENDED_AIOLIMITER],
+                   self.update_status, confirm_force=self.confirm_force,
+                   runner=StreamingRunner(self.parent, self.update_status))
+        
+    def confirm_force(self):
+        """Ask whether to reinstall aiolimiter even though it is already at the recommended version"""
+        return messagebox.askyesno("Force reinstall",
+                                   f"aiolimiter {RECOMMENDED_AIOLIMITER_VERSION} is already installed.\n"
+                                   "Reinstall it anyway? (Only needed if the install is corrupted.)",
+                                   parent=self.parent)
 
 # For standalone testing
 if __name__ == "__main__":
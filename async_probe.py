@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# async_probe.py - Run pip/pipx detection commands concurrently with timeouts
+
+import json
+import asyncio
+import subprocess
+
+# Per-command timeout in seconds
+DEFAULT_TIMEOUT = 15
+
+async def _run_command(cmd, timeout):
+    """Run a command and return (returncode, stdout), or None if it failed to start or timed out."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill(proc)
+        await proc.wait()
+        return None
+    except asyncio.CancelledError:
+        # Another probe already answered; don't leave this one running
+        _kill(proc)
+        await proc.wait()
+        raise
+    return proc.returncode, stdout.decode("utf-8", errors="replace")
+
+def _kill(proc):
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+
+def _parse_pip_show(returncode, stdout):
+    """pip show exits non-zero when the package is missing."""
+    if returncode != 0:
+        return {"installed": False}
+    for line in stdout.splitlines():
+        if line.startswith("Version:"):
+            return {"installed": True, "version": line.split(":", 1)[1].strip()}
+    return {"installed": True}
+
+def _pipx_list_parser(name):
+    def parse(returncode, stdout):
+        if returncode != 0:
+            return None
+        try:
+            venv_info = json.loads(stdout).get("venvs", {}).get(name)
+        except ValueError:
+            return None
+        if not venv_info:
+            return {"installed": False}
+        answer = {"installed": True, "venv": venv_info.get("venv")}
+        version = venv_info.get("metadata", {}).get("version")
+        if version:
+            answer["version"] = version
+        return answer
+    return parse
+
+def _pipx_runpip_parser(returncode, stdout):
+    if returncode != 0:
+        return None
+    for line in stdout.splitlines():
+        if line.startswith("Version:"):
+            return {"installed": True, "version": line.split(":", 1)[1].strip()}
+    return None
+
+def pip_show_group(python, name):
+    """Probe group answering whether `python` has the package, and which version."""
+    probes = [([python, "-m", "pip", "show", name], _parse_pip_show)]
+    return probes, lambda answer: "installed" in answer
+
+def pipx_group(name):
+    """Probe group racing `pipx list --json` against `pipx runpip <name> show <name>`."""
+    probes = [
+        (["pipx", "list", "--json"], _pipx_list_parser(name)),
+        (["pipx", "runpip", name, "show", name], _pipx_runpip_parser),
+    ]
+
+    def is_definitive(answer):
+        if answer.get("installed") is False:
+            return True
+        return bool(answer.get("version") and answer.get("venv"))
+    return probes, is_definitive
+
+async def _first_definitive(probes, is_definitive, timeout):
+    """Start every probe at once; stop as soon as the merged answers are definitive."""
+    tasks = {asyncio.ensure_future(_run_command(cmd, timeout)): parse for cmd, parse in probes}
+    answer = {}
+    try:
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                parse = tasks.pop(task)
+                output = task.result()
+                parsed = parse(*output) if output is not None else None
+                if not parsed:
+                    continue
+                for key, value in parsed.items():
+                    answer.setdefault(key, value)
+                if is_definitive(answer):
+                    return answer
+        return answer or None
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _run_groups(groups, timeout):
+    names = list(groups)
+    results = await asyncio.gather(
+        *(_first_definitive(probes, check, timeout) for probes, check in (groups[n] for n in names)))
+    return dict(zip(names, results))
+
+def run_probe_groups(groups, timeout=DEFAULT_TIMEOUT):
+    """
+    Run several probe groups concurrently.
+    groups maps a label to (probes, is_definitive); returns label -> answer dict (or None).
+    Wall time is that of the slowest group, not the sum of every command.
+    """
+    if not groups:
+        return {}
+    return asyncio.run(_run_groups(groups, timeout))
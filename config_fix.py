@@ -13,10 +13,10 @@ from common import (
     YOUTUBE_VIDEO_URL,
     open_in_text_editor
 )
-
-# Update the recommended URL
-NEW_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/rafa-9/dynamic-rules/main/rules.json"
-OLD_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/deviint/onlyfans-dynamic-rules/main/dynamicRules.json"
+from config_rules import default_config, describe_changes, set_rules_url, validate_config, write_config
+from config_schema import describe_violation
+from profiles import describe_profile, describe_sweep, sweep_profiles
+from rules_proxy import local_rules_url, proxy_running
 
 class ConfigFixTool:
     def __init__(self, parent, update_status_callback):
@@ -43,18 +43,10 @@ class ConfigFixTool:
                                  "Create new config.json with recommended settings?",
                                  parent=self.parent):
                 try:
-                    os.makedirs(os.path.dirname(config_path), exist_ok=True)
-                    default_config = {
-                        "advanced_options": {
-                            "dynamic-mode-default": "generic",
-                            "custom_values": {"DYNAMIC_GENERIC_URL": NEW_DYNAMIC_GENERIC_URL}
-                        },
-                        "cdm_options": {"key-mode-default": "manual"}
-                    }
-                    with open(config_path, "w", encoding="utf-8") as f:
-                        json.dump(default_config, f, indent=2)
+                    new_config = default_config()
+                    write_config(config_path, new_config)
                     self.update_status(f"Created new config.json at {config_path}.")
-                    self.check_key_mode_default(default_config)
+                    self.check_key_mode_default(new_config)
                 except Exception as e:
                     self.update_status(f"Failed to create config.json: {e}")
             else:
@@ -69,50 +61,31 @@ class ConfigFixTool:
             self.update_status(f"Failed to read config.json: {e}")
             return
 
-        # Update configuration values
-        if "advanced_options" not in config_data or config_data["advanced_options"] is None:
-            config_data["advanced_options"] = {}
-        adv_options = config_data["advanced_options"]
-        
-        if adv_options.get("dynamic-mode-default") != "generic":
-            adv_options["dynamic-mode-default"] = "generic"
-            self.update_status("Set advanced_options.dynamic-mode-default to 'generic'.")
-            
-        # Handle custom_values based on specific cases
-        if "custom_values" not in adv_options or adv_options["custom_values"] is None:
-            adv_options["custom_values"] = {"DYNAMIC_GENERIC_URL": NEW_DYNAMIC_GENERIC_URL}
-            self.update_status(f"Set advanced_options.custom_values with new DYNAMIC_GENERIC_URL.")
-        else:
-            cv = adv_options["custom_values"]
-            current_url = cv.get("DYNAMIC_GENERIC_URL")
-            
-            # Check if URL is the old one that needs updating
-            if current_url == OLD_DYNAMIC_GENERIC_URL:
-                cv["DYNAMIC_GENERIC_URL"] = NEW_DYNAMIC_GENERIC_URL
-                self.update_status(f"Updated DYNAMIC_GENERIC_URL from old to new URL.")
-            # If URL is missing or different from desired URL, set it
-            elif current_url is None or current_url != NEW_DYNAMIC_GENERIC_URL:
-                cv["DYNAMIC_GENERIC_URL"] = NEW_DYNAMIC_GENERIC_URL
-                self.update_status(f"Set DYNAMIC_GENERIC_URL to new URL.")
-
-        # Ensure CDM options are set
-        if "cdm_options" not in config_data or config_data["cdm_options"] is None:
-            config_data["cdm_options"] = {}
-        cdm_options = config_data["cdm_options"]
-        
-        if cdm_options.get("key-mode-default") != "manual":
-            cdm_options["key-mode-default"] = "manual"
-            self.update_status("Set cdm_options.key-mode-default to 'manual'.")
+        # Check every setting in the schema; safe problems are fixed in place
+        violations = validate_config(config_data, fix=True)
+        if not violations:
+            self.update_status("config.json already matches the recommended settings.")
+        for violation in violations:
+            prefix = "Fixed" if violation["fixed"] else "Needs manual attention"
+            self.update_status(f"{prefix}: {describe_violation(violation)}")
+        self.offer_rules_proxy(config_data)
 
-        # Save updated config.json
+        # Save updated config.json (atomically, with a backup, and only if something changed)
         try:
-            with open(config_path, "w", encoding="utf-8") as f:
-                json.dump(config_data, f, indent=2)
-            self.update_status("Config.json updated successfully.")
+            changes = write_config(config_path, config_data)
+            if changes:
+                self.update_status(f"Config.json updated successfully. Changed: {describe_changes(changes)}")
+            else:
+                self.update_status("Config.json unchanged; not rewritten.")
             self.check_key_mode_default(config_data)
         except Exception as e:
             self.update_status(f"Failed to update config.json: {e}")
 
+        # Check every profile's auth.json, not just main_profile
+        report = sweep_profiles([os.path.dirname(config_path)])
+        for line in describe_sweep(report):
+            self.update_status(line)
+
         # Offer to open auth.json for editing
         auth_prompt = (
             "If your auth is still failing, clear your browser's cookies and cache.\n"
@@ -120,7 +93,10 @@ class ConfigFixTool:
             "Open auth.json in your default text editor?"
         )
         if messagebox.askyesno("Open auth.json", auth_prompt, parent=self.parent):
-            auth_path = os.path.expanduser("~/.config/ofscraper/main_profile/auth.json")
+            auth_path = self.choose_auth_path(report)
+            if auth_path is None:
+                self.update_status("No profile selected.")
+                return
             if not os.path.isfile(auth_path):
                 os.makedirs(os.path.dirname(auth_path), exist_ok=True)
                 with open(auth_path, "w", encoding="utf-8") as f:
@@ -131,6 +107,33 @@ class ConfigFixTool:
             except Exception as e:
                 self.update_status(f"Error opening auth.json: {e}")
                 
+    def offer_rules_proxy(self, config_data):
+        """If the local rules proxy is running, offer to read the dynamic rules through it."""
+        if not proxy_running():
+            return
+        url = local_rules_url()
+        custom_values = config_data.get("advanced_options", {}).get("custom_values", {})
+        if custom_values.get("DYNAMIC_GENERIC_URL") == url:
+            self.update_status(f"DYNAMIC_GENERIC_URL already uses the local rules proxy ({url}).")
+            return
+        if messagebox.askyesno("Local Rules Proxy",
+                               f"A local rules proxy is running at {url}.\n"
+                               "Point DYNAMIC_GENERIC_URL at it? (ofscraper will then need it running.)",
+                               parent=self.parent):
+            set_rules_url(config_data, url)
+            self.update_status(f"DYNAMIC_GENERIC_URL set to {url}.")
+
+    def choose_auth_path(self, report):
+        """Ask which profile's auth.json to open when there is more than one."""
+        profiles = [profile for entry in report["roots"] for profile in entry["profiles"]]
+        if len(profiles) == 1:
+            return profiles[0]["auth_path"]
+        choices = "\n".join(f"{number}) {describe_profile(profile)}"
+                            for number, profile in enumerate(profiles, 1))
+        choice = simpledialog.askinteger("Open auth.json", f"Select profile:\n{choices}",
+                                         minvalue=1, maxvalue=len(profiles), parent=self.parent)
+        return profiles[choice - 1]["auth_path"] if choice else None
+
     def check_key_mode_default(self, config_data):
         """Check key-mode-default and offer DRM key information"""
         # Always ensure key-mode-default is set to manual
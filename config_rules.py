@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# config_rules.py - The config.json settings the fixes enforce, without any GUI
+
+import os
+import re
+import glob
+import json
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from config_schema import compile_schema, describe_violation, escape_pointer
+from fileutils import atomic_write_text
+
+# Update the recommended URL
+NEW_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/rafa-9/dynamic-rules/main/rules.json"
+OLD_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/deviint/onlyfans-dynamic-rules/main/dynamicRules.json"
+# The local caching proxy (rules_proxy.py) serving the recommended rules, on any port
+LOCAL_RULES_URL_PATTERN = r"http://(127\.0\.0\.1|localhost)(:\d+)?/rules\.json"
+# What DYNAMIC_GENERIC_URL may be: the recommended URL, or the local proxy in front of it
+RULES_URL_PATTERN = f"{re.escape(NEW_DYNAMIC_GENERIC_URL)}|{LOCAL_RULES_URL_PATTERN}"
+
+DEFAULT_CONFIG_PATH = os.path.expanduser("~/.config/ofscraper/config.json")
+# Timestamped copies of config.json kept next to it, taken before each rewrite
+CONFIG_BACKUPS_KEPT = 5
+
+# The settings checked in every config.json. Keys not listed here are left alone; "fix" marks
+# the values that are safe to set automatically (numeric strings and out-of-range numbers are
+# fixed without one). Only settings whose wrong values break scraping or slow it down are listed.
+CONFIG_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "main_profile": {"type": "string"},
+        "advanced_options": {
+            "type": "object", "required": True, "fix": {},
+            "properties": {
+                "dynamic-mode-default": {"type": "string", "required": True, "const": "generic", "fix": "generic"},
+                "custom_values": {
+                    "type": "object", "required": True, "fix": {},
+                    "properties": {
+                        "DYNAMIC_GENERIC_URL": {"type": "string", "required": True,
+                                                "pattern": RULES_URL_PATTERN, "fix": NEW_DYNAMIC_GENERIC_URL},
+                    },
+                },
+                # User choices: an unknown value is reported, never overwritten
+                "backend": {"type": "string", "enum": ["aio", "httpx"]},
+                "cache-mode": {"type": "string", "enum": ["sqlite", "json"]},
+                "downloadbars": {"type": "boolean"},
+                "appendlog": {"type": "boolean"},
+                "code-execution": {"type": "boolean"},
+                "sanitize_text": {"type": "boolean"},
+                "remove_hash_match": {"type": "boolean"},
+                "logs_expire_time": {"type": "integer", "minimum": 0, "nullable": True},
+            },
+        },
+        "cdm_options": {
+            "type": "object", "required": True, "fix": {},
+            "properties": {
+                "key-mode-default": {"type": "string", "required": True, "const": "manual", "fix": "manual"},
+            },
+        },
+        "performance_options": {
+            "type": "object",
+            "properties": {
+                "download-sems": {"type": "integer", "minimum": 1},
+                "download-limit": {"type": "integer", "minimum": 0, "nullable": True},
+            },
+        },
+        "download_options": {
+            "type": "object",
+            "properties": {
+                "auto_resume": {"type": "boolean"},
+                # Sizes may be a byte count or a string with a unit ("500MB")
+                "file_size_max": {"type": ["integer", "string"], "nullable": True},
+                "file_size_min": {"type": ["integer", "string"], "nullable": True},
+                "system_free_min": {"type": ["integer", "string"], "nullable": True},
+                "length_max": {"type": "integer", "minimum": 0, "nullable": True},
+                "length_min": {"type": "integer", "minimum": 0, "nullable": True},
+            },
+        },
+        "file_options": {
+            "type": "object",
+            "properties": {
+                "save_location": {"type": "string"},
+                "textlength": {"type": "integer", "minimum": 0},
+                "truncation_default": {"type": "boolean"},
+            },
+        },
+    },
+}
+# Compiled once; every validation reuses it
+_SCHEMA = compile_schema(CONFIG_SCHEMA)
+
+def default_config(rules_url=NEW_DYNAMIC_GENERIC_URL):
+    """A new config.json with the recommended settings."""
+    return {
+        "advanced_options": {
+            "dynamic-mode-default": "generic",
+            "custom_values": {"DYNAMIC_GENERIC_URL": rules_url}
+        },
+        "cdm_options": {"key-mode-default": "manual"}
+    }
+
+def validate_config(config_data, fix=False):
+    """
+    Check a loaded config against CONFIG_SCHEMA and return its violations
+    (see config_schema.CompiledSchema.validate). With fix=True safe fixes are applied in place.
+    """
+    return _SCHEMA.validate(config_data, fix=fix)
+
+def check_rules_url(rules_url):
+    """Raise ValueError unless rules_url is one DYNAMIC_GENERIC_URL may be set to."""
+    if not re.fullmatch(RULES_URL_PATTERN, rules_url):
+        raise ValueError(f"{rules_url} is neither the recommended rules URL nor a local rules proxy URL")
+
+def set_rules_url(config_data, rules_url):
+    """
+    Point DYNAMIC_GENERIC_URL at rules_url (e.g. the local proxy) in place.
+    Returns True if the value changed; a URL the schema doesn't accept raises ValueError.
+    """
+    check_rules_url(rules_url)
+    if not isinstance(config_data.get("advanced_options"), dict):
+        config_data["advanced_options"] = {}
+    custom_values = config_data["advanced_options"].get("custom_values")
+    if not isinstance(custom_values, dict):
+        custom_values = config_data["advanced_options"]["custom_values"] = {}
+    if custom_values.get("DYNAMIC_GENERIC_URL") == rules_url:
+        return False
+    custom_values["DYNAMIC_GENERIC_URL"] = rules_url
+    return True
+
+def fix_config_data(config_data, rules_url=None):
+    """
+    Apply the recommended settings and every safe fix to a loaded config in place
+    (with rules_url, DYNAMIC_GENERIC_URL is pointed there).
+    Returns a list of messages describing each change (empty if nothing changed).
+    """
+    messages = []
+    if rules_url and set_rules_url(config_data, rules_url):
+        messages.append(f"DYNAMIC_GENERIC_URL set to {rules_url!r}")
+    return messages + [describe_violation(v) for v in validate_config(config_data, fix=True) if v["fixed"]]
+
+_ABSENT = object()
+
+def config_diff(old, new, pointer=""):
+    """
+    Structural diff of two loaded configs: a list of (JSON pointer, "added"|"removed"|"changed").
+    Objects are compared key by key; any other value (lists included) as a whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            changes += config_diff(old.get(key, _ABSENT), new.get(key, _ABSENT), f"{pointer}/{escape_pointer(key)}")
+        return changes
+    if old is _ABSENT:
+        return [(pointer, "added")]
+    if new is _ABSENT:
+        return [(pointer, "removed")]
+    # 1 == True in Python, but not in the file
+    if old != new or type(old) is not type(new):
+        return [(pointer or "/", "changed")]
+    return []
+
+def describe_changes(changes):
+    """One line listing the changed keys."""
+    return ", ".join(f"{pointer} ({kind})" for pointer, kind in changes)
+
+_BACKUP_NAME = re.compile(r"\.(\d{8}-\d{6})(?:-(\d+))?\.bak$")
+
+def _backup_order(path):
+    # "<stamp>.bak" then "<stamp>-2.bak", ... (copy2 keeps the config's mtime, so names decide)
+    match = _BACKUP_NAME.search(path)
+    return match.group(1), int(match.group(2) or 1)
+
+def _own_backups(config_path):
+    """This tool's timestamped backups of config_path (not a user's own config.json.*.bak files)."""
+    return [path for path in glob.glob(glob.escape(config_path) + ".*.bak")
+            if _BACKUP_NAME.fullmatch(path[len(config_path):])]
+
+def _backup_config(config_path, keep):
+    """
+    Copy config_path to config.json.<timestamp>.bak and delete all but the newest `keep` copies
+    (keep <= 0 keeps them all). Only this tool's timestamped backups are ever rotated away.
+    """
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    # Number same-second backups after the newest one, even if older ones were rotated away
+    same_second = [n for found_stamp, n in map(_backup_order, _own_backups(config_path)) if found_stamp == stamp]
+    counter = max(same_second, default=0) + 1
+    backup = f"{config_path}.{stamp}.bak" if counter == 1 else f"{config_path}.{stamp}-{counter}.bak"
+    shutil.copy2(config_path, backup)
+    if keep > 0:
+        for old in sorted(_own_backups(config_path), key=_backup_order)[:-keep]:
+            try:
+                os.unlink(old)
+            except OSError:
+                pass
+    return backup
+
+def write_config(config_path, config_data, keep_backups=CONFIG_BACKUPS_KEPT):
+    """
+    Save config_data only if it differs structurally from what is on disk.
+    The old file is backed up first (rotating; keep_backups <= 0 keeps every backup), and the new one replaces it atomically,
+    so ofscraper never reads a half-written config. Returns the changes (empty if nothing was written).
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            current = json.load(f)
+    except FileNotFoundError:
+        current = _ABSENT
+    except (OSError, ValueError):
+        # Unreadable: always replace it, but keep a copy
+        current = None
+    if current is _ABSENT:
+        changes = [("/", "added")]
+    elif current is None:
+        changes = [("/", "changed")]
+    else:
+        changes = config_diff(current, config_data)
+        if not changes:
+            return []
+
+    mode = None
+    if current is not _ABSENT:
+        mode = os.stat(config_path).st_mode & 0o7777
+        _backup_config(config_path, keep_backups)
+    atomic_write_text(config_path, json.dumps(config_data, indent=2), mode=mode)
+    return changes
+
+def fix_config_file(config_path=DEFAULT_CONFIG_PATH, create=True, rules_url=None):
+    """
+    Load, fix and save a config.json (creating it with defaults if missing and create=True).
+    rules_url points DYNAMIC_GENERIC_URL somewhere else (the local rules proxy).
+    Returns {"path", "created", "changes", "error"}; the file is only rewritten when something changed.
+    """
+    result = {"path": config_path, "created": False, "changes": [], "error": None}
+    if rules_url:
+        try:
+            check_rules_url(rules_url)
+        except ValueError as e:
+            result["error"] = str(e)
+            return result
+    if not os.path.isfile(config_path):
+        if not create:
+            result["error"] = f"{config_path} not found."
+            return result
+        try:
+            write_config(config_path, default_config(rules_url or NEW_DYNAMIC_GENERIC_URL))
+            result["created"] = True
+        except OSError as e:
+            result["error"] = f"Failed to create config.json: {e}"
+        return result
+
+    checked = check_config_file(config_path, fix=True, rules_url=rules_url)
+    result["changes"] = [describe_violation(v) for v in checked["violations"] if v["fixed"]]
+    if checked["rules_url_set"]:
+        result["changes"].insert(0, f"DYNAMIC_GENERIC_URL set to {rules_url!r}")
+    result["error"] = checked["error"]
+    return result
+
+def find_config_files(paths):
+    """Expand files and directories (searched recursively for config.json) into config paths."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                if "config.json" in filenames:
+                    found.append(os.path.join(dirpath, "config.json"))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+def check_config_file(config_path, fix=False, rules_url=None):
+    """
+    Validate one config.json (and with fix, apply the safe fixes and save it if anything changed;
+    with fix and rules_url, DYNAMIC_GENERIC_URL is pointed there first).
+    Returns {"path", "violations", "changed", "rules_url_set", "error"};
+    "changed" lists the (pointer, kind) pairs written.
+    """
+    result = {"path": config_path, "violations": [], "changed": [], "rules_url_set": False, "error": None}
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config_data = json.load(f)
+    except (OSError, ValueError) as e:
+        result["error"] = f"Failed to read config.json: {e}"
+        return result
+    if fix and rules_url and isinstance(config_data, dict):
+        result["rules_url_set"] = set_rules_url(config_data, rules_url)
+    result["violations"] = validate_config(config_data, fix=fix)
+    if result["rules_url_set"] or any(v["fixed"] for v in result["violations"]):
+        try:
+            result["changed"] = write_config(config_path, config_data)
+        except OSError as e:
+            result["error"] = f"Failed to update config.json: {e}"
+    return result
+
+def check_config_files(paths, fix=False, max_workers=8, rules_url=None):
+    """Validate many config files; reading and writing overlap on a small thread pool."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda path: check_config_file(path, fix, rules_url), paths))
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Validate ofscraper config.json files against the recommended settings.")
+    parser.add_argument("paths", nargs="*", help=f"config files, or directories to search (default: {DEFAULT_CONFIG_PATH})")
+    parser.add_argument("--fix", action="store_true", help="apply the safe fixes and save the files")
+    parser.add_argument("--rules-url", metavar="URL",
+                        help="with --fix, point DYNAMIC_GENERIC_URL here (e.g. the rules_proxy.py URL)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only list files with problems")
+    args = parser.parse_args()
+    if args.rules_url and not args.fix:
+        parser.error("--rules-url needs --fix")
+    if args.rules_url:
+        try:
+            check_rules_url(args.rules_url)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = check_config_files(find_config_files(args.paths or [DEFAULT_CONFIG_PATH]), fix=args.fix,
+                                 rules_url=args.rules_url)
+    remaining = [r for r in results if r["error"] or any(not v["fixed"] for v in r["violations"])]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            if args.quiet and not (r["error"] or r["violations"]):
+                continue
+            if not (r["error"] or r["violations"] or r["rules_url_set"]):
+                status = "OK"
+            else:
+                status = "problems" if r in remaining else "fixed"
+            print(f"{r['path']}: {status}")
+            if r["error"]:
+                print(f"  {r['error']}")
+            if r["rules_url_set"]:
+                print(f"  DYNAMIC_GENERIC_URL set to {args.rules_url!r}")
+            for violation in r["violations"]:
+                print(f"  {describe_violation(violation)}")
+        fixed = sum(1 for r in results if r["changed"])
+        print(f"{len(results)} files checked, {fixed} fixed, {len(remaining)} with remaining problems.")
+    sys.exit(1 if remaining else 0)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# config_schema.py - Small JSON schema validator, compiled once into checker objects, with safe autofixes
+
+import re
+
+# Supported schema keywords (a deliberately small subset of JSON Schema):
+#   type        "object", "string", "integer", "boolean", or a list of them
+#   properties  child schemas of an object
+#   required    True if the key must be present in its parent
+#   enum        allowed values;  const: the one allowed value
+#   pattern     regular expression a string must match in full
+#   minimum     lowest allowed integer
+#   nullable    True if null is allowed
+#   fix         value to set when the key is missing/wrong (marks the violation as safely fixable)
+
+_TYPES = {
+    "object": (dict,),
+    "string": (str,),
+    # bool is an int subclass; it is excluded below
+    "integer": (int,),
+    "boolean": (bool,),
+}
+_TRUE_STRINGS = {"true", "yes", "on", "1"}
+_FALSE_STRINGS = {"false", "no", "off", "0"}
+
+class SchemaError(Exception):
+    """The schema itself is malformed (a programming error, raised at import)."""
+
+def escape_pointer(token):
+    """Escape one JSON pointer reference token (RFC 6901)."""
+    return token.replace("~", "~0").replace("/", "~1")
+
+def _coerce(value, types):
+    """A safe conversion of value to one of types (e.g. "6" -> 6), or raise ValueError."""
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if "integer" in types and text.lstrip("-").isdigit():
+            return int(text)
+        if "boolean" in types and text in _TRUE_STRINGS:
+            return True
+        if "boolean" in types and text in _FALSE_STRINGS:
+            return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and "integer" in types and value == int(value):
+        return int(value)
+    raise ValueError(value)
+
+class _Node:
+    """One compiled schema node; every lookup table is built once here."""
+
+    def __init__(self, schema, pointer):
+        self.pointer = pointer
+        types = schema.get("type")
+        self.types = tuple([types] if isinstance(types, str) else types or ())
+        for name in self.types:
+            if name not in _TYPES:
+                raise SchemaError(f"{pointer or '/'}: unknown type {name!r}")
+        self.python_types = tuple(t for name in self.types for t in _TYPES[name])
+        self.nullable = bool(schema.get("nullable"))
+        self.required = bool(schema.get("required"))
+        self.has_fix = "fix" in schema
+        self.fix = schema.get("fix")
+        self.minimum = schema.get("minimum")
+        if "const" in schema:
+            self.allowed = (schema["const"],)
+        else:
+            self.allowed = tuple(schema["enum"]) if "enum" in schema else None
+        try:
+            self.pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        except re.error as e:
+            raise SchemaError(f"{pointer or '/'}: bad pattern: {e}")
+        self.children = [(key, _Node(child, f"{pointer}/{escape_pointer(key)}"))
+                         for key, child in (schema.get("properties") or {}).items()]
+
+    def _type_ok(self, value):
+        if value is None:
+            return self.nullable
+        if not self.types:
+            return True
+        if isinstance(value, bool) and "boolean" not in self.types:
+            return False
+        return isinstance(value, self.python_types)
+
+    def _fixed_value(self):
+        # Containers get a fresh copy so fixes never share one dict
+        return dict(self.fix) if isinstance(self.fix, dict) else self.fix
+
+    def check(self, parent, key, fix, violations):
+        """Validate parent[key] (and its children); with fix, repair what can be repaired safely."""
+        def report(message, fixed_value=None, fixable=False):
+            violation = {"pointer": self.pointer, "message": message, "fixable": fixable, "fixed": False}
+            if fixable:
+                # Record the value as set; children may fill a fixed container in later
+                violation["fix"] = dict(fixed_value) if isinstance(fixed_value, dict) else fixed_value
+                if fix:
+                    parent[key] = fixed_value
+                    violation["fixed"] = True
+            violations.append(violation)
+
+        if key not in parent:
+            if self.required:
+                report("is missing", self._fixed_value(), self.has_fix)
+            # A key that was just filled in is checked like any other value
+            if key not in parent:
+                return
+        value = parent[key]
+
+        if not self._type_ok(value):
+            try:
+                coerced = _coerce(value, self.types)
+            except ValueError:
+                report(f"must be {' or '.join(self.types)}, not {type(value).__name__}",
+                       self._fixed_value(), self.has_fix)
+            else:
+                report(f"must be {' or '.join(self.types)}, not {type(value).__name__} {value!r}", coerced, True)
+            value = parent.get(key)
+            if not self._type_ok(value):
+                return
+
+        if value is None:
+            return
+        if self.allowed is not None and value not in self.allowed:
+            allowed = self.allowed[0] if len(self.allowed) == 1 else list(self.allowed)
+            report(f"is {value!r}, expected {allowed!r}", self._fixed_value(), self.has_fix)
+        elif self.pattern is not None and isinstance(value, str) and not self.pattern.fullmatch(value):
+            expected = f"expected {self.fix!r}" if self.has_fix else f"must match {self.pattern.pattern!r}"
+            report(f"is {value!r}, {expected}", self._fixed_value(), self.has_fix)
+        elif self.minimum is not None and isinstance(value, int) and value < self.minimum:
+            report(f"is {value}, minimum is {self.minimum}", self.minimum, True)
+
+        value = parent.get(key)
+        if self.children and isinstance(value, dict):
+            for child_key, child in self.children:
+                child.check(value, child_key, fix, violations)
+
+class CompiledSchema:
+    """A schema compiled once; validate() can then be called for any number of documents."""
+
+    def __init__(self, schema):
+        if schema.get("type") != "object":
+            raise SchemaError("the root of a config schema must be an object")
+        self.root = _Node(schema, "")
+
+    def validate(self, document, fix=False):
+        """
+        Return a list of violations, each {"pointer", "message", "fixable", "fixed"[, "fix"]}.
+        With fix=True the document is repaired in place as it is walked, so the children of
+        a container that was just created are checked (and filled in) in the same pass.
+        """
+        violations = []
+        if not isinstance(document, dict):
+            return [{"pointer": "", "message": "must be an object", "fixable": False, "fixed": False}]
+        for key, child in self.root.children:
+            child.check(document, key, fix, violations)
+        return violations
+
+def compile_schema(schema):
+    """Compile a schema dict (see the keywords above)."""
+    return CompiledSchema(schema)
+
+def describe_violation(violation):
+    """One-line description of a violation."""
+    text = f"{violation['pointer'] or '/'}: {violation['message']}"
+    if violation["fixed"]:
+        return f"{text} -> set to {violation['fix']!r}"
+    if violation["fixable"]:
+        return f"{text} (can be fixed: {violation['fix']!r})"
+    return text
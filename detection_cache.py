@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# detection_cache.py - On-disk cache for installation detection, keyed by filesystem fingerprints
+
+import os
+import json
+
+from fileutils import user_cache_dir, atomic_write_text
+
+CACHE_FORMAT_VERSION = 1
+
+def cache_path():
+    """Return the location of the detection cache file."""
+    return os.path.join(user_cache_dir(), "detection.json")
+
+def fingerprint(paths):
+    """
+    Build a fingerprint from the mtime and inode of each directory.
+    Installing or removing a package changes the mtime of its site-packages
+    (or pipx venvs) directory, which invalidates anything cached against it.
+    """
+    result = []
+    for path in sorted(set(paths)):
+        try:
+            st = os.stat(path)
+            result.append([path, st.st_mtime_ns, st.st_ino])
+        except OSError:
+            result.append([path, None, None])
+    return result
+
+def _read_cache():
+    try:
+        with open(cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == CACHE_FORMAT_VERSION:
+            return data
+    except Exception:
+        pass
+    return {"version": CACHE_FORMAT_VERSION, "entries": {}}
+
+def load(namespace, key, current_fingerprint):
+    """Return the cached value if its fingerprint still matches, otherwise None."""
+    entry = _read_cache()["entries"].get(namespace, {}).get(key)
+    if entry and entry.get("fingerprint") == current_fingerprint:
+        return entry.get("value")
+    return None
+
+def store(namespace, key, current_fingerprint, value):
+    """Save a value with the fingerprint it was computed against. Failures are ignored."""
+    try:
+        data = _read_cache()
+        data["entries"].setdefault(namespace, {})[key] = {
+            "fingerprint": current_fingerprint,
+            "value": value,
+        }
+        atomic_write_text(cache_path(), json.dumps(data, indent=2), durable=False)
+    except Exception:
+        pass
+
+def clear():
+    """Remove the cache file."""
+    try:
+        os.remove(cache_path())
+    except OSError:
+        pass
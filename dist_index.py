@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# dist_index.py - Index of installed distributions, built from one scandir pass per site-packages root
+
+import os
+import re
+
+# root -> (mtime_ns, entries); a root is rescanned only after it changes
+_root_cache = {}
+
+def normalize_name(name):
+    """Normalize a distribution name the same way pip does (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def parse_pin(pin):
+    """Split a "name==version" pin into (normalized name, version)."""
+    name, _, version = pin.partition("==")
+    return normalize_name(name.strip()), version.strip() or None
+
+def scan_root(root):
+    """
+    Map normalized name -> {name, version, path, record, root} for one site-packages root.
+    Versions come from the dist-info directory name, so no METADATA file is opened.
+    """
+    try:
+        mtime = os.stat(root).st_mtime_ns
+    except OSError:
+        return {}
+    cached = _root_cache.get(root)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    entries = {}
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                stem, ext = os.path.splitext(entry.name)
+                if ext not in (".dist-info", ".egg-info") or "-" not in stem:
+                    continue
+                dist_name, version = stem.split("-", 1)
+                # egg-info directories carry a "-py3.x" suffix after the version
+                version = version.split("-", 1)[0]
+                record = os.path.join(entry.path, "RECORD" if ext == ".dist-info" else "installed-files.txt")
+                entries.setdefault(normalize_name(dist_name), {
+                    "name": dist_name,
+                    "version": version,
+                    "path": entry.path,
+                    "record": record,
+                    "root": root,
+                })
+    except OSError:
+        return {}
+    _root_cache[root] = (mtime, entries)
+    return entries
+
+class DistIndex:
+    """Installed distributions across several site-packages roots; earlier roots win."""
+
+    def __init__(self, roots):
+        self.roots = list(roots)
+        self.entries = {}
+        for root in self.roots:
+            for name, entry in scan_root(root).items():
+                self.entries.setdefault(name, entry)
+
+    def get(self, name):
+        """Return the index entry for a distribution, or None."""
+        return self.entries.get(normalize_name(name))
+
+    def version(self, name):
+        """Return the installed version of a distribution, or None."""
+        entry = self.get(name)
+        return entry["version"] if entry else None
+
+    def satisfies(self, pin):
+        """True if a "name==version" pin is already installed exactly."""
+        name, version = parse_pin(pin)
+        return version is not None and self.version(name) == version
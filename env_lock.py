@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# env_lock.py - The lockfile describing the desired ofscraper environment, and syncing an environment to it
+
+import os
+import sys
+import json
+import tempfile
+
+from dist_index import DistIndex, normalize_name
+from fileutils import atomic_write_text
+from installer import get_installer, run_command
+from wheelhouse import load_manifest, manifest_hashes
+
+# Overrides the lockfile location (default: next to these scripts)
+LOCK_ENV = "OFSCRAPER_FIXES_LOCK"
+LOCK_NAME = "ofscraper-fixes.lock.json"
+LOCK_FORMAT_VERSION = 1
+# Only used when the lockfile is missing or unreadable, so the tools still start
+FALLBACK_LOCK = {
+    "format": LOCK_FORMAT_VERSION,
+    "python": "3.11.6",
+    "complete": False,
+    "packages": {
+        "ofscraper": {"version": "3.12.9", "hashes": []},
+        "aiolimiter": {"version": "1.1.0", "hashes": []},
+        "aiohttp": {"version": "3.11.16", "hashes": []},
+    },
+}
+# Never removed by a sync, even when a complete lock doesn't list them
+PROTECTED = {"pip", "setuptools", "wheel"}
+
+class LockfileError(Exception):
+    """The lockfile is missing or malformed."""
+
+def lock_path():
+    """Return the lockfile path ($OFSCRAPER_FIXES_LOCK or ofscraper-fixes.lock.json next to the scripts)."""
+    return os.environ.get(LOCK_ENV) or os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCK_NAME)
+
+def load_lock(path=None, strict=False):
+    """
+    Load the lockfile. Package names are normalized.
+    With strict=False a missing or broken lockfile falls back to FALLBACK_LOCK;
+    with strict=True it raises LockfileError.
+    """
+    path = path or lock_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lock = json.load(f)
+        if lock.get("format") != LOCK_FORMAT_VERSION or not isinstance(lock.get("packages"), dict):
+            raise ValueError(f"unsupported lockfile format {lock.get('format')!r}")
+        packages = {normalize_name(name): {"version": str(entry["version"]), "hashes": list(entry.get("hashes") or [])}
+                    for name, entry in lock["packages"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        if strict:
+            raise LockfileError(f"Can't load lockfile {path}: {e}")
+        lock, packages = FALLBACK_LOCK, FALLBACK_LOCK["packages"]
+    return {"format": LOCK_FORMAT_VERSION, "python": lock.get("python"),
+            "complete": bool(lock.get("complete")), "packages": packages}
+
+def locked_pin(lock, name):
+    """"name==version" for a locked package."""
+    return f"{name}=={lock['packages'][normalize_name(name)]['version']}"
+
+def diff_environment(lock, site_packages):
+    """
+    Compare a lock with what is installed in site_packages.
+    Returns {"install": [(name, installed, locked), ...], "remove": [(name, installed), ...]}.
+    Packages are only removed when the lock is complete (a full freeze of a working environment).
+    """
+    index = DistIndex(site_packages)
+    install = []
+    for name, entry in sorted(lock["packages"].items()):
+        installed = index.version(name)
+        if installed != entry["version"]:
+            install.append((name, installed, entry["version"]))
+    remove = []
+    if lock["complete"]:
+        for name, entry in sorted(index.entries.items()):
+            if name not in lock["packages"] and name not in PROTECTED:
+                remove.append((name, entry["version"]))
+    return {"install": install, "remove": remove}
+
+def _hashed_requirements(lock, names):
+    """Requirement lines with --hash options, or None if any package has no hash."""
+    lines = []
+    for name in names:
+        entry = lock["packages"][name]
+        if not entry["hashes"]:
+            return None
+        lines.append(f"{name}=={entry['version']} " + " ".join(f"--hash={h}" for h in entry["hashes"]))
+    return "\n".join(lines) + "\n"
+
+def sync_commands(env, lock, diff, work_dir):
+    """
+    The commands that bring env to the lock: at most one install and one uninstall.
+    With a complete lock whose packages to install all have hashes, they go through a
+    --require-hashes --no-deps requirements file written to work_dir. A partial lock can't be
+    hash-checked (pip would demand hashes for the dependencies it resolves), so it installs plain pins.
+    """
+    installer = get_installer(env["kind"], env.get("python"))
+    commands = []
+    names = [name for name, _, _ in diff["install"]]
+    if names:
+        requirements = _hashed_requirements(lock, names) if lock["complete"] else None
+        if requirements is not None:
+            path = os.path.join(work_dir, "sync-requirements.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(requirements)
+            commands.append(installer.install_requirements_command(path))
+        else:
+            commands.append(installer.install_command([locked_pin(lock, name) for name in names]))
+    removals = [name for name, _ in diff["remove"]]
+    if env["kind"] == "pipx":
+        # The app itself is removed with pipx uninstall, never by a sync
+        removals = [name for name in removals if name != "ofscraper"]
+    if removals:
+        commands.append(installer.uninstall_command(removals))
+    return commands
+
+def describe_diff(diff):
+    """Human-readable lines for a diff."""
+    lines = []
+    for name, installed, locked in diff["install"]:
+        lines.append(f"  install {name}: {installed or 'not installed'} -> {locked}")
+    for name, installed in diff["remove"]:
+        lines.append(f"  remove  {name} {installed}")
+    return lines or ["  already in sync"]
+
+def sync_environment(env, lock=None, dry_run=False, runner=None, update_status=print):
+    """
+    Diff env against the lock and run only what differs, in one batched install (plus one
+    uninstall for extras). Returns the diff. Raises CalledProcessError/OSError from the installer.
+    """
+    lock = lock or load_lock()
+    diff = diff_environment(lock, env["site_packages"])
+    update_status(f"{env['label']}:")
+    for line in describe_diff(diff):
+        update_status(line)
+    with tempfile.TemporaryDirectory(prefix="ofscraper-fixes-sync-") as work_dir:
+        commands = sync_commands(env, lock, diff, work_dir)
+        for cmd in commands:
+            update_status("$ " + " ".join(cmd))
+            if not dry_run:
+                (runner.run if runner else run_command)(cmd)
+    return diff
+
+def freeze_lock(site_packages, python_version=None, path=None, wheelhouse=None):
+    """
+    Write a complete lock from a working environment: every installed distribution at its
+    installed version, with sha256 hashes taken from the wheelhouse manifest where it has
+    the same version. Hashes are never computed from the installed files (those aren't the wheels).
+    Returns the lock.
+    """
+    index = DistIndex(site_packages)
+    manifest = load_manifest(wheelhouse)
+    known = manifest_hashes(manifest) if manifest else {}
+    packages = {}
+    for name, entry in sorted(index.entries.items()):
+        if name in PROTECTED:
+            continue
+        wheel = known.get(name)
+        hashes = wheel["hashes"] if wheel and wheel["version"] == entry["version"] else []
+        packages[name] = {"version": entry["version"], "hashes": hashes}
+    # Keep the recommended Python from the current lock when the environment doesn't say
+    python_version = python_version or load_lock(path)["python"]
+    lock = {"format": LOCK_FORMAT_VERSION, "python": python_version, "complete": True, "packages": packages}
+    atomic_write_text(path or lock_path(), json.dumps(lock, indent=2) + "\n")
+    return lock
+
+if __name__ == "__main__":
+    import argparse
+    import subprocess
+    from inventory import environment_site_packages, interpreter_prefix
+    from planner import target_environments
+    from wheelhouse import WheelhouseError
+
+    parser = argparse.ArgumentParser(description="Sync an environment to the lockfile, or write a lockfile from one.")
+    parser.add_argument("--lock", help=f"lockfile (default: {lock_path()})")
+    parser.add_argument("--python", help="interpreter of the environment (default: the detected ofscraper install)")
+    parser.add_argument("--kind", choices=["pip", "pipx"], help="which detected install to use")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("diff", help="show what a sync would change")
+    sync_parser = subparsers.add_parser("sync", help="install/remove only what differs from the lock")
+    sync_parser.add_argument("--dry-run", action="store_true", help="print the commands without running them")
+    freeze_parser = subparsers.add_parser("freeze", help="write a complete lock from a working environment")
+    freeze_parser.add_argument("--wheelhouse", help="wheelhouse whose manifest supplies the hashes")
+    args = parser.parse_args()
+
+    if args.python:
+        prefix = interpreter_prefix(args.python)
+        site_packages, version = environment_site_packages(prefix)
+        envs = [{"kind": "pip", "label": args.python, "python": args.python,
+                 "site_packages": site_packages, "python_version": version}]
+    else:
+        envs = [env for env in target_environments(args.kind) if env["site_packages"]]
+    if not envs:
+        print("No environment found.")
+        sys.exit(1)
+
+    try:
+        if args.command == "freeze":
+            env = envs[0]
+            frozen = freeze_lock(env["site_packages"], env.get("python_version"), args.lock, args.wheelhouse)
+            hashed = sum(1 for entry in frozen["packages"].values() if entry["hashes"])
+            print(f"Wrote {args.lock or lock_path()}: {len(frozen['packages'])} packages, {hashed} with hashes.")
+        else:
+            current = load_lock(args.lock, strict=True)
+            for env in envs:
+                sync_environment(env, current, dry_run=args.command == "diff" or args.dry_run)
+    except (LockfileError, WheelhouseError, subprocess.CalledProcessError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# env_probe.py - Detect ofScraper installations in-process (no pip/pipx subprocesses)
+
+import os
+import sys
+import glob
+import json
+import site
+import shutil
+import sysconfig
+
+import async_probe
+import detection_cache
+from dist_index import DistIndex
+
+PACKAGE_NAME = "ofscraper"
+
+# Snapshot shared by every tool for the lifetime of the process
+_snapshot = None
+
+def exe_name(name):
+    """Return the platform-specific file name of a console script."""
+    return name + ".exe" if os.name == "nt" else name
+
+def find_pip_sitepackage_paths():
+    """Find all possible site-package paths for pip installations."""
+    paths = set(site.getsitepackages())
+    user_site = site.getusersitepackages()
+    if isinstance(user_site, str):
+        paths.add(user_site)
+    if hasattr(sys, "prefix") and sys.prefix:
+        possible_lib = os.path.join(sys.prefix, "lib")
+        if os.path.isdir(possible_lib):
+            paths.add(possible_lib)
+    return paths
+
+def find_venv_sitepackage_paths(venv):
+    """Find the site-packages directories inside a virtual environment."""
+    found_paths = set()
+    if os.name == "nt":
+        site_pkgs = os.path.join(venv, "Lib", "site-packages")
+        if os.path.isdir(site_pkgs):
+            found_paths.add(site_pkgs)
+    else:
+        pattern = os.path.join(venv, "lib", "python3.*", "site-packages")
+        for p in glob.glob(pattern):
+            if os.path.isdir(p):
+                found_paths.add(p)
+    return found_paths
+
+def venv_bin_dir(venv):
+    """Return the directory holding a virtual environment's scripts."""
+    return os.path.join(venv, "Scripts" if os.name == "nt" else "bin")
+
+def venv_python(venv):
+    """Return the interpreter of a virtual environment, or None."""
+    python_path = os.path.join(venv_bin_dir(venv), exe_name("python"))
+    if os.path.exists(python_path):
+        return python_path
+    python_paths = sorted(glob.glob(os.path.join(venv_bin_dir(venv), "python3*")))
+    return python_paths[0] if python_paths else None
+
+def find_distribution(paths, name):
+    """
+    Find an installed distribution by scanning site-packages directories.
+    Returns a dict with name, version and dist-info path, or None.
+    """
+    return DistIndex(paths).get(name)
+
+def pipx_home_candidates():
+    """Return the directories pipx may use as its home, most likely first."""
+    homes = []
+    if os.environ.get("PIPX_HOME"):
+        homes.append(os.environ["PIPX_HOME"])
+    if os.name == "nt":
+        local_appdata = os.environ.get("LOCALAPPDATA", "")
+        homes.append(os.path.join(local_appdata, "pipx", "pipx"))
+        homes.append(os.path.join(local_appdata, "pipx"))
+    elif sys.platform == "darwin":
+        homes.append(os.path.expanduser("~/Library/Application Support/pipx"))
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+        homes.append(os.path.join(data_home, "pipx"))
+    # Location used by pipx before 1.3
+    homes.append(os.path.expanduser("~/.local/pipx"))
+    return homes
+
+def pipx_bin_dir():
+    """Return the directory pipx exposes application scripts in."""
+    if os.environ.get("PIPX_BIN_DIR"):
+        return os.environ["PIPX_BIN_DIR"]
+    return os.path.expanduser("~/.local/bin")
+
+def find_pipx_venv(name=PACKAGE_NAME):
+    """Return the on-disk pipx venv for a package, or None if none is found."""
+    for home in pipx_home_candidates():
+        venv = os.path.join(home, "venvs", name)
+        if os.path.isdir(venv):
+            return venv
+    return None
+
+def read_pyvenv_cfg(venv):
+    """Parse a venv's pyvenv.cfg into a dict (empty if missing)."""
+    cfg = {}
+    try:
+        with open(os.path.join(venv, "pyvenv.cfg"), "r", encoding="utf-8") as f:
+            for line in f:
+                if "=" in line:
+                    key, value = line.split("=", 1)
+                    cfg[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return cfg
+
+def _metadata_path(value):
+    # pipx serializes paths as {"__type__": "Path", "__Path__": "..."}
+    if isinstance(value, dict):
+        return value.get("__Path__")
+    return value
+
+def resolve_pipx_venv(name=PACKAGE_NAME, use_cli=True):
+    """
+    Resolve a pipx venv from its pipx_metadata.json and pyvenv.cfg.
+    Only when those files are missing is the pipx CLI asked (if use_cli).
+    Returns a dict describing the venv, or None if pipx has no such venv.
+    """
+    venv = find_pipx_venv(name)
+    if venv:
+        cfg = read_pyvenv_cfg(venv)
+        try:
+            with open(os.path.join(venv, "pipx_metadata.json"), "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = None
+        if metadata is not None and cfg:
+            main = metadata.get("main_package") or {}
+            injected = metadata.get("injected_packages") or {}
+            return {
+                "venv": venv,
+                "version": main.get("package_version"),
+                "apps": main.get("apps") or [],
+                "app_paths": [_metadata_path(p) for p in main.get("app_paths") or []],
+                "injected": {n: (d or {}).get("package_version") for n, d in injected.items()},
+                "python": venv_python(venv),
+                # venv writes "version", virtualenv writes "version_info"
+                "python_version": cfg.get("version") or cfg.get("version_info"),
+                "base_python_home": cfg.get("home"),
+                "source": "metadata",
+            }
+
+    if not use_cli or not shutil.which("pipx"):
+        return {"venv": venv, "version": None, "python": venv_python(venv), "source": "directory"} if venv else None
+    answer = async_probe.run_probe_groups({"pipx": async_probe.pipx_group(name)})["pipx"]
+    if not answer or not answer.get("installed"):
+        return None
+    cli_venv = answer.get("venv") if answer.get("venv") and os.path.isdir(answer.get("venv")) else venv
+    return {
+        "venv": cli_venv,
+        "version": answer.get("version"),
+        "python": venv_python(cli_venv) if cli_venv else None,
+        "source": "cli",
+    }
+
+class EnvironmentProbe:
+    """Collect installation type, versions, site-packages and entry points in one pass."""
+
+    def __init__(self, name=PACKAGE_NAME):
+        self.name = name
+
+    def probe_pip(self):
+        """Inspect the interpreter running this script. Returns (info, undecided)."""
+        site_packages = sorted(find_pip_sitepackage_paths())
+        dist = find_distribution(site_packages, self.name)
+        info = {
+            "installed": dist is not None,
+            "version": dist["version"] if dist else None,
+            "location": os.path.dirname(dist["path"]) if dist else None,
+            "site_packages": site_packages,
+            "entry_point": None,
+            "python": sys.executable,
+        }
+        if dist:
+            info["entry_point"] = self._find_pip_entry_point()
+        # Without a readable site-packages directory the scan proves nothing
+        undecided = not any(os.path.isdir(p) for p in site_packages)
+        return info, undecided
+
+    def _find_pip_entry_point(self):
+        script_dirs = [sysconfig.get_path("scripts"),
+                       os.path.join(site.USER_BASE or "", "Scripts" if os.name == "nt" else "bin")]
+        for script_dir in script_dirs:
+            candidate = os.path.join(script_dir, exe_name(self.name))
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def probe_pipx(self):
+        """Inspect the pipx venv directly. Returns (info, undecided)."""
+        info = {
+            "installed": False,
+            "version": None,
+            "venv": None,
+            "site_packages": [],
+            "entry_point": None,
+            "python": None,
+            "python_version": None,
+        }
+        resolved = resolve_pipx_venv(self.name, use_cli=False)
+        if resolved is None:
+            # Only a pipx using a home we don't know about can still have the venv
+            return info, shutil.which("pipx") is not None
+        self._fill_pipx_venv(info, resolved["venv"], resolved)
+        return info, info["version"] is None
+
+    def _fill_pipx_venv(self, info, venv, resolved=None):
+        info["installed"] = True
+        info["venv"] = venv
+        info["site_packages"] = sorted(find_venv_sitepackage_paths(venv))
+        info["python"] = venv_python(venv)
+        if resolved and resolved.get("source") == "metadata":
+            info["version"] = resolved["version"]
+            info["python_version"] = resolved["python_version"]
+        dist = find_distribution(info["site_packages"], self.name)
+        if dist:
+            # The dist-info is authoritative if pip changed the venv behind pipx's back
+            info["version"] = dist["version"]
+        candidates = [p for p in (resolved or {}).get("app_paths", []) if p]
+        candidates += [os.path.join(bin_dir, exe_name(self.name)) for bin_dir in (pipx_bin_dir(), venv_bin_dir(venv))]
+        for candidate in candidates:
+            if os.path.basename(candidate) == exe_name(self.name) and os.path.exists(candidate):
+                info["entry_point"] = candidate
+                break
+
+    def run(self):
+        """Return a snapshot dict describing every ofScraper installation found."""
+        pip_info, pip_undecided = self.probe_pip()
+        pipx_info, pipx_undecided = self.probe_pipx()
+
+        # Whatever the filesystem could not answer is asked of pip/pipx, all at once
+        groups = {}
+        if pip_undecided:
+            groups["pip"] = async_probe.pip_show_group(sys.executable, self.name)
+        if pipx_undecided:
+            groups["pipx"] = async_probe.pipx_group(self.name)
+        answers = async_probe.run_probe_groups(groups)
+
+        pip_answer = answers.get("pip")
+        if pip_answer and pip_answer.get("installed"):
+            pip_info["installed"] = True
+            pip_info["version"] = pip_answer.get("version")
+            pip_info["entry_point"] = self._find_pip_entry_point()
+        pipx_answer = answers.get("pipx")
+        if pipx_answer and pipx_answer.get("installed"):
+            venv = pipx_answer.get("venv")
+            if not pipx_info["venv"] and venv and os.path.isdir(venv):
+                self._fill_pipx_venv(pipx_info, venv)
+            pipx_info["installed"] = True
+            pipx_info["version"] = pipx_info["version"] or pipx_answer.get("version")
+
+        if pip_info["installed"] and pipx_info["installed"]:
+            install_type = "both"
+        elif pip_info["installed"]:
+            install_type = "pip"
+        elif pipx_info["installed"]:
+            install_type = "pipx"
+        else:
+            install_type = None
+        return {
+            "install_type": install_type,
+            "version": pip_info["version"] or pipx_info["version"],
+            "pip": pip_info,
+            "pipx": pipx_info,
+        }
+
+def detection_fingerprint(name=PACKAGE_NAME):
+    """Fingerprint every directory whose contents decide the detection result."""
+    paths = set(find_pip_sitepackage_paths())
+    for home in pipx_home_candidates():
+        venvs = os.path.join(home, "venvs")
+        paths.add(venvs)
+        venv = os.path.join(venvs, name)
+        if os.path.isdir(venv):
+            paths.add(venv)
+            paths.update(find_venv_sitepackage_paths(venv))
+    paths.add(pipx_bin_dir())
+    # Installing pipx itself can change where its venvs are reported
+    return detection_cache.fingerprint(paths) + [["pipx", shutil.which("pipx")]]
+
+def get_environment_snapshot(refresh=False):
+    """
+    Return the shared environment snapshot.
+    Probes only on first use or when refresh=True; repeat launches reuse the
+    on-disk cache until a relevant site-packages or pipx directory changes.
+    """
+    global _snapshot
+    if _snapshot is None or refresh:
+        current = detection_fingerprint()
+        cached = None if refresh else detection_cache.load("snapshot", sys.executable, current)
+        if cached is not None:
+            _snapshot = cached
+        else:
+            _snapshot = EnvironmentProbe().run()
+            detection_cache.store("snapshot", sys.executable, current, _snapshot)
+    return _snapshot
+
+def site_packages_for(snapshot, install_type=None):
+    """Return the site-package paths relevant to an install type ("pip", "pipx" or "both")."""
+    if install_type is None:
+        install_type = snapshot["install_type"]
+    paths = set()
+    if install_type in ("pip", "both"):
+        paths.update(snapshot["pip"]["site_packages"])
+    if install_type in ("pipx", "both"):
+        paths.update(snapshot["pipx"]["site_packages"])
+    return paths
+
+# For standalone testing
+if __name__ == "__main__":
+    print(json.dumps(get_environment_snapshot(), indent=2))
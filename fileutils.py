@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# fileutils.py - Small file helpers shared by the fix scripts
+
+import os
+import tempfile
+
+def user_cache_dir():
+    """Return the per-user cache directory for ofscraper-fixes (~/.cache/ofscraper-fixes)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ofscraper-fixes")
+
+def fsync_dir(directory):
+    """Flush a directory entry change (a rename) to disk. A no-op where unsupported (Windows)."""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write_text(path, text, durable=True, mode=None):
+    """
+    Write text to path atomically: write a temp file in the same directory,
+    optionally fsync it, then os.replace it over the target.
+    mode sets the new file's permissions (temp files start out private).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+        if durable:
+            fsync_dir(directory)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# fix_all.py - Apply every recommended pin with one install per environment, then the source patches
+
+import tkinter as tk
+from tkinter import messagebox
+
+# Import shared components
+from common import check_ofscraper_installation
+from planner import RECOMMENDED_PINS, apply_pins, plan_actions, target_environments
+from proc_runner import StreamingRunner, call_in_thread
+from patch_engine import patch_environments, describe_report, report_ok
+from snapshot import SnapshotError, create_snapshot, snapshot_root
+
+class FixAllTool:
+    def __init__(self, parent, update_status_callback):
+        self.parent = parent
+        self.update_status = update_status_callback
+
+    def run(self):
+        """Run every fix in one go"""
+        self.update_status("=== Fix All ===")
+
+        proceed = messagebox.askyesno("Fix All",
+                                      "This will install " + ", ".join(RECOMMENDED_PINS) +
+                                      " (one install per environment) and patch sessionmanager.py.\n"
+                                      "Do you want to continue?",
+                                      parent=self.parent)
+        if not proceed:
+            self.update_status("Skipping Fix All.")
+            return
+
+        install_type = check_ofscraper_installation()
+        if install_type is None:
+            self.update_status("ofscraper not found. Pins will be installed via pip.")
+        envs = target_environments(install_type)
+
+        # All pins go to the resolver together: one pip install / pipx call per environment
+        apply_pins(envs, RECOMMENDED_PINS, self.update_status, batch=True,
+                   runner=StreamingRunner(self.parent, self.update_status))
+
+        # Re-read the environments (the snapshot was refreshed after installing)
+        envs = [env for env in target_environments(check_ofscraper_installation())
+                if env["site_packages"]]
+        report = patch_environments(envs)
+        for line in describe_report(report):
+            self.update_status(line)
+        self.offer_snapshot(envs, report)
+        self.update_status("Fix All finished.")
+
+    def offer_snapshot(self, envs, report):
+        """Offer to save each fully fixed venv, so Reinstall can restore it instead of downloading."""
+        for env, env_report in zip(envs, report):
+            root = snapshot_root(env)
+            if root is None or plan_actions([env], RECOMMENDED_PINS) or not report_ok([env_report]):
+                continue
+            if not messagebox.askyesno("Fix All",
+                                       f"The {env['label']} install in {root} is now fully fixed.\n"
+                                       "Save a snapshot of it so Reinstall can restore it in seconds?",
+                                       parent=self.parent):
+                continue
+            messages = []
+            try:
+                call_in_thread(self.parent, create_snapshot, root, env["kind"], update_status=messages.append)
+            except (SnapshotError, OSError) as e:
+                messages.append(f"Could not save a snapshot of {root}: {e}")
+            for message in messages:
+                self.update_status(message)
+
+# For standalone testing
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Fix All")
+
+    def print_to_console(message):
+        print(message)
+
+    tool = FixAllTool(root, print_to_console)
+    tool.run()
+
+    root.mainloop()
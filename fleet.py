@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# fleet.py - Apply the fixes to many ofscraper environments at once, headless, with a JSON summary
+
+import os
+import sys
+import json
+import time
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from common import RECOMMENDED_AIOLIMITER, RECOMMENDED_AIOHTTP
+from config_rules import DEFAULT_CONFIG_PATH, check_rules_url, fix_config_file
+from dist_index import DistIndex
+from env_probe import venv_python
+from inventory import TRACKED_PACKAGES, environment_site_packages, interpreter_prefix
+from patch_engine import ANCHOR_NOT_FOUND, ERROR, NOT_FOUND, patch_environments
+from planner import describe_action, execute_plan, plan_batched
+
+FLEET_PINS = [RECOMMENDED_AIOLIMITER, RECOMMENDED_AIOHTTP]
+# Lines of installer output kept per environment in the summary
+OUTPUT_TAIL_LINES = 20
+
+class CapturingRunner:
+    """Runs installer commands without a console, keeping the tail of their output for the summary."""
+
+    def __init__(self):
+        self.output = []
+
+    def run(self, cmd):
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+        self.output.extend(proc.stdout.splitlines())
+        del self.output[:-OUTPUT_TAIL_LINES]
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+def resolve_target(target):
+    """
+    Turn a venv root or an interpreter path into a planner environment dict.
+    Returns None if no interpreter can be found.
+    """
+    if os.path.isdir(target):
+        python = venv_python(target)
+        prefix = target
+    else:
+        python = target
+        prefix = interpreter_prefix(target)
+    if not python or not os.path.exists(python):
+        return None
+    site_packages, python_version = environment_site_packages(prefix)
+    return {"kind": "pip", "label": target, "python": python, "prefix": prefix,
+            "python_version": python_version, "site_packages": site_packages}
+
+def scan_directory(directory):
+    """Every virtual environment (a directory with pyvenv.cfg) directly inside directory."""
+    found = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir() and os.path.isfile(os.path.join(entry.path, "pyvenv.cfg")):
+                found.append(entry.path)
+    return sorted(found)
+
+def _timed(steps, name, func):
+    started = time.monotonic()
+    try:
+        steps[name] = func()
+    except Exception as e:
+        steps[name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    steps[name]["elapsed"] = round(time.monotonic() - started, 3)
+    return steps[name]
+
+def fix_environment(target, pins=True, patch=True, dry_run=False):
+    """Detect, pin and patch one environment. Runs in a worker process; returns a JSON-ready dict."""
+    started = time.monotonic()
+    summary = {"target": target, "ok": False, "steps": {}}
+    steps = summary["steps"]
+    env = None
+
+    def detect():
+        nonlocal env
+        env = resolve_target(target)
+        if env is None:
+            return {"ok": False, "error": "No interpreter found"}
+        index = DistIndex(env["site_packages"])
+        return {"ok": True, "python": env["python"], "python_version": env["python_version"],
+                "site_packages": env["site_packages"],
+                "packages": {name: index.version(name) for name in TRACKED_PACKAGES}}
+
+    def apply_fleet_pins():
+        actions = plan_batched([env], FLEET_PINS)
+        result = {"ok": True, "planned": [describe_action(a) for a in actions], "output": []}
+        if actions and not dry_run:
+            runner = CapturingRunner()
+            messages = []
+            # The snapshot describes the fleet runner's interpreter, not env; workers leave it alone
+            failures = execute_plan(actions, messages.append, runner=runner, refresh_snapshot=False)
+            result.update(ok=failures == 0, messages=messages, output=runner.output)
+        return result
+
+    def apply_fleet_patch():
+        report = patch_environments([env], dry_run=dry_run)
+        results = report[0]["results"]
+        # A dry run is fine as long as every target was found and readable
+        ok = (all(r["status"] not in (ERROR, ANCHOR_NOT_FOUND, NOT_FOUND) for r in results) if dry_run
+              else report[0]["ok"])
+        return {"ok": ok,
+                "results": [{"patch_id": r["patch_id"], "path": r["path"], "status": r["status"],
+                             "error": r["error"]} for r in results],
+                "bytecode": report[0]["bytecode"]}
+
+    detected = _timed(steps, "detect", detect)
+    if detected["ok"]:
+        if not detected["packages"]["ofscraper"]:
+            # Not an ofscraper venv (--scan-dir finds every venv); leave its packages alone
+            summary["skipped"] = "ofscraper is not installed in this environment"
+        if pins and detected["packages"]["ofscraper"]:
+            _timed(steps, "pins", apply_fleet_pins)
+        if patch and detected["packages"]["ofscraper"]:
+            _timed(steps, "patch", apply_fleet_patch)
+    summary["ok"] = all(step["ok"] for step in steps.values())
+    summary["elapsed"] = round(time.monotonic() - started, 3)
+    return summary
+
+def run_fleet(targets, jobs=None, pins=True, patch=True, config_paths=(), dry_run=False, rules_url=None):
+    """
+    Fix every target in a bounded process pool and return the summary dict.
+    config.json files are per user, not per environment, so each one is fixed once up front
+    rather than concurrently from several workers.
+    """
+    started = time.monotonic()
+    summary = {"dry_run": dry_run, "pins": FLEET_PINS if pins else [], "config": [], "environments": []}
+    for config_path in config_paths:
+        config_started = time.monotonic()
+        if dry_run:
+            result = {"path": config_path, "skipped": "dry run"}
+        else:
+            result = fix_config_file(config_path, rules_url=rules_url)
+            result["ok"] = result["error"] is None
+        result["elapsed"] = round(time.monotonic() - config_started, 3)
+        summary["config"].append(result)
+
+    jobs = jobs or min(4, os.cpu_count() or 1)
+    if targets:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(targets))) as pool:
+            futures = [pool.submit(fix_environment, target, pins, patch, dry_run) for target in targets]
+            for target, future in zip(targets, futures):
+                try:
+                    summary["environments"].append(future.result())
+                except Exception as e:
+                    summary["environments"].append({"target": target, "ok": False,
+                                                    "error": f"{type(e).__name__}: {e}", "steps": {}})
+    summary["ok"] = (all(env["ok"] for env in summary["environments"])
+                     and all(c.get("ok", True) for c in summary["config"]))
+    summary["elapsed"] = round(time.monotonic() - started, 3)
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(
+        description="Apply the aiolimiter/aiohttp pins, the sessionmanager patch and the config fix "
+                    "to many environments at once.")
+    parser.add_argument("targets", nargs="*", help="venv roots or interpreter paths")
+    parser.add_argument("--scan-dir", action="append", default=[],
+                        help="also fix every venv directly inside this directory (repeatable)")
+    parser.add_argument("--targets-file", help="file with one venv root or interpreter path per line")
+    parser.add_argument("--jobs", "-j", type=int, help="environments processed at once (default: min(4, CPUs))")
+    parser.add_argument("--config", action="append", dest="configs",
+                        help=f"config.json to fix (repeatable; default: {DEFAULT_CONFIG_PATH})")
+    parser.add_argument("--no-config", action="store_true", help="skip the config.json fix")
+    parser.add_argument("--rules-url", metavar="URL",
+                        help="point DYNAMIC_GENERIC_URL here (e.g. a shared rules_proxy.py URL)")
+    parser.add_argument("--no-pins", action="store_true", help="skip the aiolimiter/aiohttp pins")
+    parser.add_argument("--no-patch", action="store_true", help="skip the sessionmanager patch")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument("--output", "-o", help="write the JSON summary here instead of stdout")
+    args = parser.parse_args()
+
+    all_targets = list(args.targets)
+    for scan in args.scan_dir:
+        all_targets += scan_directory(scan)
+    if args.targets_file:
+        with open(args.targets_file, "r", encoding="utf-8") as f:
+            all_targets += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    all_targets = list(dict.fromkeys(all_targets))
+    if not all_targets:
+        parser.error("no targets given")
+    if args.rules_url:
+        try:
+            check_rules_url(args.rules_url)
+        except ValueError as e:
+            parser.error(str(e))
+
+    configs = [] if args.no_config else (args.configs or [DEFAULT_CONFIG_PATH])
+    result = run_fleet(all_targets, jobs=args.jobs, pins=not args.no_pins, patch=not args.no_patch,
+                       config_paths=configs, dry_run=args.dry_run, rules_url=args.rules_url)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(0 if result["ok"] else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# installer.py - Installer backends (pip, uv, pipx) behind one interface
+
+import os
+import sys
+import shutil
+import subprocess
+
+from dist_index import parse_pin
+from wheelhouse import pip_source_args, pipx_source_args
+
+# Force a backend for plain environments: "pip" or "uv" (default: uv when it is on PATH)
+INSTALLER_ENV = "OFSCRAPER_FIXES_INSTALLER"
+
+class CommandCancelled(Exception):
+    """The user cancelled a running installer command."""
+
+class PipInstaller:
+    """`python -m pip` for one interpreter."""
+    name = "pip"
+
+    def __init__(self, python=None):
+        self.python = python or sys.executable
+
+    def install_command(self, pins, force=False, upgrade=False):
+        """Command that installs the pins in one resolver run."""
+        return ([self.python, "-m", "pip", "install"] + (["--upgrade"] if upgrade else []) + list(pins)
+                + (["--force-reinstall"] if force else []) + pip_source_args())
+
+    def install_requirements_command(self, requirements):
+        """
+        Command that installs a hash-pinned requirements file; every hash must match.
+        The file must list the whole dependency closure: nothing is resolved beyond it (--no-deps).
+        """
+        return ([self.python, "-m", "pip", "install", "--require-hashes", "--no-deps", "-r", requirements]
+                + pip_source_args())
+
+    def uninstall_command(self, names):
+        return [self.python, "-m", "pip", "uninstall", "-y"] + list(names)
+
+class UvInstaller(PipInstaller):
+    """`uv pip`, pointed at the same interpreter; resolves and installs much faster than pip."""
+    name = "uv"
+
+    def install_command(self, pins, force=False, upgrade=False):
+        return (["uv", "pip", "install", "--python", self.python] + (["--upgrade"] if upgrade else [])
+                + list(pins) + (["--reinstall"] if force else []) + pip_source_args())
+
+    def install_requirements_command(self, requirements):
+        return (["uv", "pip", "install", "--python", self.python, "--require-hashes", "--no-deps",
+                 "-r", requirements] + pip_source_args())
+
+    def uninstall_command(self, names):
+        return ["uv", "pip", "uninstall", "--python", self.python] + list(names)
+
+class PipxInstaller:
+    """pipx, for the ofscraper app venv."""
+    name = "pipx"
+
+    def __init__(self, app="ofscraper"):
+        self.app = app
+
+    def install_command(self, pins, force=False, upgrade=False):
+        """
+        Install pins into the app's venv in one call: runpip when the app itself is among
+        the pins (keeps the venv and its injected packages), otherwise one inject.
+        """
+        names = [parse_pin(pin)[0] for pin in pins]
+        if self.app in names:
+            return (["pipx", "runpip", self.app, "install"] + (["--upgrade"] if upgrade else [])
+                    + (["--force-reinstall"] if force else []) + pip_source_args() + list(pins))
+        return ["pipx", "inject", self.app] + list(pins) + (["--force"] if force else []) + pipx_source_args()
+
+    def install_requirements_command(self, requirements):
+        """Install a hash-pinned requirements file (the whole closure) into the app's venv, through its own pip."""
+        return (["pipx", "runpip", self.app, "install", "--require-hashes", "--no-deps"]
+                + pip_source_args() + ["-r", requirements])
+
+    def install_app_command(self, pin, force=False):
+        """Create the app venv from scratch."""
+        return ["pipx", "install", pin] + (["--force"] if force else []) + pipx_source_args()
+
+    def upgrade_app_command(self):
+        return ["pipx", "upgrade", self.app] + pipx_source_args()
+
+    def uninstall_command(self, names):
+        if list(names) == [self.app]:
+            return ["pipx", "uninstall", self.app]
+        return ["pipx", "runpip", self.app, "uninstall", "-y"] + list(names)
+
+def get_installer(kind="pip", python=None):
+    """
+    Backend for an environment kind ("pip" or "pipx").
+    Plain environments use uv when it is on PATH, unless $OFSCRAPER_FIXES_INSTALLER says otherwise.
+    """
+    if kind == "pipx":
+        return PipxInstaller()
+    choice = os.environ.get(INSTALLER_ENV, "").strip().lower()
+    if choice == "uv" or (choice != "pip" and shutil.which("uv")):
+        return UvInstaller(python)
+    return PipInstaller(python)
+
+def run_command(cmd):
+    """
+    Run an installer command in the foreground; raises CalledProcessError/OSError on failure.
+    GUI tools pass a proc_runner.StreamingRunner instead, which has the same run(cmd) contract.
+    """
+    subprocess.run(cmd, check=True, text=True)
+
+if __name__ == "__main__":
+    print(get_installer().name)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# inventory.py - List every ofScraper install on this machine, across all Python interpreters
+
+import os
+import re
+import glob
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from dist_index import DistIndex
+from patch_engine import (
+    ALREADY_PATCHED,
+    ANCHOR_NOT_FOUND,
+    ERROR,
+    NEEDS_PATCH,
+    apply_patches
+)
+from env_probe import (
+    find_venv_sitepackage_paths,
+    pipx_home_candidates,
+    read_pyvenv_cfg,
+    venv_python
+)
+
+# Packages whose versions the fixes care about
+TRACKED_PACKAGES = ("ofscraper", "aiolimiter", "aiohttp")
+
+# Patch engine status -> label shown in the inventory table
+PATCH_STATE_LABELS = {
+    NEEDS_PATCH: "unpatched",
+    ALREADY_PATCHED: "patched",
+    ANCHOR_NOT_FOUND: "unknown",
+    ERROR: "unreadable",
+}
+
+def _path_interpreters():
+    """Interpreters named python/python3/python3.X in every PATH directory."""
+    found = []
+    pattern = re.compile(r"^python(3(\.\d+)?)?(\.exe)?$")
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        # pyenv shims are shell scripts that dispatch elsewhere; versions are listed separately
+        if not directory or os.path.basename(directory) == "shims":
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if pattern.match(entry.name) and entry.is_file():
+                        found.append(("path", entry.path))
+        except OSError:
+            continue
+    return found
+
+def _pyenv_interpreters():
+    root = os.environ.get("PYENV_ROOT") or os.path.expanduser("~/.pyenv")
+    pattern = os.path.join(root, "versions", "*", "bin", "python")
+    found = [("pyenv", p) for p in glob.glob(pattern)]
+    # pyenv-virtualenv keeps its envs under versions/<base>/envs/<name>
+    found += [("pyenv", p) for p in glob.glob(os.path.join(root, "versions", "*", "envs", "*", "bin", "python"))]
+    return found
+
+def _conda_interpreters():
+    prefixes = set()
+    try:
+        with open(os.path.expanduser("~/.conda/environments.txt"), "r", encoding="utf-8") as f:
+            prefixes.update(line.strip() for line in f if line.strip())
+    except OSError:
+        pass
+    for base in ("~/miniconda3", "~/anaconda3", "~/miniforge3", "~/mambaforge"):
+        base = os.path.expanduser(base)
+        if os.path.isdir(base):
+            prefixes.add(base)
+            prefixes.update(glob.glob(os.path.join(base, "envs", "*")))
+    found = []
+    for prefix in prefixes:
+        python_path = os.path.join(prefix, "python.exe") if os.name == "nt" else os.path.join(prefix, "bin", "python")
+        if os.path.exists(python_path):
+            found.append(("conda", python_path))
+    return found
+
+def _pipx_interpreters():
+    found = []
+    for home in pipx_home_candidates():
+        for venv in glob.glob(os.path.join(home, "venvs", "*")):
+            python_path = venv_python(venv)
+            if python_path:
+                found.append(("pipx", python_path))
+    return found
+
+def find_candidate_interpreters():
+    """Enumerate candidate interpreters from PATH, pyenv, conda and pipx, in parallel."""
+    sources = (_path_interpreters, _pyenv_interpreters, _conda_interpreters, _pipx_interpreters)
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        results = list(pool.map(lambda source: source(), sources))
+    return [candidate for result in results for candidate in result]
+
+def interpreter_prefix(python_path):
+    """Return the environment prefix for an interpreter path (without running it)."""
+    bin_dir = os.path.dirname(os.path.abspath(python_path))
+    parent = os.path.dirname(bin_dir)
+    # venvs keep pyvenv.cfg next to bin/ (Scripts\ on Windows)
+    if os.path.isfile(os.path.join(parent, "pyvenv.cfg")):
+        return parent
+    real_bin = os.path.dirname(os.path.realpath(python_path))
+    if os.name == "nt":
+        return real_bin
+    return os.path.dirname(real_bin)
+
+def environment_site_packages(prefix):
+    """Return (site-packages dirs, python version) for a prefix, read from its layout."""
+    cfg = read_pyvenv_cfg(prefix)
+    site_packages = sorted(find_venv_sitepackage_paths(prefix))
+    version = cfg.get("version") or cfg.get("version_info")
+    if not version and site_packages and os.name != "nt":
+        match = re.search(r"python(\d+\.\d+)", site_packages[0])
+        version = match.group(1) if match else None
+    # Base interpreters also see the user site (pip install --user)
+    if not cfg and version and os.name != "nt":
+        short = ".".join(version.split(".")[:2])
+        user_site = os.path.expanduser(f"~/.local/lib/python{short}/site-packages")
+        if os.path.isdir(user_site):
+            site_packages.append(user_site)
+    return site_packages, version
+
+def sessionmanager_patch_state(site_packages):
+    """Report whether ofscraper's sessionmanager.py has the SSL patch applied."""
+    results = apply_patches(site_packages, patch_ids=["ssl-verify-off"], dry_run=True)
+    located = [r for r in results if r["path"]]
+    if not located:
+        return "n/a"
+    return PATCH_STATE_LABELS.get(located[0]["status"], "unknown")
+
+def inspect_interpreter(source, python_path):
+    """Read one interpreter's dist-info for the tracked packages. Nothing is imported or run."""
+    prefix = interpreter_prefix(python_path)
+    site_packages, python_version = environment_site_packages(prefix)
+    index = DistIndex(site_packages)
+    packages = {name: index.version(name) for name in TRACKED_PACKAGES}
+    return {
+        "interpreter": python_path,
+        "source": source,
+        "prefix": prefix,
+        "python_version": python_version,
+        "site_packages": site_packages,
+        "packages": packages,
+        "patch_state": sessionmanager_patch_state(site_packages) if packages["ofscraper"] else "n/a",
+    }
+
+def scan_inventory(only_with_ofscraper=False):
+    """
+    Scan every candidate interpreter concurrently.
+    Returns a list of dicts (one per environment), deduplicated by prefix.
+    """
+    seen = set()
+    candidates = []
+    for source, python_path in find_candidate_interpreters():
+        prefix = os.path.realpath(interpreter_prefix(python_path))
+        if prefix in seen:
+            continue
+        seen.add(prefix)
+        candidates.append((source, python_path))
+    with ThreadPoolExecutor(max_workers=min(16, len(candidates) or 1)) as pool:
+        rows = list(pool.map(lambda c: inspect_interpreter(*c), candidates))
+    rows = [row for row in rows if row["site_packages"]]
+    if only_with_ofscraper:
+        rows = [row for row in rows if row["packages"]["ofscraper"]]
+    return rows
+
+def format_table(rows):
+    """Render inventory rows as a plain-text table."""
+    headers = ["Interpreter", "Source", "Python", "ofscraper", "aiolimiter", "aiohttp", "SSL patch"]
+    table = [[row["interpreter"], row["source"], row["python_version"] or "?",
+              row["packages"]["ofscraper"] or "-", row["packages"]["aiolimiter"] or "-",
+              row["packages"]["aiohttp"] or "-", row["patch_state"]] for row in rows]
+    widths = [max(len(str(r[i])) for r in [headers] + table) for i in range(len(headers))]
+    lines = ["  ".join(str(cell).ljust(w) for cell, w in zip(headers, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(str(cell).ljust(w) for cell, w in zip(r, widths)) for r in table]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="List ofScraper installs across every Python on this machine.")
+    parser.add_argument("--json", action="store_true", help="print the inventory as JSON")
+    parser.add_argument("--all", action="store_true", help="include interpreters without ofscraper")
+    args = parser.parse_args()
+    inventory = scan_inventory(only_with_ofscraper=not args.all)
+    if args.json:
+        print(json.dumps(inventory, indent=2))
+    elif inventory:
+        print(format_table(inventory))
+    else:
+        print("No ofscraper installs found.")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# launcher.py - Work out how to start ofscraper for an interpreter, without importing or running it
+
+import os
+import sys
+import site
+import shutil
+import sysconfig
+import configparser
+import importlib.machinery
+
+import detection_cache
+from dist_index import DistIndex
+from env_probe import PACKAGE_NAME, exe_name, find_pip_sitepackage_paths, get_environment_snapshot
+from inventory import environment_site_packages, interpreter_prefix
+
+# Launch command kinds, most direct first
+SCRIPT = "script"            # the console script pip/pipx installed
+MODULE = "module"            # python -m ofscraper
+ENTRY_POINT = "entry-point"  # python -c calling the console_scripts function (no __main__.py)
+ON_PATH = "path"             # whatever "ofscraper" is on PATH
+BARE = "bare"                # nothing found; "ofscraper" and hope
+
+# interpreter -> LaunchCommand (or None), for the lifetime of the process; dropped when
+# the environment snapshot is refreshed (which the install tools do after changing anything)
+_resolved = {}
+_resolved_snapshot = None
+
+class LaunchCommand:
+    """How to start ofscraper: a kind (see above), the argv, and the interpreter it belongs to."""
+
+    def __init__(self, kind, argv, python=None, version=None):
+        self.kind = kind
+        self.argv = list(argv)
+        self.python = python
+        self.version = version
+
+    def display(self):
+        """The command as one string, for logs."""
+        return " ".join(f'"{arg}"' if " " in arg else arg for arg in self.argv)
+
+    def to_dict(self):
+        return {"kind": self.kind, "argv": self.argv, "python": self.python, "version": self.version}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["kind"], data["argv"], data.get("python"), data.get("version"))
+
+    def __repr__(self):
+        return f"LaunchCommand({self.kind!r}, {self.argv!r})"
+
+def _interpreter_layout(python):
+    """(site-packages dirs, script dirs) of an interpreter, read from the filesystem."""
+    if python == sys.executable:
+        site_packages = sorted(find_pip_sitepackage_paths())
+        script_dirs = [sysconfig.get_path("scripts"),
+                       os.path.join(site.USER_BASE or "", "Scripts" if os.name == "nt" else "bin")]
+    else:
+        site_packages, _ = environment_site_packages(interpreter_prefix(python))
+        script_dirs = []
+    script_dirs.insert(0, os.path.dirname(python))
+    return site_packages, list(dict.fromkeys(script_dirs))
+
+def console_script(dist_path, name=PACKAGE_NAME):
+    """
+    (script name, "module:function") from a distribution's entry_points.txt, or None.
+    The script named after the package wins; otherwise the first console script.
+    """
+    parser = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+    parser.optionxform = str
+    try:
+        parser.read(os.path.join(dist_path, "entry_points.txt"), encoding="utf-8")
+    except configparser.Error:
+        return None
+    if not parser.has_section("console_scripts"):
+        return None
+    scripts = dict(parser.items("console_scripts"))
+    if not scripts:
+        return None
+    script = name if name in scripts else next(iter(scripts))
+    # "module:function [extra]"
+    return script, scripts[script].split("[", 1)[0].strip()
+
+def _entry_point_argv(python, target):
+    module, _, attr = target.partition(":")
+    if not attr:
+        return [python, "-m", module]
+    top = attr.split(".", 1)[0]
+    return [python, "-c", f"import sys; from {module} import {top}; sys.exit({attr}())"]
+
+def _resolve(python, site_packages, script_dirs, name=PACKAGE_NAME):
+    dist = DistIndex(site_packages).get(name)
+    # The path finder locates the package in these directories without importing it
+    spec = importlib.machinery.PathFinder.find_spec(name, site_packages)
+    if dist is None and spec is None:
+        return None
+    version = dist["version"] if dist else None
+    entry = console_script(dist["path"], name) if dist else None
+
+    # pipx's Windows .exe wrappers misbehave; its venv Python is more reliable there
+    if os.name != "nt" or python == sys.executable:
+        for script_dir in script_dirs:
+            candidate = os.path.join(script_dir, exe_name(entry[0] if entry else name))
+            if os.path.isfile(candidate):
+                return LaunchCommand(SCRIPT, [candidate], python, version)
+    if spec is not None and spec.submodule_search_locations:
+        if any(os.path.isfile(os.path.join(location, "__main__.py"))
+               for location in spec.submodule_search_locations):
+            return LaunchCommand(MODULE, [python, "-m", name], python, version)
+    if entry:
+        return LaunchCommand(ENTRY_POINT, _entry_point_argv(python, entry[1]), python, version)
+    return LaunchCommand(MODULE, [python, "-m", name], python, version)
+
+def resolve_for_interpreter(python, refresh=False):
+    """
+    The LaunchCommand that runs ofscraper with this interpreter, or None if it isn't installed there.
+    Memoized per interpreter, and cached on disk until its site-packages or script dirs change.
+    """
+    python = os.path.abspath(python)
+    if python in _resolved and not refresh:
+        return _resolved[python]
+    site_packages, script_dirs = _interpreter_layout(python)
+    current = detection_cache.fingerprint(site_packages + script_dirs)
+    cached = None if refresh else detection_cache.load("launch", python, current)
+    if cached is not None:
+        command = LaunchCommand.from_dict(cached) if cached.get("kind") else None
+    else:
+        command = _resolve(python, site_packages, script_dirs)
+        detection_cache.store("launch", python, current, command.to_dict() if command else {"kind": None})
+    _resolved[python] = command
+    return command
+
+def resolve_launch_command(install_type=None, refresh=False):
+    """
+    The command to start ofscraper, always a LaunchCommand.
+    The pipx venv is preferred (a cleaner install than pip into a shared interpreter), then this
+    interpreter, then PATH; install_type ("pip", "pipx", "both") limits which installs are considered.
+    """
+    global _resolved_snapshot
+    snapshot = get_environment_snapshot(refresh=refresh)
+    if snapshot is not _resolved_snapshot:
+        _resolved.clear()
+        _resolved_snapshot = snapshot
+    install_type = install_type or snapshot["install_type"]
+    interpreters = []
+    if install_type in (None, "pipx", "both") and snapshot["pipx"]["installed"] and snapshot["pipx"]["python"]:
+        interpreters.append(snapshot["pipx"]["python"])
+    if install_type in (None, "pip", "both"):
+        interpreters.append(sys.executable)
+    for python in interpreters:
+        command = resolve_for_interpreter(python, refresh=refresh)
+        if command is not None:
+            return command
+    on_path = shutil.which(PACKAGE_NAME)
+    if on_path:
+        return LaunchCommand(ON_PATH, [on_path])
+    return LaunchCommand(BARE, [PACKAGE_NAME])
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    parser = argparse.ArgumentParser(description="Show how ofscraper would be launched.")
+    parser.add_argument("--python", help="resolve for this interpreter only")
+    parser.add_argument("--refresh", action="store_true", help="ignore the cached answer")
+    parser.add_argument("--json", action="store_true", help="print the command as JSON")
+    args = parser.parse_args()
+
+    if args.python:
+        result = resolve_for_interpreter(args.python, refresh=args.refresh)
+    else:
+        result = resolve_launch_command(refresh=args.refresh)
+    if result is None:
+        print(f"ofscraper is not installed for {args.python}")
+        sys.exit(1)
+    print(json.dumps(result.to_dict(), indent=2) if args.json else f"{result.kind}: {result.display()}")
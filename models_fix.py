@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
-import os
-import sys
 import tkinter as tk
 from tkinter import messagebox
-import subprocess
 
 # Import common functions
 from common import (
-    check_ofscraper_installation,
-    find_pip_sitepackage_paths,
-    find_pipx_ofscraper_sitepackage_paths
+    RECOMMENDED_AIOHTTP,
+    RECOMMENDED_AIOHTTP_VERSION,
+    get_environment_snapshot
 )
+from patch_engine import patch_environments, describe_report, report_ok
+from planner import apply_pins, target_environments
+from proc_runner import StreamingRunner
 
 class ModelsFixWindow:
     def __init__(self, parent):
@@ -32,7 +32,7 @@ class ModelsFixWindow:
         
         # Explanation label
         explanation = (
-            "This will update aiohttp to 3.11.16 and patch sessionmanager.py to fix "
+            f"This will update aiohttp to {RECOMMENDED_AIOHTTP_VERSION} and patch sessionmanager.py to fix "
             "the 'No Models Found' error. The patch disables SSL verification for connections."
         )
         label = tk.Label(main_frame, text=explanation, wraplength=500, justify=tk.LEFT)
@@ -69,7 +69,9 @@ class ModelsFixWindow:
     def detect_installation(self):
         """Detect ofScraper installation type and prepare paths."""
         self.update_status("Detecting ofScraper installation...")
-        self.install_type = check_ofscraper_installation()
+        snapshot = get_environment_snapshot()
+        self.install_type = snapshot["install_type"]
+        self.all_paths = set()
         
         if self.install_type is None:
             self.update_status("ofScraper is not detected via pip or pipx.")
@@ -84,14 +86,13 @@ class ModelsFixWindow:
             self.update_status("ofScraper is installed with BOTH pip and pipx.")
         
         # Find potential site-package paths
-        self.all_paths = set()
         if self.install_type in ("pip", "both"):
-            pip_paths = find_pip_sitepackage_paths()
+            pip_paths = snapshot["pip"]["site_packages"]
             self.all_paths.update(pip_paths)
             self.update_status(f"Found {len(pip_paths)} pip site-package paths.")
         
         if self.install_type in ("pipx", "both"):
-            pipx_paths = find_pipx_ofscraper_sitepackage_paths()
+            pipx_paths = snapshot["pipx"]["site_packages"]
             self.all_paths.update(pipx_paths)
             self.update_status(f"Found {len(pipx_paths)} pipx site-package paths.")
         
@@ -105,24 +106,18 @@ class ModelsFixWindow:
         if self.install_type is None:
             self.update_status("ofScraper installation not detected. Update may not be effective.")
         
-        self.update_status("Updating aiohttp to 3.11.16...")
-        
-        if self.install_type in ["pip", "both"]:
-            try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", 
-                              "aiohttp==3.11.16"],
-                             check=True, text=True)
-                self.update_status("aioself.update_status("aiohttp updated successfully via pip.")
-            except subprocess.CalledProcessError as e:
-                self.update_status(f"Error updating aiohttp via pip:\n{e}")
-        
-        if self.install_type in ["pipx", "both"]:
-            try:
-                subprocess.run(["pipx", "inject", "ofscraper", "aiohttp==3.11.16", "--force"],
-                             check=True, text=True)
-                self.update_status("aiohttp updated successfully via pipx.")
-            except subprocess.CalledProcessError as e:
-                self.update_status(f"Error updating aiohttp via pipx:\n{e}")
+        self.update_status(f"Updating aiohttp to {RECOMMENDED_AIOHTTP_VERSION}...")
+        # Only environments that don't already have the pin are touched
+        apply_pins(target_environments(self.install_type or "pip"), [RECOMMENDED_AIOHTTP],
+                   self.update_status, confirm_force=self.confirm_force,
+                   runner=StreamingRunner(self.top, self.update_status))
+    
+    def confirm_force(self):
+        """Ask whether to reinstall aiohttp even though it is already at the recommended version."""
+        return messagebox.askyesno("Force reinstall",
+                                   f"aiohttp {RECOMMENDED_AIOHTTP_VERSION} is already installed.\n"
+                                   "Reinstall it anyway? (Only needed if the install is corrupted.)",
+                                   parent=self.top)
     
     def patch_sessionmanager(self):
         """Patch sessionmanager.py to fix SSL configuration."""
@@ -132,40 +127,11 @@ class ModelsFixWindow:
         
         self.update_status("Searching for sessionmanager.py in site-packages...")
         
-        old_line = "ssl=ssl.create_default_context(cafile=certifi.where()),"
-        new_line = "ssl=False,"
-        
-        patched = False
-        for path in self.all_paths:
-            if not os.path.isdir(path):
-                continue
-            
-            self.update_status(f"Searching in: {path}")
-            
-            for root, dirs, files in os.walk(path):
-                if "sessionmanager.py" in files:
-                    session_file = os.path.join(root, "sessionmanager.py")
-                    self.update_status(f"Found: {session_file}")
-                    
-                    try:
-                        with open(session_file, "r", encoding="utf-8") as f:
-                            content = f.read()
-                        
-                        if old_line not in content and new_line in content:
-                            self.update_status("File is already patched.")
-                            patched = True
-                            continue
-                        
-                        if old_line in content:
-                            new_content = content.replace(old_line, new_line)
-                            with open(session_file, "w", encoding="utf-8") as f:
-                                f.write(new_content)
-                            self.update_status("Successfully patched sessionmanager.py")
-                            patched = True
-                        else:
-                            self.update_status("Expected SSL line not found in this file.")
-                    except Exception as e:
-                        self.update_status(f"Error modifying {session_file}: {e}")
+        envs = [env for env in target_environments(self.install_type or "pip") if env["site_packages"]]
+        report = patch_environments(envs, patch_ids=["ssl-verify-off"])
+        for line in describe_report(report):
+            self.update_status(line)
+        patched = report_ok(report)
         
         if not patched:
             self.update_status("Could not find or patch sessionmanager.py.")
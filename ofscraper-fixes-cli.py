@@ -4,20 +4,32 @@ import subprocess
 import site
 import os
 import json
-import glob
 import shutil
 import webbrowser
 
-# Constants for recommended versions and URLs
-RECOMMENDED_AIOLIMITER = "aiolimiter==1.1.0"  # Fixes ofscraper ending with "Finish Script"
+# pipx venvs are resolved from their on-disk metadata instead of `pipx list --json`
+from env_probe import resolve_pipx_venv, find_venv_sitepackage_paths
+from installer import get_installer, run_command
+from wheelhouse import WheelhouseError
+from planner import RECOMMENDED_PINS, apply_pins, target_environments
+from patch_engine import patch_environments, describe_report, report_ok
+
+# Recommended versions come from the lockfile, via common
+from common import (
+    RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOLIMITER_VERSION,
+    RECOMMENDED_AIOHTTP_VERSION,
+    RECOMMENDED_OS_VERSION,
+    RECOMMENDED_PYTHON_VERSION,
+    PYTHON_DOWNLOAD_URL
+)
+
+# Constants for URLs
 RECOMMENDED_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/deviint/onlyfans-dynamic-rules/main/dynamicRules.json"
 DRM_KEYS_INFO_URL = "https://forum.videohelp.com/threads/408031-Dumping-Your-own-L3-CDM-with-Android-Studio/page26#post2766668"
 WRITTEN_GUIDE_URL = "https://example.com/drm_keys_guide"  # Replace with your guide URL
 YOUTUBE_VIDEO_URL = "https://www.youtube.com/watch?v=MeQDCoYLTE0"  # Windows only
 DISCORD_INVITE_URL = "https://discord.gg/wN7uxEVHRK"
-RECOMMENDED_OS_VERSION = "3.12.9"  # Recommended version for ofscraper
-RECOMMENDED_PYTHON_VERSION = "3.11.6"  # Recommended Python version
-PYTHON_DOWNLOAD_URL = "https://www.python.org/downloads/release/python-3116/"
 
 ASCII_LOGO = r"""
        ___       ___   ______                                               
@@ -71,21 +83,15 @@ def get_ofscraper_version_from_pip():
 
 def get_ofscraper_version_from_pipx():
     try:
-        result = subprocess.run(["pipx", "list", "--json"],
-                                  capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            if "venvs" in data and "ofscraper" in data["venvs"]:
-                metadata = data["venvs"]["ofscraper"].get("metadata", {})
-                version = metadata.get("version")
-                if version:
-                    return version
-                else:
-                    log_message("pipx list did not include a version for ofscraper.")
+        venv_info = resolve_pipx_venv("ofscraper")
+        if venv_info:
+            version = venv_info.get("version")
+            if version:
+                return version
             else:
-                log_message("ofscraper not found in pipx list.")
+                log_message("pipx metadata did not include a version for ofscraper.")
         else:
-            log_message("Error running pipx list --json for ofscraper.")
+            log_message("ofscraper not found in pipx.")
     except Exception as e:
         log_message(f"Exception when checking version via pipx: {e}")
     return "unknown"
@@ -116,12 +122,7 @@ def check_ofscraper_installation():
     except Exception:
         pass
     try:
-        pipx_list = subprocess.run(["pipx", "list", "--json"],
-                                    capture_output=True, text=True)
-        if pipx_list.returncode == 0:
-            data = json.loads(pipx_list.stdout)
-            if "venvs" in data and "ofscraper" in data["venvs"]:
-                pipx_installed = True
+        pipx_installed = resolve_pipx_venv("ofscraper") is not None
     except Exception:
         pass
 
@@ -153,7 +154,7 @@ def combined_system_check():
             webbrowser.open(PYTHON_DOWNLOAD_URL)
         return
     if current_py != RECOMMENDED_PYTHON_VERSION:
-        log_message("Note: The recommended Python version is 3.11.6. If you have issues, please install Python 3.11.6.")
+        log_message(f"Note: The recommended Python version is {RECOMMENDED_PYTHON_VERSION}. If you have issues, please install Python {RECOMMENDED_PYTHON_VERSION}.")
     log_message("=== Combined System Check & Update ===")
     install_type = check_ofscraper_installation()
     version = get_ofscraper_version(install_type)
@@ -182,45 +183,42 @@ def combined_system_check():
 def update_ofscraper(install_type):
     if install_type == "pip":
         try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                           check=True, text=True)
+            run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
             log_message("ofscraper updated successfully via pip.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, WheelhouseError) as e:
             log_message(f"Error updating via pip:\n{e}")
     elif install_type == "pipx":
         try:
-            subprocess.run(["pipx", "upgrade", "ofscraper"], check=True, text=True)
+            run_command(get_installer("pipx").upgrade_app_command())
             log_message("ofscraper updated successfully via pipx.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, WheelhouseError) as e:
             log_message(f"Error updating via pipx:\n{e}")
     elif install_type == "both":
         choice = ask_integer("Select update method:\n1) pip\n2) pipx\n3) Both", 1, 3)
         if choice == 1:
             try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                               check=True, text=True)
+                run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
                 log_message("ofscraper updated successfully via pip.")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, WheelhouseError) as e:
                 log_message(f"Error updating via pip:\n{e}")
         elif choice == 2:
             try:
-                subprocess.run(["pipx", "upgrade", "ofscraper"], check=True, text=True)
+                run_command(get_installer("pipx").upgrade_app_command())
                 log_message("ofscraper updated successfully via pipx.")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, WheelhouseError) as e:
                 log_message(f"Error updating via pipx:\n{e}")
         elif choice == 3:
             try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                               check=True, text=True)
-                subprocess.run(["pipx", "upgrade", "ofscraper"], check=True, text=True)
+                run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
+                run_command(get_installer("pipx").upgrade_app_command())
                 log_message("ofscraper updated successfully via both pip and pipx.")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, WheelhouseError) as e:
                 log_message(f"Error updating via both methods:\n{e}")
     new_version = get_ofscraper_version(install_type)
     log_message(f"Updated ofscraper version: {new_version}")
 
 def offer_aiolimiter_installation(install_type):
-    if not ask_yesno("This will set aiolimiter to 1.1.0 to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?"):
+    if not ask_yesno(f"This will set aiolimiter to {RECOMMENDED_AIOLIMITER_VERSION} to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?"):
         log_message("Skipping aiolimiter fix.")
         return
     if install_type is None:
@@ -228,7 +226,7 @@ def offer_aiolimiter_installation(install_type):
         if ask_yesno("Install aiolimiter via pip?"):
             install_aiolimiter_via_pip()
         return
-    log_message("Installing aiolimiter==1.1.0...")
+    log_message(f"Installing {RECOMMENDED_AIOLIMITER}...")
     if install_type in ["pip", "both"]:
         install_aiolimiter_via_pip()
     elif install_type == "pipx":
@@ -236,23 +234,21 @@ def offer_aiolimiter_installation(install_type):
 
 def install_aiolimiter_via_pip():
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", RECOMMENDED_AIOLIMITER, "--force-reinstall"],
-                       check=True, text=True)
+        run_command(get_installer("pip").install_command([RECOMMENDED_AIOLIMITER], force=True, upgrade=True))
         log_message("aiolimiter installed successfully via pip.")
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, WheelhouseError) as e:
         log_message(f"Error installing aiolimiter via pip:\n{e}")
 
 def install_aiolimiter_via_pipx():
     try:
-        subprocess.run(["pipx", "inject", "ofscraper", RECOMMENDED_AIOLIMITER, "--force"],
-                       check=True, text=True)
+        run_command(get_installer("pipx").install_command([RECOMMENDED_AIOLIMITER], force=True))
         log_message("aiolimiter injected successfully via pipx.")
-    except subprocess.CalledProcessError as e:
+    except (subprocess.CalledProcessError, WheelhouseError) as e:
         log_message(f"Error injecting aiolimiter via pipx:\n{e}")
 
 def update_aiohttp_and_fix_sessionmanager():
-    log_message("Explanation: This will update aiohttp to 3.11.16 and patch sessionmanager.py to fix the 'no models found' error.")
-    if ask_yesno("Do you want to update aiohttp to 3.11.16?"):
+    log_message(f"Explanation: This will update aiohttp to {RECOMMENDED_AIOHTTP_VERSION} and patch sessionmanager.py to fix the 'no models found' error.")
+    if ask_yesno(f"Do you want to update aiohttp to {RECOMMENDED_AIOHTTP_VERSION}?"):
         log_message("aiohttp update simulated.")
     else:
         log_message("Skipping aiohttp update.")
@@ -333,47 +329,26 @@ def check_key_mode_default(config_data):
             log_message("Manual DRM keys info not requested.")
 
 def modify_sessionmanager_if_needed():
-    all_paths = set()
-    all_paths |= find_pip_sitepackage_paths()
-    all_paths |= find_pipx_ofscraper_sitepackage_paths()
-    if not all_paths:
+    envs = [env for env in (
+        {"label": "pip", "site_packages": sorted(find_pip_sitepackage_paths())},
+        {"label": "pipx", "site_packages": sorted(find_pipx_ofscraper_sitepackage_paths())},
+    ) if env["site_packages"]]
+    if not envs:
         log_message("No site-package paths found.")
         return
     log_message("Searching for sessionmanager.py in the following paths:")
-    for p in all_paths:
-        log_message(f"  {p}")
-    if patch_sessionmanager_in_paths(all_paths):
+    for env in envs:
+        for p in env["site_packages"]:
+            log_message(f"  {env['label']}: {p}")
+    # Each environment is patched concurrently; every copy found is patched
+    report = patch_environments(envs, patch_ids=["ssl-verify-off"])
+    for line in describe_report(report):
+        log_message(line)
+    if report_ok(report):
         log_message("sessionmanager.py patched successfully.")
     else:
         log_message("sessionmanager.py was not patched or not found.")
 
-def patch_sessionmanager_in_paths(paths):
-    old_line = "ssl=ssl.create_default_context(cafile=certifi.where()),"
-    new_line = "ssl=False,"
-    for path in paths:
-        if not os.path.isdir(path):
-            continue
-        for root, dirs, files in os.walk(path):
-            if "sessionmanager.py" in files:
-                session_file = os.path.join(root, "sessionmanager.py")
-                log_message(f"Found: {session_file}")
-                try:
-                    with open(session_file, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    if old_line not in content and new_line in content:
-                        log_message("Already patched.")
-                        return True
-                    if old_line in content:
-                        new_content = content.replace(old_line, new_line)
-                        with open(session_file, "w", encoding="utf-8") as f:
-                            f.write(new_content)
-                        return True
-                    else:
-                        log_message("Expected SSL line not found.")
-                except Exception as e:
-                    log_message(f"Error modifying {session_file}: {e}")
-    return False
-
 def find_pip_sitepackage_paths():
     paths = set(site.getsitepackages())
     user_site = site.getusersitepackages()
@@ -388,15 +363,13 @@ def find_pip_sitepackage_paths():
 def find_pipx_ofscraper_sitepackage_paths():
     candidate_paths = []
     try:
-        result = subprocess.run(["pipx", "list", "--json"], capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        if "venvs" in data and "ofscraper" in data["venvs"]:
-            venv = data["venvs"]["ofscraper"].get("venv")
-            if venv and os.path.isdir(venv):
-                candidate_paths.append(venv)
-                log_message(f"Found pipx venv from JSON: {venv}")
+        venv_info = resolve_pipx_venv("ofscraper")
+        venv = venv_info.get("venv") if venv_info else None
+        if venv and os.path.isdir(venv):
+            candidate_paths.append(venv)
+            log_message(f"Found pipx venv: {venv}")
     except Exception as e:
-        log_message(f"Error parsing pipx JSON: {e}")
+        log_message(f"Error resolving pipx venv: {e}")
     if not candidate_paths:
         if os.name == "nt":
             guess_default = os.path.join(os.environ.get("LOCALAPPDATA", ""), "pipx", "pipx", "venvs", "ofscraper")
@@ -409,17 +382,9 @@ def find_pipx_ofscraper_sitepackage_paths():
             log_message(f"Default pipx venv not found: {guess_default}")
     found_paths = set()
     for venv in candidate_paths:
-        if os.name == "nt":
-            site_pkgs = os.path.join(venv, "Lib", "site-packages")
-            if os.path.isdir(site_pkgs):
-                found_paths.add(site_pkgs)
-                log_message(f"Found site-package path: {site_pkgs}")
-        else:
-            pattern = os.path.join(venv, "lib", "python3.*", "site-packages")
-            for p in glob.glob(pattern):
-                if os.path.isdir(p):
-                    found_paths.add(p)
-                    log_message(f"Found site-package path: {p}")
+        for p in find_venv_sitepackage_paths(venv):
+            found_paths.add(p)
+            log_message(f"Found site-package path: {p}")
     return found_paths
 
 def open_ofscraper_in_new_terminal():
@@ -438,6 +403,15 @@ def open_ofscraper_in_new_terminal():
     else:
         log_message("Unsupported OS for new terminal.")
 
+def fix_all():
+    log_message("Fix All: " + ", ".join(RECOMMENDED_PINS) + " in a single install per environment, then the sessionmanager.py patch.")
+    if not ask_yesno("Continue?"):
+        log_message("Skipping Fix All.")
+        return
+    install_type = check_ofscraper_installation()
+    apply_pins(target_environments(install_type), RECOMMENDED_PINS, log_message, batch=True)
+    modify_sessionmanager_if_needed()
+
 def test_run_ofscraper():
     # Open ofscraper in a new terminal window.
     open_ofscraper_in_new_terminal()
@@ -450,6 +424,7 @@ def main_menu():
         print("3) Update aiohttp & Fix sessionmanager.py")
         print("4) Auth Config Fix")
         print("5) Test Run ofscraper (in new terminal)")
+        print("6) Fix All (one install per environment + sessionmanager.py patch)")
         print("0) Exit")
         choice = input("Enter your choice: ").strip()
         if choice == "1":
@@ -463,6 +438,8 @@ def main_menu():
             modify_ofscraper_config_if_needed()
         elif choice == "5":
             test_run_ofscraper()
+        elif choice == "6":
+            fix_all()
         elif choice == "0":
             print("Exiting.")
             break
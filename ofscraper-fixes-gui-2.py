@@ -12,6 +12,7 @@ from aiohttp_fix import AiohttpFixTool
 from config_fix import ConfigFixTool
 from test_run import TestRunTool
 from reinstall import ReinstallTool
+from fix_all import FixAllTool
 
 class SetupOfScraperApp:
     def __init__(self, root):
@@ -93,6 +94,14 @@ class SetupOfScraperApp:
         )
         reinstall_button.grid(row=3, column=0, columnspan=2, pady=5, padx=5, sticky=(tk.W, tk.E))
         
+        # Row 4 in button_frame - Fix All button
+        fix_all_button = ttk.Button(
+            button_frame,
+            text="Fix All (pins + SSL patch)",
+            command=self.run_fix_all_tool
+        )
+        fix_all_button.grid(row=4, column=0, columnspan=2, pady=5, padx=5, sticky=(tk.W, tk.E))
+        
         # Log area
         log_label = ttk.Label(
             self.main_frame,
@@ -177,6 +186,15 @@ class SetupOfScraperApp:
             messagebox.showerror("Error", f"An error occurred during reinstall: {e}", parent=self.root)
             self.update_status(f"Error: {e}")
 
+    def run_fix_all_tool(self):
+        """Run the fix all tool"""
+        try:
+            tool = FixAllTool(self.root, self.update_status)
+            tool.run()
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred during fix all: {e}", parent=self.root)
+            self.update_status(f"Error: {e}")
+
 def main():
     """Main entry point for the application"""
     root = tk.Tk()
@@ -6,21 +6,32 @@ import os
 import json
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-import glob
 import shutil
 import webbrowser
 import threading
 
-# Constants for recommended versions and URLs
-RECOMMENDED_AIOLIMITER = "aiolimiter==1.1.0"  # Fixes ofscraper ending with "Finish Script"
+# pipx venvs are resolved from their on-disk metadata instead of `pipx list --json`
+from env_probe import resolve_pipx_venv, find_venv_sitepackage_paths
+from installer import get_installer, run_command
+from wheelhouse import WheelhouseError
+from patch_engine import patch_environments, describe_report, report_ok
+
+# Recommended versions come from the lockfile, via common
+from common import (
+    RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOLIMITER_VERSION,
+    RECOMMENDED_AIOHTTP_VERSION,
+    RECOMMENDED_OS_VERSION,
+    RECOMMENDED_PYTHON_VERSION,
+    PYTHON_DOWNLOAD_URL
+)
+
+# Constants for URLs
 RECOMMENDED_DYNAMIC_GENERIC_URL = "https://raw.githubusercontent.com/deviint/onlyfans-dynamic-rules/main/dynamicRules.json"
 DRM_KEYS_INFO_URL = "https://forum.videohelp.com/threads/408031-Dumping-Your-own-L3-CDM-with-Android-Studio/page26#post2766668"
 WRITTEN_GUIDE_URL = "https://forum.videohelp.com/threads/408031-Dumping-Your-own-L3-CDM-with-Android-Studio/page26#post2766668"  # Replace with your written guide URL
 YOUTUBE_VIDEO_URL = "https://www.youtube.com/watch?v=MeQDCoYLTE0"  # Windows only
 DISCORD_INVITE_URL = "https://discord.gg/wN7uxEVHRK"
-RECOMMENDED_OS_VERSION = "3.12.9"  # Recommended version for ofscraper
-RECOMMENDED_PYTHON_VERSION = "3.11.6"  # Recommended Python version
-PYTHON_DOWNLOAD_URL = "https://www.python.org/downloads/release/python-3116/"
 
 ASCII_LOGO = r"""
        ___       ___   ______                                               
@@ -145,7 +156,7 @@ class SetupOfScraperApp:
                 webbrowser.open(PYTHON_DOWNLOAD_URL)
             return
         if current_py != RECOMMENDED_PYTHON_VERSION:
-            self.update_status("Note: The recommended Python version is 3.11.6. If you have Python issues, please install Python 3.11.6.")
+            self.update_status(f"Note: The recommended Python version is {RECOMMENDED_PYTHON_VERSION}. If you have Python issues, please install Python {RECOMMENDED_PYTHON_VERSION}.")
         self.update_status("=== Combined System Check & Update ===")
         pipx_path = shutil.which("pipx")
         self.update_status(f"Debug: pipx is at: {pipx_path}")
@@ -171,18 +182,15 @@ class SetupOfScraperApp:
             if update_choice:
                 if self.install_type == "pip":
                     try:
-                        subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
-                                        f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                       check=True, text=True)
+                        run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
                         self.update_status("ofscraper updated successfully via pip.")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, WheelhouseError) as e:
                         self.update_status(f"Error updating via pip:\n{e}")
                 elif self.install_type == "pipx":
                     try:
-                        subprocess.run(["pipx", "upgrade", "ofscraper"],
-                                       check=True, text=True)
+                        run_command(get_installer("pipx").upgrade_app_command())
                         self.update_status("ofscraper updated successfully via pipx.")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, WheelhouseError) as e:
                         self.update_status(f"Error updating via pipx:\n{e}")
                 elif self.install_type == "both":
                     method = simpledialog.askinteger("Update ofscraper",
@@ -190,28 +198,22 @@ class SetupOfScraperApp:
                                                      minvalue=1, maxvalue=3)
                     if method == 1:
                         try:
-                            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
-                                            f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                           check=True, text=True)
+                            run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
                             self.update_status("ofscraper updated successfully via pip.")
-                        except subprocess.CalledProcessError as e:
+                        except (subprocess.CalledProcessError, WheelhouseError) as e:
                             self.update_status(f"Error updating via pip:\n{e}")
                     elif method == 2:
                         try:
-                            subprocess.run(["pipx", "upgrade", "ofscraper"],
-                                           check=True, text=True)
+                            run_command(get_installer("pipx").upgrade_app_command())
                             self.update_status("ofscraper updated successfully via pipx.")
-                        except subprocess.CalledProcessError as e:
+                        except (subprocess.CalledProcessError, WheelhouseError) as e:
                             self.update_status(f"Error updating via pipx:\n{e}")
                     elif method == 3:
                         try:
-                            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
-                                            f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                           check=True, text=True)
-                            subprocess.run(["pipx", "upgrade", "ofscraper"],
-                                           check=True, text=True)
+                            run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"], upgrade=True))
+                            run_command(get_installer("pipx").upgrade_app_command())
                             self.update_status("ofscraper updated successfully via both pip and pipx.")
-                        except subprocess.CalledProcessError as e:
+                        except (subprocess.CalledProcessError, WheelhouseError) as e:
                             self.update_status(f"Error updating via both methods:\n{e}")
                 new_version = self.get_ofscraper_version()
                 self.update_status(f"Updated ofscraper version: {new_version}")
@@ -231,12 +233,7 @@ class SetupOfScraperApp:
         except Exception:
             pass
         try:
-            pipx_list = subprocess.run(["pipx", "list", "--json"],
-                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if pipx_list.returncode == 0:
-                data = json.loads(pipx_list.stdout)
-                if "venvs" in data and "ofscraper" in data["venvs"]:
-                    pipx_installed = True
+            pipx_installed = resolve_pipx_venv("ofscraper") is not None
         except Exception:
             pass
         if pip_installed and pipx_installed:
@@ -268,23 +265,18 @@ class SetupOfScraperApp:
         return "unknown"
 
     def get_ofscraper_version_from_pipx(self):
-        # First attempt: use pipx list --json.
+        # First attempt: read the venv's pipx_metadata.json (the pipx CLI is only used if it is missing).
         try:
-            result = subprocess.run(["pipx", "list", "--json"],
-                                     capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                if "venvs" in data and "ofscraper" in data["venvs"]:
-                    metadata = data["venvs"]["ofscraper"].get("metadata", {})
-                    version = metadata.get("version")
-                    if version:
-                        return version
-                    else:
-                        self.update_status("pipx list did not include a version for ofscraper; falling back to pipx runpip.")
+            venv_info = resolve_pipx_venv("ofscraper")
+            if venv_info and venv_info.get("version"):
+                return venv_info["version"]
+            elif venv_info:
+                self.update_status("pipx metadata did not include a version for ofscraper; falling back to pipx runpip.")
             else:
-                self.update_status("Error running pipx list --json for ofscraper.")
+                self.update_status("ofscraper not found in pipx.")
+                return "unknown"
         except Exception as e:
-            self.update_status(f"Exception when checking version via pipx list: {e}")
+            self.update_status(f"Exception when checking version via pipx metadata: {e}")
         # Fallback: use pipx runpip ofscraper show ofscraper.
         try:
             result = subprocess.run(["pipx", "runpip", "ofscraper", "show", "ofscraper"],
@@ -316,7 +308,7 @@ class SetupOfScraperApp:
 
     def offer_aiolimiter_installation(self):
         fix_dialog = messagebox.askyesno("Fix aiolimiter",
-                                         "This will set aiolimiter to 1.1.0 to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?")
+                                         f"This will set aiolimiter to {RECOMMENDED_AIOLIMITER_VERSION} to fix ofscraper ending with 'Finish Script'.\nDo you want to fix aiolimiter?")
         if not fix_dialog:
             self.update_status("Skipping aiolimiter fix.")
             return
@@ -325,7 +317,7 @@ class SetupOfScraperApp:
             if messagebox.askyesno("Install aiolimiter", "Install aiolimiter via pip?"):
                 self.install_aiolimiter_via_pip()
             return
-        self.update_status("Installing aiolimiter==1.1.0...")
+        self.update_status(f"Installing {RECOMMENDED_AIOLIMITER}...")
         if self.install_type in ["pip", "both"]:
             self.install_aiolimiter_via_pip()
         elif self.install_type == "pipx":
@@ -333,27 +325,24 @@ class SetupOfScraperApp:
 
     def install_aiolimiter_via_pip(self):
         try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
-                            RECOMMENDED_AIOLIMITER, "--force-reinstall"],
-                           check=True, text=True)
+            run_command(get_installer("pip").install_command([RECOMMENDED_AIOLIMITER], force=True, upgrade=True))
             self.update_status("aiolimiter installed successfully via pip.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, WheelhouseError) as e:
             self.update_status(f"Error installing aiolimiter via pip:\n{e}")
 
     def install_aiolimiter_via_pipx(self):
         try:
-            subprocess.run(["pipx", "inject", "ofscraper", RECOMMENDED_AIOLIMITER, "--force"],
-                           check=True, text=True)
+            run_command(get_installer("pipx").install_command([RECOMMENDED_AIOLIMITER], force=True))
             self.update_status("aiolimiter injected successfully via pipx.")
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, WheelhouseError) as e:
             self.update_status(f"Error injecting aiolimiter via pipx:\n{e}")
 
     def update_aiohttp_and_fix_sessionmanager(self):
         explanation = (
-            "This will update aiohttp to 3.11.16 and patch sessionmanager.py to fix the 'no models found' error."
+            f"This will update aiohttp to {RECOMMENDED_AIOHTTP_VERSION} and patch sessionmanager.py to fix the 'no models found' error."
         )
         messagebox.showinfo("Explanation", explanation)
-        update_choice = messagebox.askyesno("Update aiohttp", "Do you want to update aiohttp to 3.11.16?")
+        update_choice = messagebox.askyesno("Update aiohttp", f"Do you want to update aiohttp to {RECOMMENDED_AIOHTTP_VERSION}?")
         if update_choice:
             self.update_status("aiohttp update simulated.")
         else:
@@ -465,49 +454,27 @@ class SetupOfScraperApp:
 
     def modify_sessionmanager_if_needed(self):
         """Search for sessionmanager.py and patch its SSL configuration."""
-        all_paths = set()
+        envs = []
         if self.install_type in ("pip", "both"):
-            all_paths |= self.find_pip_sitepackage_paths()
+            envs.append({"label": "pip", "site_packages": sorted(self.find_pip_sitepackage_paths())})
         if self.install_type in ("pipx", "both"):
-            all_paths |= self.find_pipx_ofscraper_sitepackage_paths()
-        if not all_paths:
+            envs.append({"label": "pipx", "site_packages": sorted(self.find_pipx_ofscraper_sitepackage_paths())})
+        envs = [env for env in envs if env["site_packages"]]
+        if not envs:
             self.update_status("No site-package paths found.")
             return
         self.update_status("Searching for sessionmanager.py:")
-        for p in all_paths:
-            self.update_status(f"  {p}")
-        patched = self.patch_sessionmanager_in_paths(all_paths)
-        if patched:
+        for env in envs:
+            for p in env["site_packages"]:
+                self.update_status(f"  {env['label']}: {p}")
+        # Each environment is patched concurrently; every copy found is patched
+        report = patch_environments(envs, patch_ids=["ssl-verify-off"])
+        for line in describe_report(report):
+            self.update_status(line)
+        if report_ok(report):
             self.update_status("sessionmanager.py patched successfully.")
         else:
-            self.update_status("sessionmanager.py was not patched or not found.")
-
-    def patch_sessionmanager_in_paths(self, paths):
-        old_line = "ssl=ssl.create_default_context(cafile=certifi.where()),"
-        new_line = "ssl=False,"
-        for path in paths:
-            if not os.path.isdir(path):
-                continue
-            for root, dirs, files in os.walk(path):
-                if "sessionmanager.py" in files:
-                    session_file = os.path.join(root, "sessionmanager.py")
-                    self.update_status(f"Found: {session_file}")
-                    try:
-                        with open(session_file, "r", encoding="utf-8") as f:
-                            content = f.read()
-                        if old_line not in content and new_line in content:
-                            self.update_status("Already patched.")
-                            return True
-                        if old_line in content:
-                            new_content = content.replace(old_line, new_line)
-                            with open(session_file, "w", encoding="utf-8") as f:
-                                f.write(new_content)
-                            return True
-                        else:
-                            self.update_status("Expected SSL line not found.")
-                    except Exception as e:
-                        self.update_status(f"Error modifying {session_file}: {e}")
-        return False
+            self.update_status("sessionmanager.py was not patched or not found in every environment.")
 
     def find_pip_sitepackage_paths(self):
         paths = set(site.getsitepackages())
@@ -523,15 +490,13 @@ class SetupOfScraperApp:
     def find_pipx_ofscraper_sitepackage_paths(self):
         candidate_paths = []
         try:
-            result = subprocess.run(["pipx", "list", "--json"], capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            if "venvs" in data and "ofscraper" in data["venvs"]:
-                venv = data["venvs"]["ofscraper"].get("venv")
-                if venv and os.path.isdir(venv):
-                    candidate_paths.append(venv)
-                    self.update_status(f"Found pipx venv from JSON: {venv}")
+            venv_info = resolve_pipx_venv("ofscraper")
+            venv = venv_info.get("venv") if venv_info else None
+            if venv and os.path.isdir(venv):
+                candidate_paths.append(venv)
+                self.update_status(f"Found pipx venv: {venv}")
         except Exception as e:
-            self.update_status(f"Error parsing pipx JSON: {e}")
+            self.update_status(f"Error resolving pipx venv: {e}")
         if not candidate_paths:
             if os.name == "nt":
                 guess_default = os.path.join(os.environ.get("LOCALAPPDATA", ""), "pipx", "pipx", "venvs", "ofscraper")
@@ -561,17 +526,9 @@ class SetupOfScraperApp:
                     self.update_status("User-provided path not found or skipped.")
         found_paths = set()
         for venv in candidate_paths:
-            if os.name == "nt":
-                site_pkgs = os.path.join(venv, "Lib", "site-packages")
-                if os.path.isdir(site_pkgs):
-                    found_paths.add(site_pkgs)
-                    self.update_status(f"Found site-package path: {site_pkgs}")
-            else:
-                pattern = os.path.join(venv, "lib", "python3.*", "site-packages")
-                for p in glob.glob(pattern):
-                    if os.path.isdir(p):
-                        found_paths.add(p)
-                        self.update_status(f"Found site-package path: {p}")
+            for p in find_venv_sitepackage_paths(venv):
+                found_paths.add(p)
+                self.update_status(f"Found site-package path: {p}")
         return found_paths
 
     def open_ofscraper_in_new_terminal(self):
@@ -622,17 +579,15 @@ class SetupOfScraperApp:
             # Based on how it was installed, perform uninstall.
             if self.install_type == "pip":
                 try:
-                    subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                                   check=True, text=True)
+                    run_command(get_installer("pip").uninstall_command(["ofscraper"]))
                     self.update_status("ofscraper uninstalled successfully via pip.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, WheelhouseError) as e:
                     self.update_status(f"Error uninstalling via pip:\n{e}")
             elif self.install_type == "pipx":
                 try:
-                    subprocess.run(["pipx", "uninstall", "ofscraper"],
-                                   check=True, text=True)
+                    run_command(get_installer("pipx").uninstall_command(["ofscraper"]))
                     self.update_status("ofscraper uninstalled successfully via pipx.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, WheelhouseError) as e:
                     self.update_status(f"Error uninstalling via pipx:\n{e}")
             elif self.install_type == "both":
                 method = simpledialog.askinteger("Uninstall ofscraper",
@@ -640,26 +595,22 @@ class SetupOfScraperApp:
                                                  minvalue=1, maxvalue=3)
                 if method == 1:
                     try:
-                        subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                                       check=True, text=True)
+                        run_command(get_installer("pip").uninstall_command(["ofscraper"]))
                         self.update_status("ofscraper uninstalled successfully via pip.")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, WheelhouseError) as e:
                         self.update_status(f"Error uninstalling via pip:\n{e}")
                 elif method == 2:
                     try:
-                        subprocess.run(["pipx", "uninstall", "ofscraper"],
-                                       check=True, text=True)
+                        run_command(get_installer("pipx").uninstall_command(["ofscraper"]))
                         self.update_status("ofscraper uninstalled successfully via pipx.")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, WheelhouseError) as e:
                         self.update_status(f"Error uninstalling via pipx:\n{e}")
                 elif method == 3:
                     try:
-                        subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                                       check=True, text=True)
-                        subprocess.run(["pipx", "uninstall", "ofscraper"],
-                                       check=True, text=True)
+                        run_command(get_installer("pip").uninstall_command(["ofscraper"]))
+                        run_command(get_installer("pipx").uninstall_command(["ofscraper"]))
                         self.update_status("ofscraper uninstalled successfully via both pip and pipx.")
-                    except subprocess.CalledProcessError as e:
+                    except (subprocess.CalledProcessError, WheelhouseError) as e:
                         self.update_status(f"Error uninstalling via both methods:\n{e}")
         # Ask if user wants to reinstall.
         if messagebox.askyesno("Reinstall ofscraper", "Do you want to reinstall ofscraper?"):
@@ -669,17 +620,15 @@ class SetupOfScraperApp:
                                              minvalue=1, maxvalue=2)
             if method == 1:
                 try:
-                    subprocess.run([sys.executable, "-m", "pip", "install", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                   check=True, text=True)
+                    run_command(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"]))
                     self.update_status("ofscraper installed successfully via pip.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, WheelhouseError) as e:
                     self.update_status(f"Error installing via pip:\n{e}")
             elif method == 2:
                 try:
-                    subprocess.run(["pipx", "install", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                   check=True, text=True)
+                    run_command(get_installer("pipx").install_app_command(f"ofscraper=={RECOMMENDED_OS_VERSION}"))
                     self.update_status("ofscraper installed successfully via pipx.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, WheelhouseError) as e:
                     self.update_status(f"Error installing via pipx:\n{e}")
             else:
                 self.update_status("No valid install option selected.")
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+# patch_engine.py - Registry of source patches for installed ofscraper, applied in one pass per file
+
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import compileall
+import py_compile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from dist_index import DistIndex
+from env_probe import venv_python
+from fileutils import atomic_write_text, fsync_dir
+from patch_locator import locate_package_file
+
+class PatchSpec:
+    """One text patch: replace `anchor` with `replacement` in a file of an installed package."""
+
+    def __init__(self, patch_id, package, filename, anchor, replacement, description,
+                 min_version=None, max_version=None):
+        self.patch_id = patch_id
+        self.package = package
+        self.filename = filename
+        self.anchor = anchor
+        self.replacement = replacement
+        self.description = description
+        # Inclusive lower bound, exclusive upper bound; None means unbounded
+        self.min_version = min_version
+        self.max_version = max_version
+
+    def applies_to(self, version):
+        """True if the patch is meant for this installed version of the package."""
+        if version is None:
+            return True
+        current = _version_tuple(version)
+        if self.min_version and current < _version_tuple(self.min_version):
+            return False
+        if self.max_version and current >= _version_tuple(self.max_version):
+            return False
+        return True
+
+def _version_tuple(version):
+    """Numeric release parts of a version string ("3.12.9" -> (3, 12, 9))."""
+    return tuple(int(part) for part in re.findall(r"\d+", version.split("+")[0])[:4])
+
+# Every patch the fixes know about. New fixes are added here, not as new walk/replace code.
+PATCH_REGISTRY = [
+    PatchSpec(
+        "ssl-verify-off",
+        package="ofscraper",
+        filename="sessionmanager.py",
+        anchor="ssl=ssl.create_default_context(cafile=certifi.where()),",
+        replacement="ssl=False,",
+        description="Disable certifi SSL verification in sessionmanager.py (fixes 'No models found')",
+    ),
+]
+
+# Per-root directory (inside site-packages) holding backups and patch state
+STATE_DIR_NAME = ".ofscraper-fixes"
+STATE_FORMAT_VERSION = 1
+
+# Bytecode refresh run inside the target interpreter: py_compile writes that interpreter's magic number
+COMPILE_SCRIPT = "import sys, py_compile\nfor path in sys.argv[1:]:\n    py_compile.compile(path, doraise=True)\n"
+COMPILE_TIMEOUT = 300
+
+# Result statuses
+PATCHED = "patched"
+ALREADY_PATCHED = "already-patched"
+NEEDS_PATCH = "needs-patch"
+ANCHOR_NOT_FOUND = "anchor-not-found"
+NOT_FOUND = "not-found"
+ERROR = "error"
+
+def get_patches(patch_ids=None):
+    """Registry entries for the given IDs (all of them when patch_ids is None)."""
+    if patch_ids is None:
+        return list(PATCH_REGISTRY)
+    return [spec for spec in PATCH_REGISTRY if spec.patch_id in patch_ids]
+
+def resolve_targets(site_packages, specs):
+    """
+    Locate every target file once.
+    Returns (targets, unresolved): targets maps file path -> {"root", "specs"},
+    unresolved lists (spec, root) pairs whose file was not found in a root that has the package.
+    """
+    targets = {}
+    unresolved = []
+    for root in site_packages:
+        index = DistIndex([root])
+        located = {}
+        for spec in specs:
+            version = index.version(spec.package)
+            if version is None and not os.path.isdir(os.path.join(root, spec.package)):
+                continue
+            if not spec.applies_to(version):
+                continue
+            key = (spec.package, spec.filename)
+            if key not in located:
+                located[key] = locate_package_file([root], spec.package, spec.filename)
+            if not located[key]:
+                unresolved.append((spec, root))
+            for path in located[key]:
+                target = targets.setdefault(path, {"root": root, "specs": []})
+                target["specs"].append(spec)
+    return targets, unresolved
+
+def _result(spec, path, root, status, error=None):
+    return {"patch_id": spec.patch_id, "path": path, "root": root, "status": status, "error": error}
+
+def _backup_dir(root):
+    return os.path.join(root, STATE_DIR_NAME, "backups")
+
+def _backup_index_path(root):
+    return os.path.join(root, STATE_DIR_NAME, "backups.json")
+
+def load_backup_index(root):
+    """Map patched file path -> {"backup", "size", "mtime_ns"} for one site-packages root."""
+    try:
+        with open(_backup_index_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _record_backup(root, path, backup_path):
+    index = load_backup_index(root)
+    st = os.stat(path)
+    index[path] = {"backup": backup_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    atomic_write_text(_backup_index_path(root), json.dumps(index, indent=2))
+
+def _keep_backup(root, path, digest):
+    """
+    Keep the original file under its content hash before it is replaced.
+    A hard link costs no copy; the original inode simply stays reachable.
+    """
+    directory = _backup_dir(root)
+    os.makedirs(directory, exist_ok=True)
+    backup_path = os.path.join(directory, f"{digest}.bak")
+    if not os.path.exists(backup_path):
+        try:
+            os.link(path, backup_path)
+        except OSError:
+            shutil.copy2(path, backup_path)
+    return backup_path
+
+def _stream_patch(path, specs, dry_run):
+    """
+    One streaming pass over the file: hash the original, scan every line for every anchor,
+    and write the patched lines to a temp file in the same directory.
+    The temp file is only created once an anchor is actually hit, so an already
+    patched file (even on a read-only site-packages) is never written to.
+    Returns (original digest, resulting digest, anchors hit, replacements seen, temp path or None).
+    """
+    digest = hashlib.sha256()
+    result_digest = hashlib.sha256()
+    hits, seen = set(), set()
+    pending = []
+    out = tmp_path = None
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as src:
+            for line in src:
+                digest.update(line.encode("utf-8"))
+                for spec in specs:
+                    if spec.anchor in line:
+                        line = line.replace(spec.anchor, spec.replacement)
+                        hits.add(spec.patch_id)
+                    elif spec.replacement in line:
+                        seen.add(spec.patch_id)
+                result_digest.update(line.encode("utf-8"))
+                if dry_run:
+                    continue
+                if out is None:
+                    pending.append(line)
+                    if hits:
+                        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".patch-", suffix=".tmp")
+                        out = os.fdopen(fd, "w", encoding="utf-8", newline="")
+                        out.writelines(pending)
+                        pending = None
+                else:
+                    out.write(line)
+        if out is not None:
+            out.flush()
+            os.fsync(out.fileno())
+            out.close()
+            shutil.copymode(path, tmp_path)
+    except BaseException:
+        if out is not None:
+            out.close()
+            os.unlink(tmp_path)
+        raise
+    return digest.hexdigest(), result_digest.hexdigest(), hits, seen, tmp_path
+
+def apply_to_file(path, root, specs, dry_run=False):
+    """
+    Apply every spec for one file in a single streaming pass.
+    The patched copy is fsynced and os.replace()d over the original, so a killed
+    process leaves either the old file or the new one, never a truncated one.
+    Returns (results, sha256 of the file content after the pass or None on error).
+    A patched result carries an "error" note if the rollback record couldn't be written.
+    """
+    try:
+        digest, result_digest, hits, seen, tmp_path = _stream_patch(path, specs, dry_run)
+    except (OSError, UnicodeDecodeError) as e:
+        return [_result(spec, path, root, ERROR, str(e)) for spec in specs], None
+
+    warning = None
+    if tmp_path:
+        try:
+            backup_path = _keep_backup(root, path, digest)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return [_result(spec, path, root, ERROR, str(e)) for spec in specs], None
+        # The file is patched from here on; a failure now only loses the rollback record
+        fsync_dir(os.path.dirname(path))
+        try:
+            _record_backup(root, path, backup_path)
+        except (OSError, ValueError) as e:
+            warning = f"backup not recorded, so it can't be rolled back: {e}"
+
+    results = []
+    for spec in specs:
+        if spec.patch_id in hits:
+            results.append(_result(spec, path, root, NEEDS_PATCH if dry_run else PATCHED,
+                                   None if dry_run else warning))
+        elif spec.patch_id in seen:
+            results.append(_result(spec, path, root, ALREADY_PATCHED))
+        else:
+            results.append(_result(spec, path, root, ANCHOR_NOT_FOUND))
+    return results, result_digest
+
+def _state_path(root):
+    return os.path.join(root, STATE_DIR_NAME, "state.json")
+
+def load_patch_state(root):
+    """
+    Map file path -> {"size", "mtime_ns", "sha256", "patches"} for files in this root
+    that were last seen with every listed patch applied.
+    """
+    try:
+        with open(_state_path(root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("format") != STATE_FORMAT_VERSION:
+        return {}
+    return data.get("files", {})
+
+def _save_patch_state(root, state):
+    # Only a shortcut for later checks; an unwritable root just means a full scan next time
+    try:
+        atomic_write_text(_state_path(root), json.dumps(
+            {"format": STATE_FORMAT_VERSION, "files": state}, indent=2), durable=False)
+    except OSError:
+        pass
+
+def _fingerprint_matches(path, entry):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return (st.st_size, st.st_mtime_ns) == (entry.get("size"), entry.get("mtime_ns"))
+
+def settled_patches(state):
+    """Patch ID -> paths, for state entries whose file is unchanged (one stat each)."""
+    settled = {}
+    for path, entry in state.items():
+        if _fingerprint_matches(path, entry):
+            for patch_id in entry.get("patches", []):
+                settled.setdefault(patch_id, []).append(path)
+    return settled
+
+def _remember(state, path, digest, patch_ids):
+    previous = state.get(path)
+    if previous and _fingerprint_matches(path, previous):
+        patch_ids = set(patch_ids) | set(previous.get("patches", []))
+    st = os.stat(path)
+    state[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                   "sha256": digest, "patches": sorted(patch_ids)}
+
+def rollback_file(root, path):
+    """
+    Put the pre-patch original back with a single rename.
+    Refuses if the file changed since it was patched (e.g. ofscraper was upgraded).
+    Returns a message describing what happened.
+    """
+    index = load_backup_index(root)
+    entry = index.get(path)
+    if not entry or not os.path.exists(entry["backup"]):
+        return f"No backup recorded for {path}"
+    try:
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            return f"{path} changed since it was patched; not rolling back"
+        # Another copy may share this content-addressed backup; leave it a link of its own
+        if any(e["backup"] == entry["backup"] for p, e in index.items() if p != path):
+            os.link(entry["backup"], path + ".rollback")
+            os.replace(path + ".rollback", path)
+        else:
+            os.replace(entry["backup"], path)
+        fsync_dir(os.path.dirname(path))
+    except OSError as e:
+        return f"Error rolling back {path}: {e}"
+    del index[path]
+    atomic_write_text(_backup_index_path(root), json.dumps(index, indent=2))
+    state = load_patch_state(root)
+    if state.pop(path, None):
+        _save_patch_state(root, state)
+    return f"Restored original: {path}"
+
+def rollback_patches(site_packages):
+    """Roll back every patched file recorded under the given roots. Returns messages."""
+    messages = []
+    for root in site_packages:
+        for path in list(load_backup_index(root)):
+            messages.append(rollback_file(root, path))
+    return messages
+
+def apply_patches(site_packages, patch_ids=None, dry_run=False):
+    """
+    Resolve all targets once, then apply every applicable patch in one pass per file.
+    Patches recorded in a root's state file as applied to a file that is unchanged since
+    (same size and mtime) are reported without locating or reading anything.
+    Returns a list of per-patch result dicts: patch_id, path, root, status, error.
+    With dry_run=True nothing is written and pending patches report "needs-patch".
+    """
+    specs = get_patches(patch_ids)
+    results = []
+    for root in site_packages:
+        state = load_patch_state(root)
+        settled = settled_patches(state)
+        todo = []
+        for spec in specs:
+            if spec.patch_id in settled:
+                results.extend(_result(spec, path, root, ALREADY_PATCHED) for path in settled[spec.patch_id])
+            else:
+                todo.append(spec)
+        if not todo:
+            continue
+
+        targets, unresolved = resolve_targets([root], todo)
+        results.extend(_result(spec, None, root, NOT_FOUND) for spec, _ in unresolved)
+        state_changed = False
+        for path in sorted(targets):
+            file_results, digest = apply_to_file(path, root, targets[path]["specs"], dry_run=dry_run)
+            results.extend(file_results)
+            done = [r["patch_id"] for r in file_results if r["status"] in (PATCHED, ALREADY_PATCHED)]
+            if not dry_run and done and len(done) == len(file_results):
+                try:
+                    _remember(state, path, digest, done)
+                    state_changed = True
+                except OSError:
+                    # The state file is only a shortcut; the file itself is already patched
+                    pass
+        if state_changed:
+            _save_patch_state(root, state)
+    return results
+
+def _root_interpreter(root):
+    """The interpreter that imports from a site-packages root: its venv's python, else this one."""
+    directory = root
+    for _ in range(4):
+        directory = os.path.dirname(directory)
+        if os.path.isfile(os.path.join(directory, "pyvenv.cfg")):
+            return venv_python(directory) or sys.executable
+    return sys.executable
+
+def _same_interpreter(python):
+    try:
+        return os.path.samefile(python, sys.executable)
+    except OSError:
+        return False
+
+def compile_modules(python, paths):
+    """
+    Write fresh bytecode for paths with the interpreter that will import them,
+    so the .pyc carries that interpreter's magic number and cache tag.
+    Returns None on success or an error message.
+    """
+    if _same_interpreter(python):
+        try:
+            for path in paths:
+                py_compile.compile(path, doraise=True)
+        except (py_compile.PyCompileError, OSError) as e:
+            return str(e)
+        return None
+    return _run_compiler([python, "-c", COMPILE_SCRIPT] + list(paths))
+
+def compile_package(python, package_dir):
+    """Byte-compile a whole package in parallel (one worker per CPU). Returns None or an error message."""
+    if _same_interpreter(python):
+        return None if compileall.compile_dir(package_dir, quiet=1, workers=0) else f"compileall failed for {package_dir}"
+    return _run_compiler([python, "-m", "compileall", "-q", "-j", "0", package_dir])
+
+def _run_compiler(cmd):
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=COMPILE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return str(e)
+    if proc.returncode != 0:
+        output = (proc.stderr or proc.stdout).strip()
+        return output.splitlines()[-1] if output else f"exit code {proc.returncode}"
+    return None
+
+def _refresh_bytecode(root, python, results, whole_package):
+    """Recompile what was just patched in one root. Returns {"compiled": [...], "errors": [...]}."""
+    patched = sorted({r["path"] for r in results if r["status"] == PATCHED})
+    bytecode = {"compiled": [], "errors": []}
+    if not patched:
+        return bytecode
+    python = python or _root_interpreter(root)
+    error = compile_modules(python, patched)
+    if error:
+        bytecode["errors"].append(error)
+    else:
+        bytecode["compiled"].extend(patched)
+    if whole_package:
+        packages = {spec.package for spec in PATCH_REGISTRY
+                    if spec.patch_id in {r["patch_id"] for r in results if r["status"] == PATCHED}}
+        for package in sorted(packages):
+            package_dir = os.path.join(root, package)
+            error = compile_package(python, package_dir)
+            if error:
+                bytecode["errors"].append(error)
+            else:
+                bytecode["compiled"].append(package_dir)
+    return bytecode
+
+def patch_environments(envs, patch_ids=None, dry_run=False, max_workers=None,
+                       compile_bytecode=True, compile_whole_package=False):
+    """
+    Patch several environments concurrently, one worker per site-packages root.
+    envs are dicts with "label", "site_packages" and optionally "python"
+    (see planner.target_environments).
+    Every copy of every target is handled; nothing stops at the first hit.
+    Patched modules are then byte-compiled by the environment's own interpreter
+    (and the whole package too with compile_whole_package), so the first ofscraper
+    start after a fix doesn't pay for recompiling, or fail to cache, the module.
+    Returns one report dict per env: label, results, ok, bytecode.
+    """
+    roots = {}
+    for env in envs:
+        for root in env["site_packages"]:
+            roots.setdefault(root, env.get("python"))
+
+    def work(root):
+        results = apply_patches([root], patch_ids=patch_ids, dry_run=dry_run)
+        if dry_run or not compile_bytecode:
+            return results, {"compiled": [], "errors": []}
+        return results, _refresh_bytecode(root, roots[root], results, compile_whole_package)
+
+    # A root shared by two envs is patched once, so its state file has a single writer
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, len(roots) or 1)) as pool:
+        by_root = dict(zip(roots, pool.map(work, roots)))
+    report = []
+    for env in envs:
+        results = [r for root in env["site_packages"] for r in by_root[root][0]]
+        bytecode = {"compiled": [p for root in env["site_packages"] for p in by_root[root][1]["compiled"]],
+                    "errors": [e for root in env["site_packages"] for e in by_root[root][1]["errors"]]}
+        report.append({"label": env["label"], "results": results, "ok": patches_ok(results),
+                       "bytecode": bytecode})
+    return report
+
+def report_ok(report):
+    """True if some environment had a target and every environment that had one is fully patched."""
+    found = [env_report for env_report in report if any(r["path"] for r in env_report["results"])]
+    return bool(found) and all(env_report["ok"] for env_report in found)
+
+def describe_report(report):
+    """Human-readable lines for a patch_environments report."""
+    lines = []
+    for env_report in report:
+        lines.append(f"{env_report['label']}:")
+        if not env_report["results"]:
+            lines.append("  No patch targets found.")
+            continue
+        lines.extend("  " + describe_result(r) for r in env_report["results"])
+        lines.extend(f"  Bytecode refreshed: {p}" for p in env_report["bytecode"]["compiled"])
+        # Stale bytecode only costs start-up time, so this is a warning, not a failure
+        lines.extend(f"  Could not refresh bytecode: {e}" for e in env_report["bytecode"]["errors"])
+        lines.append(f"  {env_report['label']}: {'OK' if env_report['ok'] else 'NOT fully patched'}")
+    return lines
+
+def describe_result(result):
+    """One-line human description of a patch result."""
+    status = result["status"]
+    where = result["path"] or result["root"]
+    if status == PATCHED:
+        if result["error"]:
+            return f"[{result['patch_id']}] Patched: {where} ({result['error']})"
+        return f"[{result['patch_id']}] Patched: {where}"
+    if status == ALREADY_PATCHED:
+        return f"[{result['patch_id']}] Already patched: {where}"
+    if status == NEEDS_PATCH:
+        return f"[{result['patch_id']}] Not yet patched: {where}"
+    if status == ANCHOR_NOT_FOUND:
+        return f"[{result['patch_id']}] Expected line not found in {where}"
+    if status == NOT_FOUND:
+        return f"[{result['patch_id']}] Target file not found in {where}"
+    return f"[{result['patch_id']}] Error modifying {where}: {result['error']}"
+
+def patches_ok(results):
+    """True if at least one target was found and every located target ended up patched."""
+    return bool(results) and any(r["path"] for r in results) and all(
+        r["status"] in (PATCHED, ALREADY_PATCHED) for r in results if r["path"])
+
+if __name__ == "__main__":
+    import argparse
+    from planner import target_environments
+    parser = argparse.ArgumentParser(description="Apply (or check) the registered ofscraper patches.")
+    parser.add_argument("--check", action="store_true", help="report patch state without writing")
+    parser.add_argument("--rollback", action="store_true", help="restore the pre-patch originals")
+    parser.add_argument("--compile-all", action="store_true", help="also byte-compile the whole patched package")
+    parser.add_argument("--patch", action="append", dest="patch_ids", help="only this patch ID (repeatable)")
+    args = parser.parse_args()
+    environments = target_environments()
+    if args.rollback:
+        roots = [root for env in environments for root in env["site_packages"]]
+        for message in rollback_patches(roots) or ["Nothing to roll back."]:
+            print(message)
+        raise SystemExit(0)
+    for line in describe_report(patch_environments(
+            environments, patch_ids=args.patch_ids, dry_run=args.check,
+            compile_whole_package=args.compile_all)):
+        print(line)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# patch_locator.py - Locate files inside an installed package without walking all of site-packages
+
+import os
+import csv
+from importlib.machinery import PathFinder
+
+from dist_index import DistIndex
+
+def _from_record(entry, package, filename):
+    """Read the distribution's RECORD and return the installed paths of `filename` inside `package`."""
+    found = []
+    try:
+        with open(entry["record"], "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                rel_path = row[0].replace("\\", "/")
+                if rel_path.startswith(package + "/") and rel_path.rsplit("/", 1)[-1] == filename:
+                    full_path = os.path.normpath(os.path.join(entry["root"], rel_path))
+                    if os.path.isfile(full_path):
+                        found.append(full_path)
+    except OSError:
+        return None
+    return found
+
+def _walk_package(package_dir, filename):
+    """Pruned scandir walk that never leaves the package directory."""
+    found = []
+    stack = [package_dir]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != "__pycache__":
+                            stack.append(entry.path)
+                    elif entry.name == filename:
+                        found.append(entry.path)
+        except OSError:
+            continue
+    return sorted(found)
+
+def locate_package_file(site_packages, package, filename):
+    """
+    Find `filename` inside every copy of an installed package.
+    For each site-packages root:
+    1. The package's dist-info RECORD (exact, no directory traversal).
+    2. Otherwise PathFinder.find_spec on that root (no import),
+       then a walk limited to the package directory.
+    Returns a list of absolute paths (possibly empty).
+    """
+    found = []
+    for root in site_packages:
+        entry = DistIndex([root]).get(package)
+        if entry and os.path.basename(entry["record"]) == "RECORD":
+            from_record = _from_record(entry, package, filename)
+            if from_record:
+                found.extend(p for p in from_record if p not in found)
+                continue
+
+        spec = PathFinder.find_spec(package, [root])
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for package_dir in spec.submodule_search_locations:
+            found.extend(p for p in _walk_package(package_dir, filename) if p not in found)
+    return found
+
+def locate_sessionmanager(site_packages):
+    """Find ofscraper's sessionmanager.py in the given site-packages roots."""
+    return locate_package_file(site_packages, "ofscraper", "sessionmanager.py")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# planner.py - Compare desired package pins with what is installed and run only what changes something
+
+import subprocess
+
+from common import (
+    RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOHTTP,
+    RECOMMENDED_OS_VERSION
+)
+from dist_index import DistIndex, parse_pin
+from env_probe import get_environment_snapshot
+from installer import CommandCancelled, get_installer, run_command
+from wheelhouse import WheelhouseError
+
+# Every pin the fixes care about, in install order
+RECOMMENDED_PINS = [
+    f"ofscraper=={RECOMMENDED_OS_VERSION}",
+    RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOHTTP,
+]
+
+def target_environments(install_type=None, snapshot=None):
+    """
+    Describe the environments ofscraper is installed in ("pip", "pipx" or both).
+    With install_type None the detected type is used; nothing detected means the pip side.
+    """
+    snapshot = snapshot or get_environment_snapshot()
+    if install_type is None:
+        install_type = snapshot["install_type"] or "pip"
+    envs = []
+    if install_type in ("pip", "both"):
+        pip_info = snapshot["pip"]
+        envs.append({"kind": "pip", "label": "pip", "python": pip_info["python"],
+                     "site_packages": pip_info["site_packages"]})
+    if install_type in ("pipx", "both"):
+        pipx_info = snapshot["pipx"]
+        envs.append({"kind": "pipx", "label": "pipx", "python": pipx_info["python"],
+                     "site_packages": pipx_info["site_packages"], "venv": pipx_info["venv"]})
+    return envs
+
+def install_command(env, pin, force=False):
+    """Build the command that installs one pin into an environment, via its installer backend."""
+    return get_installer(env["kind"], env.get("python")).install_command([pin], force=force)
+
+def plan_actions(envs, pins, force=False):
+    """
+    Return the minimal list of actions needed to bring envs to the pins.
+    Each action is a dict with env, package, installed, desired, reason and command.
+    A pin that is already installed produces no action unless force=True.
+    """
+    actions = []
+    for env in envs:
+        index = DistIndex(env["site_packages"])
+        for pin in pins:
+            name, desired = parse_pin(pin)
+            installed = index.version(name)
+            if installed == desired and not force:
+                continue
+            if installed == desired:
+                reason = "forced"
+            elif installed is None:
+                reason = "missing"
+            else:
+                reason = "outdated"
+            actions.append({
+                "env": env,
+                "package": name,
+                "installed": installed,
+                "desired": desired,
+                "reason": reason,
+                "command": install_command(env, pin, force=force),
+            })
+    return actions
+
+def plan_batched(envs, pins, force=False):
+    """
+    Like plan_actions, but at most one action per environment.
+    When anything in an env needs changing, every pin is passed to the same command,
+    so the resolver sees all of them together instead of one pin undoing another.
+    Batched actions carry the individual changes under "steps".
+    """
+    batched = []
+    for env in envs:
+        steps = plan_actions([env], pins, force=force)
+        if not steps:
+            continue
+        command_pins = list(pins)
+        if env["kind"] == "pipx" and all(step["package"] != "ofscraper" for step in steps):
+            # ofscraper itself is fine: inject the rest into its venv (pipx records injected packages)
+            command_pins = [pin for pin in pins if parse_pin(pin)[0] != "ofscraper"]
+        installer = get_installer(env["kind"], env.get("python"))
+        batched.append({
+            "env": env,
+            "package": ", ".join(step["package"] for step in steps),
+            "installed": None,
+            "desired": None,
+            "reason": "batched",
+            "steps": steps,
+            "command": installer.install_command(command_pins, force=force),
+        })
+    return batched
+
+def _action_title(action):
+    if "steps" in action:
+        return ", ".join(f"{step['package']}=={step['desired']}" for step in action["steps"])
+    return f"{action['package']}=={action['desired']}"
+
+def describe_action(action):
+    """One-line human description of an action."""
+    if "steps" in action:
+        return f"{action['env']['label']}: one install for " + "; ".join(
+            describe_action(step).split(": ", 1)[1] for step in action["steps"])
+    current = action["installed"] or "not installed"
+    return (f"{action['env']['label']}: {action['package']} {current} -> {action['desired']}"
+            f" ({action['reason']})")
+
+def execute_plan(actions, update_status, runner=None, refresh_snapshot=True):
+    """
+    Run each planned command, logging progress. Returns the number of failed actions.
+    runner (e.g. proc_runner.StreamingRunner) runs the commands instead of a blocking subprocess.run.
+    refresh_snapshot=False skips re-probing this process's environment afterwards
+    (for callers working on other environments, like fleet workers).
+    """
+    run = runner.run if runner is not None else run_command
+    failures = 0
+    for position, action in enumerate(actions):
+        label = action["env"]["label"]
+        update_status(f"Installing {_action_title(action)} via {label}...")
+        try:
+            run(action["command"])
+            update_status(f"{_action_title(action)} installed successfully via {label}.")
+        except CommandCancelled:
+            # Whatever is left of the plan is skipped too
+            remaining = len(actions) - position
+            update_status(f"Cancelled; {remaining - 1} remaining action(s) skipped.")
+            failures += remaining
+            break
+        except (subprocess.CalledProcessError, OSError) as e:
+            failures += 1
+            update_status(f"Error installing {action['package']} via {label}:\n{e}")
+    if actions and refresh_snapshot:
+        # Versions just changed; don't let later checks read the old snapshot
+        get_environment_snapshot(refresh=True)
+    return failures
+
+def apply_pins(envs, pins, update_status, force=False, confirm_force=None, batch=False, runner=None):
+    """
+    Plan and run the pins for envs. Returns the executed actions
+    (an empty list means everything was already satisfied).
+    If nothing needs doing, confirm_force() is asked whether to reinstall anyway,
+    which is only useful for a corrupted install.
+    With batch=True each environment gets a single install command for all pins.
+    runner is passed on to execute_plan.
+    """
+    plan = plan_batched if batch else plan_actions
+    try:
+        actions = plan(envs, pins, force=force)
+    except WheelhouseError as e:
+        # Never fall back to PyPI when the local wheels don't match their hashes
+        update_status(str(e))
+        return []
+    if not actions:
+        for env in envs:
+            update_status(f"{env['label']}: {', '.join(pins)} already installed; nothing to do.")
+        if force or confirm_force is None or not confirm_force():
+            return actions
+        actions = plan(envs, pins, force=True)
+    for action in actions:
+        update_status(f"Planned: {describe_action(action)}")
+    execute_plan(actions, update_status, runner=runner)
+    return actions
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Show (or run) the package actions needed for the recommended pins.")
+    parser.add_argument("--apply", action="store_true", help="run the planned commands")
+    parser.add_argument("--force", action="store_true", help="reinstall pins even if already satisfied")
+    parser.add_argument("--batch", action="store_true", help="one install command per environment")
+    args = parser.parse_args()
+    plan = plan_batched if args.batch else plan_actions
+    planned = plan(target_environments(), RECOMMENDED_PINS, force=args.force)
+    if not planned:
+        print("Everything is already at the recommended versions.")
+    for item in planned:
+        print(describe_action(item))
+        print("    " + " ".join(item["command"]))
+    if args.apply and planned:
+        execute_plan(planned, print)
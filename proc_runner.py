@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# proc_runner.py - Run install commands off the Tk main thread, streaming their output into the log
+
+import os
+import queue
+import signal
+import subprocess
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from installer import CommandCancelled
+
+# How often the output queue is drained, and the most lines shown per drain
+POLL_MS = 100
+MAX_LINES_PER_DRAIN = 200
+# Grace period between terminate and kill when cancelling
+KILL_GRACE_MS = 3000
+
+def popen_streaming(cmd):
+    """Start cmd with stdout+stderr on one text pipe, in its own process group/session."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                            text=True, errors="replace", bufsize=1, env=env, **kwargs)
+
+def terminate_process_tree(proc, force=False):
+    """Stop proc and everything it started (pip's build backends, pipx's inner pip, ...)."""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            # taskkill /T walks the child tree; there is no gentler tree-wide signal
+            subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (OSError, ProcessLookupError):
+        pass
+
+def call_in_thread(parent, func, *args, **kwargs):
+    """
+    Run func on a worker thread while the Tk loop keeps running, and return its result
+    (or re-raise its exception). For slow in-process work such as unpacking a snapshot;
+    func must not touch Tk widgets.
+    """
+    outcome = {}
+    done = tk.BooleanVar(master=parent, value=False)
+
+    def worker():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+
+    def poll():
+        if thread.is_alive():
+            parent.after(POLL_MS, poll)
+        else:
+            done.set(True)
+
+    parent.after(POLL_MS, poll)
+    parent.wait_variable(done)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+class StreamingRunner:
+    """
+    Runs one command at a time on a worker thread. Output lines go through a queue that
+    the Tk main loop drains with after(), so the window keeps repainting and the log fills
+    as pip works. run() still returns only when the command is finished, so tool code stays
+    sequential; a small window with a Cancel button is shown meanwhile.
+    """
+
+    def __init__(self, parent, update_status_callback):
+        self.parent = parent
+        self.update_status = update_status_callback
+        self.proc = None
+
+    def run(self, cmd):
+        """Run cmd; raises CalledProcessError on failure, CommandCancelled if cancelled."""
+        self.lines = queue.Queue()
+        self.error = None
+        self.returncode = None
+        self.cancelled = False
+        self.proc = None
+        self.finished = tk.BooleanVar(master=self.parent, value=False)
+
+        self.update_status("$ " + " ".join(cmd))
+        window = self._show_cancel_window(cmd)
+        threading.Thread(target=self._worker, args=(cmd,), daemon=True).start()
+        self.parent.after(POLL_MS, self._drain)
+        # Keeps processing Tk events (repaints, the Cancel button) until the worker is done
+        self.parent.wait_variable(self.finished)
+        window.destroy()
+
+        if self.error is not None:
+            raise self.error
+        if self.cancelled:
+            raise CommandCancelled(f"Cancelled: {' '.join(cmd)}")
+        if self.returncode != 0:
+            raise subprocess.CalledProcessError(self.returncode, cmd)
+
+    def _worker(self, cmd):
+        try:
+            self.proc = popen_streaming(cmd)
+            for line in self.proc.stdout:
+                self.lines.put(line.rstrip("\r\n"))
+            self.proc.stdout.close()
+            self.returncode = self.proc.wait()
+        except OSError as e:
+            self.error = e
+        finally:
+            # Sentinel: the command is over
+            self.lines.put(None)
+
+    def _drain(self):
+        batch = []
+        done = False
+        try:
+            while len(batch) < MAX_LINES_PER_DRAIN:
+                line = self.lines.get_nowait()
+                if line is None:
+                    done = True
+                    break
+                batch.append(line)
+        except queue.Empty:
+            pass
+        if batch:
+            self.update_status("\n".join(batch))
+        if done:
+            self.finished.set(True)
+        else:
+            self.parent.after(POLL_MS, self._drain)
+
+    def cancel(self):
+        """Terminate the running command and its children; kill them if they ignore it."""
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        self.cancelled = True
+        self.update_status("Cancelling...")
+        terminate_process_tree(self.proc)
+        proc = self.proc
+        self.parent.after(KILL_GRACE_MS, lambda: terminate_process_tree(proc, force=True))
+
+    def _show_cancel_window(self, cmd):
+        window = tk.Toplevel(self.parent)
+        window.title("Running")
+        window.transient(self.parent)
+        window.protocol("WM_DELETE_WINDOW", self.cancel)
+        ttk.Label(window, text="Running:\n" + " ".join(cmd), wraplength=420, justify=tk.LEFT).pack(
+            padx=10, pady=(10, 5), anchor=tk.W)
+        progress = ttk.Progressbar(window, mode="indeterminate", length=420)
+        progress.pack(padx=10, pady=5)
+        progress.start(15)
+        ttk.Button(window, text="Cancel", command=self.cancel).pack(pady=(5, 10))
+        return window
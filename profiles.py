@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# profiles.py - Find every ofscraper profile and check its auth.json (and the root's config.json) concurrently
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from config_rules import DEFAULT_CONFIG_PATH, check_config_file
+
+DEFAULT_CONFIG_ROOT = os.path.dirname(DEFAULT_CONFIG_PATH)
+PROFILE_SUFFIX = "_profile"
+# auth.json fields ofscraper needs; auth_uid is only set for accounts with 2FA
+REQUIRED_AUTH_FIELDS = ("sess", "auth_id", "user_agent", "x-bc")
+OPTIONAL_AUTH_FIELDS = ("auth_uid",)
+
+# Profile status values
+OK = "ok"
+MISSING = "missing"
+UNREADABLE = "unreadable"
+INCOMPLETE = "incomplete"
+
+def _main_profile(root):
+    """The profile a config root uses by default (config.json's main_profile, else main_profile)."""
+    try:
+        with open(os.path.join(root, "config.json"), "r", encoding="utf-8") as f:
+            name = json.load(f).get("main_profile")
+    except (OSError, ValueError, AttributeError):
+        name = None
+    return name if isinstance(name, str) and name else "main_profile"
+
+def discover_profiles(roots):
+    """
+    Every *_profile directory directly inside each config root, plus the root's main profile
+    (which is reported even when its directory doesn't exist yet).
+    Returns a list of {"root", "name", "path", "auth_path", "main"}.
+    """
+    profiles = []
+    for root in dict.fromkeys(os.path.abspath(os.path.expanduser(r)) for r in roots):
+        main = _main_profile(root)
+        try:
+            names = sorted(entry.name for entry in os.scandir(root)
+                           if entry.is_dir() and entry.name.endswith(PROFILE_SUFFIX))
+        except OSError:
+            names = []
+        if main not in names:
+            names.insert(0, main)
+        for name in names:
+            path = os.path.join(root, name)
+            profiles.append({"root": root, "name": name, "path": path,
+                             "auth_path": os.path.join(path, "auth.json"), "main": name == main})
+    return profiles
+
+def check_auth(auth_path):
+    """
+    Check one auth.json for missing or empty fields (values are never returned).
+    Returns {"status", "missing", "empty", "error"}.
+    """
+    result = {"status": OK, "missing": [], "empty": [], "error": None}
+    try:
+        with open(auth_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        result["status"] = MISSING
+        return result
+    except (OSError, ValueError) as e:
+        result["status"] = UNREADABLE
+        result["error"] = str(e)
+        return result
+    # Older ofscraper versions nest the fields under "auth"
+    if isinstance(data, dict) and isinstance(data.get("auth"), dict):
+        data = data["auth"]
+    if not isinstance(data, dict):
+        result["status"] = UNREADABLE
+        result["error"] = "auth.json is not a JSON object"
+        return result
+    for field in REQUIRED_AUTH_FIELDS:
+        if field not in data:
+            result["missing"].append(field)
+        elif not str(data[field] or "").strip():
+            result["empty"].append(field)
+    if result["missing"] or result["empty"]:
+        result["status"] = INCOMPLETE
+    return result
+
+def _check_profile(profile):
+    return dict(profile, auth=check_auth(profile["auth_path"]))
+
+def sweep_profiles(roots=None, max_workers=8):
+    """
+    Check every profile's auth.json and each root's config.json on one thread pool.
+    Returns {"ok", "roots": [{"root", "config", "profiles": [...]}]}.
+    """
+    roots = roots or [DEFAULT_CONFIG_ROOT]
+    profiles = discover_profiles(roots)
+    config_paths = list(dict.fromkeys(os.path.join(p["root"], "config.json") for p in profiles))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        config_futures = {path: pool.submit(check_config_file, path) for path in config_paths
+                          if os.path.isfile(path)}
+        checked = list(pool.map(_check_profile, profiles))
+        configs = {path: future.result() for path, future in config_futures.items()}
+
+    report = {"ok": True, "roots": []}
+    by_root = {}
+    for profile in checked:
+        if profile["root"] not in by_root:
+            config_path = os.path.join(profile["root"], "config.json")
+            by_root[profile["root"]] = {"root": profile["root"], "config": configs.get(config_path),
+                                        "profiles": []}
+            report["roots"].append(by_root[profile["root"]])
+        by_root[profile["root"]]["profiles"].append(profile)
+    for entry in report["roots"]:
+        config = entry["config"]
+        if config is None or config["error"] or config["violations"]:
+            report["ok"] = False
+        if any(p["auth"]["status"] != OK for p in entry["profiles"]):
+            report["ok"] = False
+    return report
+
+def describe_profile(profile):
+    """One-line status of a checked profile."""
+    auth = profile["auth"]
+    label = profile["name"] + (" (main)" if profile["main"] else "")
+    if auth["status"] == OK:
+        return f"{label}: auth.json OK"
+    if auth["status"] == MISSING:
+        return f"{label}: no auth.json"
+    if auth["status"] == UNREADABLE:
+        return f"{label}: auth.json unreadable ({auth['error']})"
+    problems = []
+    if auth["missing"]:
+        problems.append("missing " + ", ".join(auth["missing"]))
+    if auth["empty"]:
+        problems.append("empty " + ", ".join(auth["empty"]))
+    return f"{label}: auth.json " + "; ".join(problems)
+
+def describe_sweep(report):
+    """Human-readable lines for a sweep report."""
+    lines = []
+    for entry in report["roots"]:
+        lines.append(f"{entry['root']}:")
+        config = entry["config"]
+        if config is None:
+            lines.append("  config.json: not found")
+        elif config["error"]:
+            lines.append(f"  config.json: {config['error']}")
+        else:
+            count = len(config["violations"])
+            lines.append("  config.json: OK" if not count else f"  config.json: {count} problem(s)")
+        for profile in entry["profiles"]:
+            lines.append(f"  {describe_profile(profile)}")
+    return lines
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="Check every ofscraper profile's auth.json and each config.json.")
+    parser.add_argument("roots", nargs="*", help=f"ofscraper config directories (default: {DEFAULT_CONFIG_ROOT})")
+    parser.add_argument("--workers", type=int, default=8, help="files checked at once")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    result = sweep_profiles(args.roots, max_workers=args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for line in describe_sweep(result):
+            print(line)
+        print("All profiles OK." if result["ok"] else "Some profiles need attention.")
+    sys.exit(0 if result["ok"] else 1)
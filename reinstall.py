@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 # reinstall.py - Uninstall and reinstall ofScraper
 
-import sys
 import subprocess
 import tkinter as tk
 from tkinter import messagebox, simpledialog
@@ -11,12 +10,19 @@ from common import (
     RECOMMENDED_OS_VERSION,
     check_ofscraper_installation
 )
+from installer import CommandCancelled, get_installer
+from planner import target_environments
+from proc_runner import StreamingRunner, call_in_thread
+from snapshot import SnapshotError, describe_snapshot, latest_snapshot, restore_snapshot, snapshot_root
+from wheelhouse import WheelhouseError
 
 class ReinstallTool:
     def __init__(self, parent, update_status_callback):
         self.parent = parent
         self.update_status = update_status_callback
         self.install_type = None
+        # Streams pip/pipx output into the log and offers a Cancel button
+        self.runner = StreamingRunner(parent, update_status_callback)
         
     def run(self):
         """Run the reinstall tool"""
@@ -24,6 +30,10 @@ class ReinstallTool:
         
         # Check current installation type
         self.install_type = check_ofscraper_installation()
+
+        # A snapshot of a known-good install restores in seconds, without the network
+        if self.offer_restore():
+            return
         
         if self.install_type is None:
             self.update_status("No existing ofScraper installation detected.")
@@ -42,22 +52,65 @@ class ReinstallTool:
         # Ask if user wants to reinstall
         self.offer_install()
         
+    def offer_restore(self):
+        """
+        Offer to restore the newest usable snapshot of the venv ofScraper is installed in.
+        Returns True if ofScraper was restored.
+        """
+        # Restoring replaces whatever is at the snapshot's path, so only snapshots of the
+        # detected install's own venv are offered (none when nothing is detected)
+        if self.install_type is None:
+            return False
+        snapshot = None
+        envs = sorted(target_environments(self.install_type), key=lambda env: env["kind"] != "pipx")
+        for env in envs:
+            root = snapshot_root(env)
+            snapshot = root and latest_snapshot(env["kind"], source_prefix=root)
+            if snapshot:
+                break
+        if not snapshot:
+            return False
+        if not messagebox.askyesno("Reinstall ofScraper",
+                                   f"A {describe_snapshot(snapshot)} is available.\n"
+                                   f"Restore it into {snapshot['source_prefix']} (replacing what is there) "
+                                   "instead of uninstalling and reinstalling from the network?",
+                                   parent=self.parent):
+            self.update_status("Snapshot restore skipped.")
+            return False
+
+        messages = []
+        try:
+            # Unpacking runs off the Tk thread; its messages are logged afterwards
+            call_in_thread(self.parent, restore_snapshot, snapshot, update_status=messages.append)
+        except (SnapshotError, OSError) as e:
+            for message in messages:
+                self.update_status(message)
+            self.update_status(f"Snapshot restore failed, reinstalling instead:\n{e}")
+            return False
+        for message in messages:
+            self.update_status(message)
+
+        new_install_type = check_ofscraper_installation(refresh=True)
+        if new_install_type:
+            self.update_status(f"ofScraper is now installed via {new_install_type}.")
+        else:
+            self.update_status("ofScraper is not installed.")
+        return True
+
     def uninstall_ofscraper(self):
         """Uninstall ofScraper based on installation type"""
         if self.install_type == "pip":
             try:
-                subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                              check=True, text=True)
+                self.runner.run(get_installer("pip").uninstall_command(["ofscraper"]))
                 self.update_status("ofScraper uninstalled successfully via pip.")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, CommandCancelled) as e:
                 self.update_status(f"Error uninstalling via pip:\n{e}")
                 
         elif self.install_type == "pipx":
             try:
-                subprocess.run(["pipx", "uninstall", "ofscraper"],
-                              check=True, text=True)
+                self.runner.run(get_installer("pipx").uninstall_command(["ofscraper"]))
                 self.update_status("ofScraper uninstalled successfully via pipx.")
-            except subprocess.CalledProcessError as e:
+            except (subprocess.CalledProcessError, CommandCancelled) as e:
                 self.update_status(f"Error uninstalling via pipx:\n{e}")
                 
         elif self.install_type == "both":
@@ -66,28 +119,24 @@ class ReinstallTool:
                                            minvalue=1, maxvalue=3, parent=self.parent)
             if method == 1:
                 try:
-                    subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                                  check=True, text=True)
+                    self.runner.run(get_installer("pip").uninstall_command(["ofscraper"]))
                     self.update_status("ofScraper uninstalled successfully via pip.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, CommandCancelled) as e:
                     self.update_status(f"Error uninstalling via pip:\n{e}")
                     
             elif method == 2:
                 try:
-                    subprocess.run(["pipx", "uninstall", "ofscraper"],
-                                  check=True, text=True)
+                    self.runner.run(get_installer("pipx").uninstall_command(["ofscraper"]))
                     self.update_status("ofScraper uninstalled successfully via pipx.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, CommandCancelled) as e:
                     self.update_status(f"Error uninstalling via pipx:\n{e}")
                     
             elif method == 3:
                 try:
-                    subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "ofscraper"],
-                                  check=True, text=True)
-                    subprocess.run(["pipx", "uninstall", "ofscraper"],
-                                  check=True, text=True)
+                    self.runner.run(get_installer("pip").uninstall_command(["ofscraper"]))
+                    self.runner.run(get_installer("pipx").uninstall_command(["ofscraper"]))
                     self.update_status("ofScraper uninstalled successfully via both pip and pipx.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, CommandCancelled) as e:
                     self.update_status(f"Error uninstalling via both methods:\n{e}")
         
     def offer_install(self):
@@ -99,28 +148,27 @@ class ReinstallTool:
             method = simpledialog.askinteger("Install ofScraper",
                                            "Select install method:\n1) pip\n2) pipx",
                                            minvalue=1, maxvalue=2, parent=self.parent)
+            # A built wheelhouse turns the install into local disk copies
             if method == 1:
                 try:
-                    subprocess.run([sys.executable, "-m", "pip", "install", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                  check=True, text=True)
+                    self.runner.run(get_installer("pip").install_command([f"ofscraper=={RECOMMENDED_OS_VERSION}"]))
                     self.update_status("ofScraper installed successfully via pip.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, CommandCancelled, WheelhouseError) as e:
                     self.update_status(f"Error installing via pip:\n{e}")
                     
             elif method == 2:
                 try:
-                    subprocess.run(["pipx", "install", f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                  check=True, text=True)
+                    self.runner.run(get_installer("pipx").install_app_command(f"ofscraper=={RECOMMENDED_OS_VERSION}"))
                     self.update_status("ofScraper installed successfully via pipx.")
-                except subprocess.CalledProcessError as e:
+                except (subprocess.CalledProcessError, CommandCancelled, WheelhouseError) as e:
                     self.update_status(f"Error installing via pipx:\n{e}")
             else:
                 self.update_status("No valid install option selected.")
         else:
             self.update_status("Reinstallation skipped.")
             
-        # Verify installation after reinstall
-        new_install_type = check_ofscraper_installation()
+        # Verify installation after reinstall (re-probe, the install just changed)
+        new_install_type = check_ofscraper_installation(refresh=True)
         if new_install_type:
             self.update_status(f"ofScraper is now installed via {new_install_type}.")
         else:
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# rules_proxy.py - Local caching HTTP server for the dynamic rules file, so workers don't all hit GitHub
+
+import os
+import sys
+import json
+import time
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config_rules import NEW_DYNAMIC_GENERIC_URL
+from fileutils import atomic_write_text, user_cache_dir
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RULES_PATH = "/rules.json"
+# Seconds a cached copy is served before the upstream is asked again (with If-None-Match)
+DEFAULT_MAX_AGE = 300
+UPSTREAM_TIMEOUT = 15
+# Response header saying how the cached copy was obtained ("fresh", "revalidated", ...)
+CACHE_HEADER = "X-Rules-Cache"
+
+def local_rules_url(port=DEFAULT_PORT, host=DEFAULT_HOST):
+    """The URL ofscraper's DYNAMIC_GENERIC_URL should use to read through the proxy."""
+    return f"http://{host}:{port}{RULES_PATH}"
+
+def proxy_running(port=DEFAULT_PORT, host=DEFAULT_HOST, timeout=2):
+    """
+    True if this proxy (not just anything on the port) is serving the rules there:
+    GET /rules.json must answer 200 with the proxy's own Server and cache headers.
+    """
+    try:
+        with urllib.request.urlopen(local_rules_url(port, host), timeout=timeout) as response:
+            return (response.status == 200
+                    and response.headers.get("Server", "").startswith(RulesHandler.server_version)
+                    and response.headers.get(CACHE_HEADER) is not None)
+    except (OSError, ValueError, http.client.HTTPException):
+        return False
+
+class RulesCache:
+    """
+    The rules file plus its validators (ETag, Last-Modified), kept in memory and on disk.
+    refresh() revalidates at most once per max_age, and only one thread talks to the
+    upstream at a time; the others wait and then share the result.
+    """
+
+    def __init__(self, upstream=NEW_DYNAMIC_GENERIC_URL, cache_dir=None, max_age=DEFAULT_MAX_AGE):
+        self.upstream = upstream
+        self.cache_dir = cache_dir or os.path.join(user_cache_dir(), "rules-proxy")
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.body = None
+        self.meta = {}
+        self._load()
+
+    @property
+    def _body_path(self):
+        return os.path.join(self.cache_dir, "rules.json")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.cache_dir, "meta.json")
+
+    def _load(self):
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._body_path, "r", encoding="utf-8") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return
+        # A cache filled from another upstream doesn't count
+        if meta.get("upstream") == self.upstream:
+            self.body, self.meta = body, meta
+
+    def _save(self):
+        atomic_write_text(self._body_path, self.body, durable=False)
+        atomic_write_text(self._meta_path, json.dumps(self.meta, indent=2), durable=False)
+
+    def _fetch_file(self, path):
+        """Local-file upstream (offline testing): validators come from size and mtime."""
+        st = os.stat(path)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        if self.body is not None and etag == self.meta.get("etag"):
+            return 304, None, etag, self.meta.get("last_modified")
+        with open(path, "r", encoding="utf-8") as f:
+            return 200, f.read(), etag, formatdate(st.st_mtime, usegmt=True)
+
+    def _fetch_url(self):
+        request = urllib.request.Request(self.upstream, headers={"User-Agent": "ofscraper-fixes-rules-proxy"})
+        if self.body is not None:
+            if self.meta.get("etag"):
+                request.add_header("If-None-Match", self.meta["etag"])
+            if self.meta.get("last_modified"):
+                request.add_header("If-Modified-Since", self.meta["last_modified"])
+        try:
+            with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as response:
+                body = response.read().decode("utf-8")
+                return 200, body, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, None, e.headers.get("ETag") or self.meta.get("etag"), self.meta.get("last_modified")
+            raise
+
+    def _upstream_path(self):
+        if self.upstream.startswith("file://"):
+            return urllib.request.url2pathname(self.upstream[len("file://"):])
+        if "://" not in self.upstream:
+            return self.upstream
+        return None
+
+    def refresh(self, force=False):
+        """
+        Make sure the cached copy is fresh enough. Returns "fresh", "revalidated", "updated"
+        or "stale" (upstream unreachable, old copy kept). Raises OSError if there is no copy at all.
+        """
+        with self.lock:
+            age = time.time() - self.meta.get("checked", 0)
+            if self.body is not None and not force and age < self.max_age:
+                return "fresh"
+            try:
+                path = self._upstream_path()
+                status, body, etag, last_modified = self._fetch_file(path) if path else self._fetch_url()
+            except (OSError, ValueError, urllib.error.URLError, http.client.HTTPException) as e:
+                # A broken upstream response (e.g. IncompleteRead) keeps the last good copy
+                if self.body is None:
+                    raise OSError(f"Can't fetch {self.upstream}: {e}")
+                self.meta["checked"] = time.time()
+                self.meta["last_error"] = str(e)
+                return "stale"
+            self.meta["checked"] = time.time()
+            self.meta.pop("last_error", None)
+            if status == 304:
+                self._save()
+                return "revalidated"
+            self.body = body
+            self.meta.update(upstream=self.upstream, etag=etag, last_modified=last_modified or
+                             formatdate(time.time(), usegmt=True), fetched=time.time())
+            self._save()
+            return "updated"
+
+class RulesHandler(BaseHTTPRequestHandler):
+    """Serves the cached rules at /rules.json, answering client revalidation with 304."""
+    server_version = "ofscraper-fixes-rules-proxy"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        if self.path.split("?", 1)[0] not in (RULES_PATH, "/"):
+            self.send_error(404)
+            return
+        cache = self.server.cache
+        try:
+            state = cache.refresh()
+        except OSError as e:
+            self.send_error(502, str(e))
+            return
+        etag = cache.meta.get("etag")
+        last_modified = cache.meta.get("last_modified")
+        if self._not_modified(etag, last_modified):
+            self.send_response(304)
+            self._validator_headers(etag, last_modified, state)
+            self.end_headers()
+            return
+        data = cache.body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self._validator_headers(etag, last_modified, state)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag is not None and etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and last_modified:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _validator_headers(self, etag, last_modified, state):
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", f"max-age={self.server.cache.max_age}")
+        self.send_header(CACHE_HEADER, state)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            sys.stderr.write(f"{self.address_string()} - {format % args}\n")
+
+def make_server(cache, port=DEFAULT_PORT, host=DEFAULT_HOST, quiet=False):
+    """A threading HTTP server serving cache (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), RulesHandler)
+    server.daemon_threads = True
+    server.cache = cache
+    server.quiet = quiet
+    return server
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the dynamic rules file from a local cache.")
+    parser.add_argument("--upstream", default=NEW_DYNAMIC_GENERIC_URL,
+                        help="rules URL, or a local file path / file:// URL (default: the recommended rules URL)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE,
+                        help=f"seconds between upstream revalidations (default: {DEFAULT_MAX_AGE})")
+    parser.add_argument("--cache-dir", help="where the cached copy is kept")
+    parser.add_argument("--quiet", "-q", action="store_true", help="don't log requests")
+    args = parser.parse_args()
+
+    rules_cache = RulesCache(args.upstream, args.cache_dir, args.max_age)
+    try:
+        print(f"Rules cache: {rules_cache.refresh()}")
+    except OSError as e:
+        # Keep serving; clients get 502 until the upstream is reachable
+        print(e)
+    httpd = make_server(rules_cache, args.port, args.host, args.quiet)
+    print(f"Serving {args.upstream} at {local_rules_url(httpd.server_address[1], args.host)}")
+    print("Point DYNAMIC_GENERIC_URL here: python3 config_rules.py --fix --rules-url "
+          + local_rules_url(httpd.server_address[1], args.host))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
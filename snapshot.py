@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# snapshot.py - Archive a working ofscraper venv and restore it in seconds instead of reinstalling
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tarfile
+import tempfile
+
+from dist_index import DistIndex
+from env_probe import find_pipx_venv, find_venv_sitepackage_paths, pipx_bin_dir, read_pyvenv_cfg, venv_bin_dir, venv_python
+from fileutils import fsync_dir, user_cache_dir
+from inventory import TRACKED_PACKAGES, interpreter_prefix
+from patch_engine import ALREADY_PATCHED, PATCHED, apply_patches
+
+# Overrides the default location (~/.cache/ofscraper-fixes/snapshots)
+SNAPSHOT_ENV = "OFSCRAPER_FIXES_SNAPSHOTS"
+SNAPSHOT_FORMAT_VERSION = 1
+# Archive layout: the metadata first (so listing reads only the start), then the venv tree
+METADATA_MEMBER = "snapshot.json"
+VENV_MEMBER = "venv"
+# Snapshots kept per kind; older ones are deleted when a new one is made
+KEEP_SNAPSHOTS = 3
+# Files larger than this are never scanned for the venv path
+MAX_RELOCATE_SIZE = 1024 * 1024
+
+class SnapshotError(Exception):
+    """A snapshot can't be made or restored."""
+
+def snapshot_dir():
+    """Return the snapshot directory ($OFSCRAPER_FIXES_SNAPSHOTS or ~/.cache/ofscraper-fixes/snapshots)."""
+    return os.environ.get(SNAPSHOT_ENV) or os.path.join(user_cache_dir(), "snapshots")
+
+def snapshot_root(env):
+    """
+    The venv directory behind a planner environment, or None.
+    Only virtual environments can be snapshotted; a pip install into a system
+    interpreter is shared with everything else on it.
+    """
+    root = env.get("venv")
+    if not root and env.get("python"):
+        root = interpreter_prefix(env["python"])
+    if root and os.path.isfile(os.path.join(root, "pyvenv.cfg")):
+        return os.path.abspath(root)
+    return None
+
+def _candidate_files(venv):
+    """Files that may hold the venv's absolute path: scripts, top-level files, .pth files."""
+    bin_dir = venv_bin_dir(venv)
+    candidates = []
+    for directory in [venv, bin_dir] + sorted(find_venv_sitepackage_paths(venv)):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if directory not in (venv, bin_dir) and not entry.name.endswith(".pth"):
+                continue
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_size <= MAX_RELOCATE_SIZE:
+                candidates.append(entry.path)
+    return candidates
+
+def _relocation_entries(venv):
+    """
+    Return (text files, binary files) under venv that contain its absolute path.
+    Text files are rewritten on restore to a different location; binary ones
+    (Windows .exe launchers) can't be, and are only reported.
+    """
+    needle = os.fsencode(venv)
+    text, binary = [], []
+    for path in _candidate_files(venv):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if needle in data:
+            rel = os.path.relpath(path, venv).replace(os.sep, "/")
+            (binary if b"\0" in data else text).append(rel)
+    return text, binary
+
+def _exposed_apps(venv):
+    """Names of the apps pipx exposes from this venv (empty for plain venvs)."""
+    try:
+        with open(os.path.join(venv, "pipx_metadata.json"), "r", encoding="utf-8") as f:
+            main = json.load(f).get("main_package") or {}
+    except (OSError, ValueError):
+        return []
+    return list(main.get("apps") or [])
+
+def _patch_summary(site_packages):
+    """patch_id -> True if applied, for every registered patch with a target in site_packages."""
+    summary = {}
+    for result in apply_patches(site_packages, dry_run=True):
+        if result["path"]:
+            summary[result["patch_id"]] = result["status"] in (PATCHED, ALREADY_PATCHED)
+    return summary
+
+def create_snapshot(venv, kind, directory=None, update_status=print):
+    """
+    Archive venv as <kind>-<timestamp>.tar.gz with metadata describing where it lived,
+    which base interpreter it needs, which versions are inside and which files hold its path.
+    Returns the metadata (with "path" set to the archive).
+    """
+    venv = os.path.abspath(venv)
+    site_packages = sorted(find_venv_sitepackage_paths(venv))
+    index = DistIndex(site_packages)
+    if index.version("ofscraper") is None:
+        raise SnapshotError(f"ofscraper is not installed in {venv}; nothing worth snapshotting.")
+    python = venv_python(venv)
+    text, binary = _relocation_entries(venv)
+    metadata = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "kind": kind,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "platform": sys.platform,
+        "source_prefix": venv,
+        # The venv's interpreter links to this one; it must still exist on restore
+        "base_python": os.path.realpath(python) if python else None,
+        "python_version": read_pyvenv_cfg(venv).get("version") or read_pyvenv_cfg(venv).get("version_info"),
+        "packages": {name: index.version(name) for name in TRACKED_PACKAGES},
+        "patches": _patch_summary(site_packages),
+        "apps": _exposed_apps(venv),
+        "relocate": text,
+        "binary_refs": binary,
+    }
+
+    directory = directory or snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(directory, f"{kind}-{stamp}.tar.gz")
+    counter = 1
+    while os.path.exists(path):
+        counter += 1
+        path = os.path.join(directory, f"{kind}-{stamp}-{counter}.tar.gz")
+    update_status(f"Saving snapshot of {venv} to {path}...")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".tar.gz")
+    os.close(fd)
+    try:
+        with tarfile.open(tmp_path, "w:gz", compresslevel=6) as tar:
+            data = json.dumps(metadata, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(METADATA_MEMBER)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, fileobj=io.BytesIO(data))
+            tar.add(venv, arcname=VENV_MEMBER)
+        os.replace(tmp_path, path)
+        fsync_dir(directory)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    metadata["path"] = path
+    _prune(directory, kind)
+    update_status(f"Snapshot saved ({os.path.getsize(path) // (1024 * 1024)} MB).")
+    return metadata
+
+def read_metadata(path):
+    """Return a snapshot's metadata (with "path"), reading only the start of the archive."""
+    try:
+        with tarfile.open(path, "r:gz") as tar:
+            member = tar.next()
+            if member is None or member.name != METADATA_MEMBER:
+                raise SnapshotError(f"{path} is not a snapshot archive.")
+            metadata = json.load(tar.extractfile(member))
+    except (OSError, tarfile.TarError, ValueError) as e:
+        raise SnapshotError(f"Can't read snapshot {path}: {e}")
+    if metadata.get("format") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"{path} was made by an incompatible version.")
+    metadata["path"] = path
+    return metadata
+
+def list_snapshots(kind=None, directory=None):
+    """Metadata of every readable snapshot (optionally of one kind), newest first."""
+    directory = directory or snapshot_dir()
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".tar.gz") and not name.startswith(".")]
+    except OSError:
+        return []
+    snapshots = []
+    for name in names:
+        try:
+            metadata = read_metadata(os.path.join(directory, name))
+        except SnapshotError:
+            continue
+        if kind is None or metadata["kind"] == kind:
+            snapshots.append(metadata)
+    snapshots.sort(key=lambda m: os.path.getmtime(m["path"]), reverse=True)
+    return snapshots
+
+def latest_snapshot(kind=None, directory=None, source_prefix=None):
+    """
+    The newest snapshot that can be restored on this machine, or None.
+    With source_prefix, only snapshots taken of that venv count.
+    """
+    for metadata in list_snapshots(kind, directory):
+        if source_prefix and metadata["source_prefix"] != os.path.abspath(source_prefix):
+            continue
+        if not restore_problems(metadata):
+            return metadata
+    return None
+
+def _prune(directory, kind):
+    for metadata in list_snapshots(kind, directory)[KEEP_SNAPSHOTS:]:
+        try:
+            os.unlink(metadata["path"])
+        except OSError:
+            pass
+
+def restore_problems(metadata, target=None):
+    """Reasons a snapshot can't be restored here (empty if it can)."""
+    problems = []
+    if metadata.get("platform") != sys.platform:
+        problems.append(f"made on {metadata.get('platform')}, this is {sys.platform}")
+    base = metadata.get("base_python")
+    if not base or not os.path.exists(base):
+        problems.append(f"its base interpreter {base} no longer exists")
+    target = os.path.abspath(target or metadata["source_prefix"])
+    if target != metadata["source_prefix"] and metadata.get("binary_refs"):
+        problems.append("it has launchers that can't be moved to another location: "
+                        + ", ".join(metadata["binary_refs"]))
+    return problems
+
+def describe_snapshot(metadata):
+    """One-line description of a snapshot."""
+    packages = ", ".join(f"{name} {version}" for name, version in metadata["packages"].items() if version)
+    patched = metadata.get("patches") or {}
+    patch_text = "patched" if patched and all(patched.values()) else "not patched"
+    return f"{metadata['kind']} snapshot from {metadata['created']} ({packages}; {patch_text})"
+
+def _safe_members(tar):
+    """Every member must stay inside the archive's venv/ tree."""
+    members = []
+    for member in tar.getmembers():
+        name = member.name
+        if name == METADATA_MEMBER:
+            continue
+        parts = name.split("/")
+        if os.path.isabs(name) or ".." in parts or parts[0] != VENV_MEMBER:
+            raise SnapshotError(f"Refusing unsafe archive entry: {name}")
+        if member.islnk() and (".." in member.linkname.split("/") or not member.linkname.startswith(VENV_MEMBER + "/")):
+            raise SnapshotError(f"Refusing unsafe hard link: {name}")
+        members.append(member)
+    return members
+
+def _relocate(unpacked, old_prefix, new_prefix, entries):
+    """Rewrite the old venv path to the new one in the recorded text files of an unpacked venv."""
+    old, new = os.fsencode(old_prefix), os.fsencode(new_prefix)
+    for rel in entries:
+        path = os.path.join(unpacked, *rel.split("/"))
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if old in data:
+                mode = os.stat(path).st_mode
+                with open(path, "wb") as f:
+                    f.write(data.replace(old, new))
+                os.chmod(path, mode)
+        except OSError:
+            pass
+
+def _expose_apps(venv, apps, update_status):
+    """Recreate pipx's links to the app scripts (pipx uninstall removes them)."""
+    bin_dir = pipx_bin_dir()
+    for app in apps:
+        source = os.path.join(venv_bin_dir(venv), app)
+        link = os.path.join(bin_dir, app)
+        if not os.path.exists(source) or os.path.exists(link):
+            continue
+        try:
+            os.makedirs(bin_dir, exist_ok=True)
+            if os.path.lexists(link):
+                os.unlink(link)
+            try:
+                os.symlink(source, link)
+            except OSError:
+                shutil.copy2(source, link)
+            update_status(f"Exposed {app} in {bin_dir}.")
+        except OSError as e:
+            update_status(f"Could not expose {app} in {bin_dir}: {e}")
+
+def restore_snapshot(metadata, target=None, update_status=print):
+    """
+    Restore a snapshot to target (default: where it was taken), replacing whatever is there.
+    The archive is unpacked next to the target and swapped in with renames, so a failure
+    part-way leaves the existing venv untouched. Returns the restored venv path.
+    """
+    problems = restore_problems(metadata, target)
+    if problems:
+        raise SnapshotError("Snapshot can't be restored: " + "; ".join(problems))
+    target = os.path.abspath(target or metadata["source_prefix"])
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    update_status(f"Restoring {describe_snapshot(metadata)} to {target}...")
+
+    staging = tempfile.mkdtemp(prefix=".restore-", dir=parent)
+    old = None
+    try:
+        try:
+            with tarfile.open(metadata["path"], "r:gz") as tar:
+                members = _safe_members(tar)
+                if hasattr(tarfile, "tar_filter"):
+                    # Absolute symlinks (bin/python -> base interpreter) are expected, so "tar" not "data"
+                    tar.extractall(staging, members=members, filter="tar")
+                else:
+                    tar.extractall(staging, members=members)
+        except (OSError, tarfile.TarError) as e:
+            raise SnapshotError(f"Can't unpack {metadata['path']}: {e}")
+        restored = os.path.join(staging, VENV_MEMBER)
+        if target != metadata["source_prefix"]:
+            _relocate(restored, metadata["source_prefix"], target, metadata.get("relocate") or [])
+
+        if os.path.lexists(target):
+            old = tempfile.mkdtemp(prefix=".old-", dir=parent)
+            os.rename(target, os.path.join(old, VENV_MEMBER))
+        try:
+            os.rename(restored, target)
+        except OSError:
+            if old:
+                os.rename(os.path.join(old, VENV_MEMBER), target)
+            raise
+        fsync_dir(parent)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+
+    _expose_apps(target, metadata.get("apps") or [], update_status)
+    update_status(f"Restored {target}.")
+    return target
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Save or restore a snapshot of a working ofscraper venv.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    create_parser = subparsers.add_parser("create", help="snapshot the pipx venv (or --venv)")
+    create_parser.add_argument("--venv", help="venv to snapshot (default: the pipx ofscraper venv)")
+    create_parser.add_argument("--kind", help="pip or pipx (default: pipx unless --venv is given)")
+    subparsers.add_parser("list", help="list saved snapshots")
+    restore_parser = subparsers.add_parser("restore", help="restore the newest usable snapshot")
+    restore_parser.add_argument("--kind", help="only consider pip or pipx snapshots")
+    restore_parser.add_argument("--archive", help="restore this snapshot file instead")
+    restore_parser.add_argument("--target", help="restore to this directory instead of the original location")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "create":
+            venv = args.venv or find_pipx_venv()
+            if not venv:
+                parser.error("no pipx ofscraper venv found; pass --venv")
+            create_snapshot(venv, args.kind or ("pip" if args.venv else "pipx"))
+        elif args.command == "list":
+            for item in list_snapshots():
+                issues = restore_problems(item)
+                print(f"{item['path']}\n    {describe_snapshot(item)}"
+                      + (f"\n    not restorable: {'; '.join(issues)}" if issues else ""))
+        else:
+            chosen = read_metadata(args.archive) if args.archive else latest_snapshot(args.kind)
+            if chosen is None:
+                print("No usable snapshot found.")
+                sys.exit(1)
+            restore_snapshot(chosen, args.target)
+    except SnapshotError as e:
+        print(e)
+        sys.exit(1)
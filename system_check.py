@@ -2,7 +2,6 @@
 # system_check.py - Check system compatibility for ofScraper
 
 import sys
-import subprocess
 import webbrowser
 import tkinter as tk
 from tkinter import messagebox, simpledialog
@@ -12,15 +11,22 @@ from common import (
     RECOMMENDED_OS_VERSION, 
     RECOMMENDED_PYTHON_VERSION, 
     PYTHON_DOWNLOAD_URL,
+    RECOMMENDED_AIOLIMITER,
+    RECOMMENDED_AIOHTTP,
     check_ofscraper_installation,
-    get_ofscraper_version
+    get_ofscraper_version,
+    get_package_index
 )
+from inventory import scan_inventory
+from planner import apply_pins, target_environments
+from proc_runner import StreamingRunner, call_in_thread
 
 class SystemCheckTool:
     def __init__(self, parent, update_status_callback):
         self.parent = parent
         self.update_status = update_status_callback
         self.install_type = None
+        self.inventory = []
         
     def run(self):
         """Run the system check tool"""
@@ -41,7 +47,7 @@ class SystemCheckTool:
             return
             
         if current_py != RECOMMENDED_PYTHON_VERSION:
-            self.update_status("Note: The recommended Python version is 3.11.6. If you have Python issues, please install Python 3.11.6.")
+            self.update_status(f"Note: The recommended Python version is {RECOMMENDED_PYTHON_VERSION}. If you have Python issues, please install Python {RECOMMENDED_PYTHON_VERSION}.")
             
         self.update_status("=== Combined System Check & Update ===")
         
@@ -60,6 +66,12 @@ class SystemCheckTool:
         version = get_ofscraper_version(self.install_type)
         self.update_status(f"Detected ofscraper version: {version}")
         
+        # Report the dependencies behind the "Finished Script" and "No Models Found" fixes
+        self.report_dependencies()
+        
+        # Look for other copies of ofscraper under other interpreters (pyenv, conda, venvs...)
+        self.report_inventory()
+        
         if self.install_type is None:
             self.update_status("Warning: ofscraper is not detected via pip or pipx.\nPlease reinstall via pip or pipx to get version " + RECOMMENDED_OS_VERSION + ".")
             return
@@ -90,59 +102,54 @@ class SystemCheckTool:
         
         return self.install_type
         
+    def report_dependencies(self):
+        """Log aiolimiter/aiohttp versions in each environment ofscraper is installed in"""
+        sides = {"pip": ["pip"], "pipx": ["pipx"], "both": ["pip", "pipx"]}.get(self.install_type, [])
+        for side in sides:
+            index = get_package_index(side)
+            for pin in (RECOMMENDED_AIOLIMITER, RECOMMENDED_AIOHTTP):
+                name, recommended = pin.split("==")
+                installed = index.version(name) or "not installed"
+                state = "OK" if installed == recommended else f"recommended {recommended}"
+                self.update_status(f"{side}: {name} {installed} ({state})")
+        
+    def report_inventory(self):
+        """Log every ofscraper install found across the interpreters on this machine"""
+        self.update_status("Scanning other Python installations for ofscraper...")
+        try:
+            # One interpreter probe and patch dry-run per environment; keep the window responsive
+            self.inventory = call_in_thread(self.parent, scan_inventory, only_with_ofscraper=True)
+        except Exception as e:
+            self.update_status(f"Could not scan other Python installations: {e}")
+            return
+        if len(self.inventory) <= 1:
+            return
+        self.update_status(f"Found {len(self.inventory)} ofscraper installs on this machine:")
+        for row in self.inventory:
+            packages = row["packages"]
+            self.update_status(f"  {row['interpreter']} ({row['source']}): ofscraper {packages['ofscraper']}, "
+                               f"aiolimiter {packages['aiolimiter'] or '-'}, aiohttp {packages['aiohttp'] or '-'}, "
+                               f"SSL patch {row['patch_state']}")
+        self.update_status("Make sure you run the copy you fixed; a stale copy earlier on PATH is a common cause of issues.")
+        
     def update_ofscraper(self):
         """Update ofscraper to the recommended version"""
-        if self.install_type == "pip":
-            try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", 
-                               f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                               check=True, text=True)
-                self.update_status("ofscraper updated successfully via pip.")
-            except subprocess.CalledProcessError as e:
-                self.update_status(f"Error updating via pip:\n{e}")
-                
-        elif self.install_type == "pipx":
-            try:
-                subprocess.run(["pipx", "upgrade", "ofscraper"], 
-                               check=True, text=True)
-                self.update_status("ofscraper updated successfully via pipx.")
-            except subprocess.CalledProcessError as e:
-                self.update_status(f"Error updating via pipx:\n{e}")
-                
-        elif self.install_type == "both":
+        install_type = self.install_type
+        if install_type == "both":
             method = simpledialog.askinteger("Update ofscraper",
                                            "Select update method:\n1) pip\n2) pipx\n3) Both",
                                            minvalue=1, maxvalue=3, parent=self.parent)
-            if method == 1:
-                try:
-                    subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", 
-                                   f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                   check=True, text=True)
-                    self.update_status("ofscraper updated successfully via pip.")
-                except subprocess.CalledProcessError as e:
-                    self.update_status(f"Error updating via pip:\n{e}")
-                    
-            elif method == 2:
-                try:
-                    subprocess.run(["pipx", "upgrade", "ofscraper"], 
-                                   check=True, text=True)
-                    self.update_status("ofscraper updated successfully via pipx.")
-                except subprocess.CalledProcessError as e:
-                    self.update_status(f"Error updating via pipx:\n{e}")
-                    
-            elif method == 3:
-                try:
-                    subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", 
-                                   f"ofscraper=={RECOMMENDED_OS_VERSION}"],
-                                   check=True, text=True)
-                    subprocess.run(["pipx", "upgrade", "ofscraper"], 
-                                   check=True, text=True)
-                    self.update_status("ofscraper updated successfully via both pip and pipx.")
-                except subprocess.CalledProcessError as e:
-                    self.update_status(f"Error updating via both methods:\n{e}")
+            install_type = {1: "pip", 2: "pipx", 3: "both"}.get(method)
+            if install_type is None:
+                self.update_status("Update ofscraper not performed.")
+                return
+                
+        # Only environments that aren't already at the recommended version are updated
+        apply_pins(target_environments(install_type), [f"ofscraper=={RECOMMENDED_OS_VERSION}"],
+                   self.update_status, runner=StreamingRunner(self.parent, self.update_status))
                     
-        # Verify the updated version
-        new_version = get_ofscraper_version(self.install_type)
+        # Verify the updated version (re-probe, the install just changed)
+        new_version = get_ofscraper_version(self.install_type, refresh=True)
         self.update_status(f"Updated ofscraper version: {new_version}")
 
 # For standalone testing
@@ -5,16 +5,18 @@ import os
 import sys
 import tkinter as tk
 import threading
+import shlex
 import subprocess
-import site
-import glob
 import shutil
 import tempfile
 
 # Import shared components
 from common import (
     check_ofscraper_installation,
+    get_environment_snapshot
 )
+from installer import get_installer
+from launcher import BARE, ON_PATH, resolve_launch_command
 
 class TestRunTool:
     def __init__(self, parent, update_status_callback):
@@ -40,43 +42,29 @@ class TestRunTool:
         else:
             self.update_status(f"Using ofScraper installed via {install_type}.")
         
-        # Find the pip/pipx executable directly - most reliable approach
-        pip_path = self.get_pip_installed_script()
-        pipx_path = self.get_pipx_installed_script() 
-        
-        # Prefer pipx over pip if both are available (pipx is more likely to be a proper install)
-        if pipx_path:
-            self.update_status(f"Found pipx installed script: {pipx_path}")
-            success = self.launch_in_terminal([pipx_path])
-        elif pip_path:
-            self.update_status(f"Found pip installed script: {pip_path}")
-            success = self.launch_in_terminal([pip_path])
+        # One resolver for every launcher: console script, then module, then entry point
+        command = resolve_launch_command(install_type)
+        if command.kind in (ON_PATH, BARE):
+            self.update_status("Could not find an installed ofScraper; using the ofscraper command on PATH...")
         else:
-            # Fall back to Python module approach
-            self.update_status("Could not find direct executable. Trying module approach...")
-            module_cmd = self.find_installed_ofscraper_module()
-            
-            if module_cmd:
-                self.update_status(f"Using Python module approach: {' '.join(module_cmd)}")
-                success = self.launch_in_terminal(module_cmd)
-            else:
-                self.update_status("Could not determine how to run ofScraper. Trying generic command...")
-                success = self.launch_in_terminal("ofscraper")
+            self.update_status(f"Found ofScraper {command.version or ''} ({command.kind}) for {command.python}")
+        success = self.launch_in_terminal(command.argv)
         
         if not success:
             self.update_status("Failed to launch. Falling back to non-interactive mode.")
-            self.run_ofscraper_in_gui("ofscraper")
+            self.run_ofscraper_in_gui(command.argv)
     
     def try_direct_install(self):
         """Try to install ofScraper if not found"""
         self.update_status("Attempting to install ofScraper using pip...")
         try:
             result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "ofscraper"],
+                get_installer("pip").install_command(["ofscraper"]),
                 capture_output=True, text=True
             )
             if result.returncode == 0:
                 self.update_status("Successfully installed ofScraper via pip.")
+                get_environment_snapshot(refresh=True)
                 return True
             else:
                 self.update_status(f"Failed to install ofScraper: {result.stderr}")
@@ -85,214 +73,11 @@ class TestRunTool:
             self.update_status(f"Error installing ofScraper: {e}")
             return False
     
-    def get_pip_installed_script(self):
-        """Find the actual ofScraper script installed by pip"""
-        try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "show", "-f", "ofscraper"],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode == 0:
-                # Get the location of the package
-                location = None
-                for line in result.stdout.splitlines():
-                    if line.startswith("Location:"):
-                        location = line.split(":", 1)[1].strip()
-                        break
-                
-                if not location:
-                    return None
-                
-                # Look for scripts in the output
-                script_lines = [line.strip() for line in result.stdout.splitlines() 
-                               if "bin/ofscraper" in line or "Scripts\\ofscraper" in line]
-                
-                if script_lines:
-                    # Found a script reference
-                    script_rel_path = script_lines[0].strip()
-                    
-                    # Handle relative vs absolute paths
-                    if os.path.isabs(script_rel_path):
-                        return script_rel_path
-                    
-                    # Try different approaches to construct the path
-                    paths_to_try = [
-                        # Direct relative to location
-                        os.path.join(location, script_rel_path),
-                        # Up two directories (site-packages -> Lib -> Scripts)
-                        os.path.normpath(os.path.join(location, "..", "..", script_rel_path)),
-                        # Up one directory if in a namespace package
-                        os.path.normpath(os.path.join(location, "..", script_rel_path))
-                    ]
-                    
-                    for path in paths_to_try:
-                        self.update_status(f"Checking path: {path}")
-                        if os.path.exists(path):
-                            if os.name == "nt" and not path.endswith(".exe"):
-                                path += ".exe"
-                            if os.path.exists(path):
-                                return path
-                
-                # If we can't find the script directly, look in common script locations
-                common_script_locations = []
-                
-                # Add script locations relative to sys.prefix
-                if hasattr(sys, "prefix"):
-                    if os.name == "nt":
-                        common_script_locations.append(os.path.join(sys.prefix, "Scripts"))
-                    else:
-                        common_script_locations.append(os.path.join(sys.prefix, "bin"))
-                
-                # Add user script locations
-                if os.name == "nt":
-                    common_script_locations.append(os.path.join(site.USER_BASE, "Scripts"))
-                else:
-                    common_script_locations.append(os.path.join(site.USER_BASE, "bin"))
-                
-                # Check each location
-                for script_dir in common_script_locations:
-                    script_name = "ofscraper.exe" if os.name == "nt" else "ofscraper"
-                    full_path = os.path.join(script_dir, script_name)
-                    if os.path.exists(full_path):
-                        return full_path
-        
-        except Exception as e:
-            self.update_status(f"Error finding pip script: {e}")
-        
-        return None
-    
-    def get_pipx_installed_script(self):
-        """Find the actual ofScraper script installed by pipx"""
-        try:
-            # Try common pipx binary locations first
-            bin_locations = []
-            
-            if os.name == "nt":  # Windows
-                bin_locations = [
-                    os.path.join(os.environ.get("LOCALAPPDATA", ""), "pipx", "bin"),
-                    os.path.expanduser("~\\.local\\bin")
-                ]
-            else:  # Unix-like
-                bin_locations = [
-                    os.path.expanduser("~/.local/bin"),
-                    "/usr/local/bin"
-                ]
-            
-            # For Windows, try to find the venv Python first to avoid wrapper issues
-            if os.name == "nt":
-                pipx_venv_path = os.path.join(os.environ.get("LOCALAPPDATA", ""), 
-                                            "pipx", "venvs", "ofscraper")
-                if os.path.isdir(pipx_venv_path):
-                    # Directly run the module with the venv Python to avoid wrapper script issues
-                    python_exe = os.path.join(pipx_venv_path, "Scripts", "python.exe")
-                    if os.path.exists(python_exe):
-                        self.update_status(f"Found pipx venv Python: {python_exe}")
-                        # Instead of trying to use the wrapper, use the venv Python directly with -m
-                        return [python_exe, "-m", "ofscraper"]
-            
-            # If we didn't return a Python + module approach, look for direct executables
-            for bin_dir in bin_locations:
-                script_name = "ofscraper.exe" if os.name == "nt" else "ofscraper"
-                script_path = os.path.join(bin_dir, script_name)
-                if os.path.exists(script_path):
-                    # On Windows, don't return .exe scripts directly - they could be wrappers
-                    # that need specific Python versions
-                    if os.name == "nt":
-                        self.update_status(f"Found pipx script at {script_path}, but will use module approach instead")
-                        # Fall through to find the proper Python + module approach
-                    else:
-                        self.update_status(f"Found pipx script at: {script_path}")
-                        return script_path
-            
-            # If we couldn't find it in the common locations or need module approach,
-            # check pipx json output
-            try:
-                result = subprocess.run(
-                    ["pipx", "list", "--json"],
-                    capture_output=True, text=True
-                )
-                
-                if result.returncode == 0:
-                    import json
-                    data = json.loads(result.stdout)
-                    
-                    if "venvs" in data and "ofscraper" in data["venvs"]:
-                        venv_info = data["venvs"]["ofscraper"]
-                        
-                        # Best approach: use the venv Python + module
-                        if "venv" in venv_info:
-                            venv_path = venv_info["venv"]
-                            if os.name == "nt":
-                                python_path = os.path.join(venv_path, "Scripts", "python.exe")
-                            else:
-                                bin_dir = os.path.join(venv_path, "bin")
-                                python_paths = glob.glob(os.path.join(bin_dir, "python*"))
-                                python_path = python_paths[0] if python_paths else None
-                                
-                            if python_path and os.path.exists(python_path):
-                                self.update_status(f"Using pipx venv Python: {python_path}")
-                                return [python_path, "-m", "ofscraper"]
-            except Exception as e:
-                self.update_status(f"Error checking pipx JSON: {e}")
-                
-        except Exception as e:
-            self.update_status(f"Error finding pipx script: {e}")
-            
-        return None
-    
-    def find_installed_ofscraper_module(self):
-        """Find the ofScraper module for Python module approach"""
-        try:
-            # First check if ofscraper module can be imported
-            result = subprocess.run(
-                [sys.executable, "-c", "import ofscraper; print(ofscraper.__file__)"],
-                capture_output=True, text=True
-            )
-            
-            if result.returncode == 0 and 'ofscraper' in result.stdout:
-                module_file = result.stdout.strip()
-                self.update_status(f"Found ofScraper module at: {module_file}")
-                return [sys.executable, "-m", "ofscraper"]
-        except Exception:
-            pass
-            
-        # Look in site-packages
-        for site_dir in site.getsitepackages() + [site.getusersitepackages()]:
-            ofscraper_dir = os.path.join(site_dir, "ofscraper")
-            if os.path.isdir(ofscraper_dir):
-                self.update_status(f"Found ofScraper at: {ofscraper_dir}")
-                return [sys.executable, "-m", "ofscraper"]
-                
-        # Check pipx venv
-        if os.name == "nt":  # Windows
-            pipx_venv_path = os.path.join(os.environ.get("LOCALAPPDATA", ""), "pipx", "venvs", "ofscraper")
-        else:  # Unix-like
-            pipx_venv_path = os.path.expanduser("~/.local/pipx/venvs/ofscraper")
-            
-        if os.path.isdir(pipx_venv_path):
-            # Find Python in pipx venv
-            if os.name == "nt":
-                python_path = os.path.join(pipx_venv_path, "Scripts", "python.exe")
-            else:
-                python_paths = glob.glob(os.path.join(pipx_venv_path, "bin", "python*"))
-                python_path = python_paths[0] if python_paths else None
-                
-            if python_path and os.path.exists(python_path):
-                self.update_status(f"Using pipx venv Python: {python_path}")
-                return [python_path, "-m", "ofscraper"]
-                
-        return None
-    
     def launch_in_terminal(self, cmd):
-        """Launch ofScraper in a new terminal window"""
+        """Launch ofScraper in a new terminal window (cmd is an argv list; every element is quoted)"""
         try:
-            if isinstance(cmd, list):
-                cmd_display = " ".join(str(c) for c in cmd)
-                self.update_status(f"Launching with command: {cmd_display}")
-            else:
-                cmd_display = cmd
-                self.update_status(f"Launching with command: {cmd_display}")
+            cmd = [cmd] if isinstance(cmd, str) else list(cmd)
+            self.update_status(f"Launching with command: {subprocess.list2cmdline(cmd) if os.name == 'nt' else shlex.join(cmd)}")
                 
             if os.name == "nt":  # Windows
                 # Create a batch file that runs ofscraper directly rather than trying to combine executables
@@ -307,28 +92,14 @@ class TestRunTool:
                     f.write("set PYTHONPATH=\n")
                     
                     # Run from user's home directory
-                    f.write(f"cd /d {os.path.expanduser('~')}\n")
+                    f.write(f"cd /d \"{os.path.expanduser('~')}\"\n")
                     
                     # Set username environment var
                     f.write(f"set USERNAME={os.environ.get('USERNAME', '')}\n")
                     
-                    # For pipx or direct executable, don't use Python to run it
-                    if isinstance(cmd, str) or (isinstance(cmd, list) and cmd[0].endswith(".exe")):
-                        if isinstance(cmd, list):
-                            # Just use the first item if it's an executable
-                            f.write(f"\"{cmd[0]}\"\n")
-                        else:
-                            f.write(f"\"{cmd}\"\n")
-                    # For Python module approach
-                    elif isinstance(cmd, list) and len(cmd) >= 2 and cmd[1] == "-m":
-                        f.write(f"\"{cmd[0]}\" {' '.join(cmd[1:])}\n")
-                    # Generic fallback
-                    else:
-                        if isinstance(cmd, list):
-                            cmd_str = " ".join(f'"{c}"' if ' ' in str(c) else str(c) for c in cmd)
-                            f.write(f"{cmd_str}\n")
-                        else:
-                            f.write(f"{cmd}\n")
+                    # The whole argv (script, python -m, or python -c entry point), quoted for
+                    # CreateProcess; % would otherwise be expanded by the batch interpreter
+                    f.write(subprocess.list2cmdline(cmd).replace("%", "%%") + "\n")
                     
                     # Keep window open
                     f.write("echo.\necho Press any key to close this window...\n")
@@ -338,34 +109,24 @@ class TestRunTool:
                 os.chmod(batch_path, 0o755)
                 os.startfile(batch_path)
                 return True
+            
+            # Run from home directory with clean environment
+            full_cmd = f"cd {shlex.quote(os.path.expanduser('~'))} && PYTHONPATH='' {shlex.join(cmd)}"
                 
-            elif sys.platform == "darwin":  # macOS
-                if isinstance(cmd, list):
-                    cmd_str = " ".join(f"'{c}'" if ' ' in str(c) else str(c) for c in cmd)
-                else:
-                    cmd_str = cmd
-                    
-                # Run from home directory with clean environment
-                full_cmd = f"cd {os.path.expanduser('~')} && PYTHONPATH='' {cmd_str}"
-                
-                apple_script = f'tell application "Terminal" to do script "{full_cmd}"'
+            if sys.platform == "darwin":  # macOS
+                # do script takes an AppleScript string literal
+                script_str = full_cmd.replace("\\", "\\\\").replace('"', '\\"')
+                apple_script = f'tell application "Terminal" to do script "{script_str}"'
                 subprocess.run(["osascript", "-e", apple_script])
                 return True
                 
             elif sys.platform.startswith("linux"):  # Linux
-                if isinstance(cmd, list):
-                    cmd_str = " ".join(f"'{c}'" if ' ' in str(c) else str(c) for c in cmd)
-                else:
-                    cmd_str = cmd
-                    
-                # Create a command that runs from home with clean environment
-                full_cmd = f"cd {os.path.expanduser('~')} && PYTHONPATH='' {cmd_str}; exec bash"
-                
+                full_cmd += "; exec bash"
                 if shutil.which("gnome-terminal"):
                     subprocess.Popen(['gnome-terminal', '--', 'bash', '-c', full_cmd])
                     return True
                 elif shutil.which("xterm"):
-                    subprocess.Popen(['xterm', '-e', full_cmd])
+                    subprocess.Popen(['xterm', '-e', 'bash', '-c', full_cmd])
                     return True
                 
             # No supported terminal found
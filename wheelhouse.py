@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# wheelhouse.py - Local directory of pinned wheels so installs never need PyPI
+
+import os
+import sys
+import json
+import hashlib
+import pathlib
+import subprocess
+
+from dist_index import parse_pin
+from fileutils import atomic_write_text, user_cache_dir
+
+# Overrides the default location (e.g. a shared mount on a fleet)
+WHEELHOUSE_ENV = "OFSCRAPER_FIXES_WHEELHOUSE"
+MANIFEST_NAME = "manifest.json"
+HASHES_NAME = "requirements-hashes.txt"
+MANIFEST_FORMAT_VERSION = 1
+
+# directory -> (directory, (name, size, mtime_ns) of every file) when its verification last
+# passed in this process; any change to a file or the manifest forces a full re-check
+_verified = {}
+
+class WheelhouseError(Exception):
+    """The wheelhouse exists but doesn't match its manifest."""
+
+def wheelhouse_dir():
+    """Return the wheelhouse directory ($OFSCRAPER_FIXES_WHEELHOUSE or ~/.cache/ofscraper-fixes/wheelhouse)."""
+    return os.environ.get(WHEELHOUSE_ENV) or os.path.join(user_cache_dir(), "wheelhouse")
+
+def load_manifest(directory=None):
+    """Return the wheelhouse manifest, or None if no wheelhouse has been built there."""
+    directory = directory or wheelhouse_dir()
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != MANIFEST_FORMAT_VERSION:
+        return None
+    return manifest
+
+def file_sha256(path):
+    """sha256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _requirement_from_filename(filename):
+    """"aiohttp-3.11.16-cp311-....whl" -> "aiohttp==3.11.16"."""
+    if filename.endswith(".whl"):
+        name, version = filename.split("-")[:2]
+    else:
+        stem = filename[:-len(".tar.gz")] if filename.endswith(".tar.gz") else os.path.splitext(filename)[0]
+        name, _, version = stem.rpartition("-")
+    return f"{name}=={version}"
+
+def manifest_hashes(manifest):
+    """normalized name -> {"version", "hashes"} for every file in a wheelhouse manifest."""
+    hashes = {}
+    for filename, sha in manifest["files"].items():
+        name, version = parse_pin(_requirement_from_filename(filename))
+        entry = hashes.setdefault(name, {"version": version, "hashes": []})
+        if entry["version"] == version:
+            entry["hashes"].append(f"sha256:{sha}")
+    return hashes
+
+def build_wheelhouse(pins, directory=None, python=None, update_status=print):
+    """
+    Download/build wheels for the pins and their whole dependency tree into directory,
+    then record every file's sha256 in the manifest and in a --require-hashes requirements file
+    (the whole tree, so install_wheelhouse_command can install it with --no-deps).
+    Wheels are built for `python` (default: this interpreter), so build with the fleet's interpreter.
+    """
+    directory = directory or wheelhouse_dir()
+    python = python or sys.executable
+    os.makedirs(directory, exist_ok=True)
+    update_status(f"Building wheelhouse in {directory} for: {', '.join(pins)}")
+    subprocess.run([python, "-m", "pip", "wheel", "--wheel-dir", directory] + list(pins),
+                   check=True, text=True)
+
+    files = {}
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if entry.is_file() and entry.name.endswith((".whl", ".tar.gz", ".zip")):
+            files[entry.name] = file_sha256(entry.path)
+    manifest = {"format": MANIFEST_FORMAT_VERSION, "pins": list(pins), "python": python, "files": files}
+
+    # One line per distribution: pip rejects a second "name==version" (e.g. a wheel and an sdist)
+    lines = [f"{name}=={entry['version']} " + " ".join(f"--hash={h}" for h in entry["hashes"])
+             for name, entry in manifest_hashes(manifest).items()]
+    atomic_write_text(os.path.join(directory, HASHES_NAME), "\n".join(lines) + "\n")
+    atomic_write_text(os.path.join(directory, MANIFEST_NAME), json.dumps(manifest, indent=2))
+    update_status(f"Wheelhouse ready: {len(files)} files.")
+    return manifest
+
+def verify_wheelhouse(directory=None):
+    """
+    Check every file listed in the manifest against its sha256, and that nothing unlisted
+    was added. Returns a list of problems (empty means the wheelhouse is intact).
+    A passing result is remembered until a file or the manifest changes.
+    """
+    directory = directory or wheelhouse_dir()
+    manifest = load_manifest(directory)
+    if manifest is None:
+        return [f"No wheelhouse manifest in {directory}"]
+    try:
+        stats = tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns)
+                             for e in os.scandir(directory) if e.is_file()))
+    except OSError as e:
+        return [str(e)]
+    key = (directory, stats)
+    if _verified.get(directory) == key:
+        return []
+
+    problems = []
+    present = {name for name, _, _ in stats}
+    for name, sha in manifest["files"].items():
+        if name not in present:
+            problems.append(f"Missing: {name}")
+        elif file_sha256(os.path.join(directory, name)) != sha:
+            problems.append(f"Hash mismatch: {name}")
+    for name in sorted(present - set(manifest["files"]) - {MANIFEST_NAME, HASHES_NAME}):
+        if name.endswith((".whl", ".tar.gz", ".zip")):
+            problems.append(f"Not in manifest: {name}")
+    if not problems:
+        _verified[directory] = key
+    return problems
+
+def active_wheelhouse():
+    """The wheelhouse directory if one has been built, else None."""
+    directory = wheelhouse_dir()
+    return directory if load_manifest(directory) is not None else None
+
+def _find_links_url(directory):
+    # A file:// URL has no backslashes or spaces, so it survives pipx's --pip-args splitting
+    return pathlib.Path(os.path.abspath(directory)).as_uri()
+
+def pip_source_args():
+    """
+    Extra pip arguments that make an install use only the wheelhouse, or [] when there is none.
+    Raises WheelhouseError if the wheelhouse no longer matches its manifest. That catches files
+    changed since the build; pip itself checks no hashes for these pin installs
+    (install_wheelhouse_command does).
+    """
+    directory = active_wheelhouse()
+    if directory is None:
+        return []
+    problems = verify_wheelhouse(directory)
+    if problems:
+        raise WheelhouseError(f"Wheelhouse {directory} failed verification: " + "; ".join(problems))
+    return ["--no-index", "--find-links", _find_links_url(directory)]
+
+def pipx_source_args():
+    """The same as pip_source_args, passed through pipx install/inject/upgrade."""
+    args = pip_source_args()
+    return ["--pip-args=" + " ".join(args)] if args else []
+
+def install_wheelhouse_command(installer, directory=None):
+    """
+    Command that installs the whole wheelhouse from its requirements-hashes.txt with
+    --require-hashes --no-deps, so pip checks every file's hash as it installs it.
+    installer is an installer.get_installer() backend. Raises WheelhouseError if there is none.
+    """
+    directory = directory or wheelhouse_dir()
+    path = os.path.join(directory, HASHES_NAME)
+    if load_manifest(directory) is None or not os.path.isfile(path):
+        raise WheelhouseError(f"No wheelhouse with {HASHES_NAME} in {directory}")
+    return installer.install_requirements_command(path)
+
+if __name__ == "__main__":
+    import argparse
+    from common import RECOMMENDED_AIOLIMITER, RECOMMENDED_AIOHTTP, RECOMMENDED_OS_VERSION
+    parser = argparse.ArgumentParser(description="Build or check the local wheelhouse used for offline installs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="download/build wheels for the pins")
+    build_parser.add_argument("pins", nargs="*", help="pins to include (default: the recommended pins)")
+    build_parser.add_argument("--dir", help="wheelhouse directory")
+    build_parser.add_argument("--python", help="interpreter to build wheels for (default: this one)")
+    verify_parser = subparsers.add_parser("verify", help="check every wheel against the manifest")
+    verify_parser.add_argument("--dir", help="wheelhouse directory")
+    install_parser = subparsers.add_parser("install", help="install every wheel, checking each hash (pip --require-hashes)")
+    install_parser.add_argument("--python", help="interpreter to install into (default: this one)")
+    install_parser.add_argument("--kind", choices=["pip", "pipx"], default="pip",
+                                help="pipx installs into the ofscraper app venv")
+    subparsers.add_parser("path", help="print the wheelhouse directory")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_wheelhouse(args.pins or [f"ofscraper=={RECOMMENDED_OS_VERSION}", RECOMMENDED_AIOLIMITER,
+                                       RECOMMENDED_AIOHTTP], args.dir, args.python)
+    elif args.command == "verify":
+        issues = verify_wheelhouse(args.dir)
+        for issue in issues:
+            print(issue)
+        print("Wheelhouse OK." if not issues else "Wheelhouse verification FAILED.")
+        sys.exit(1 if issues else 0)
+    elif args.command == "install":
+        from installer import get_installer
+        try:
+            command = install_wheelhouse_command(get_installer(args.kind, args.python))
+        except WheelhouseError as e:
+            print(e)
+            sys.exit(1)
+        print(" ".join(command))
+        sys.exit(subprocess.run(command).returncode)
+    else:
+        print(wheelhouse_dir())